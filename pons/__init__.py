@@ -13,7 +13,12 @@ from .mobility import (
     Ns2Movement,
     OneMovement,
     OneMovementManager,
+    SegmentMovement,
+    SegmentMovementManager,
     generate_randomwaypoint_movement,
+    generate_randomwaypoint_segments,
+    generate_randomwaypoint_numpy,
+    compile_contact_plan,
 )
 from .apps import PingApp, App
 from .message import Message, message_event_generator, message_burst_generator
@@ -29,7 +29,7 @@ class App(object):
         event_log(
             self.netsim.env.now,
             "APP",
-            {"event": "RX", "id": self.my_id, "msg": msg.unique_id()},
+            {"event": "RX", "id": self.my_id, "msg": msg},
         )
         self.on_msg_received(msg)
 
@@ -38,7 +38,7 @@ class App(object):
         event_log(
             self.netsim.env.now,
             "APP",
-            {"event": "TX", "src": self.my_id, "dst": msg.dst, "msg": msg.unique_id()},
+            {"event": "TX", "src": self.my_id, "dst": msg.dst, "msg": msg},
         )
         self.netsim.nodes[self.my_id].router.add(msg)
 
@@ -15,6 +15,13 @@ def open_log(filename: str = "/tmp/events.log"):
     event_log_fh = open(filename, "w")
 
 
+def _render(obj):
+    # messages are logged by their unique id, which is only rendered when written
+    if hasattr(obj, "unique_id"):
+        return obj.unique_id()
+    raise TypeError("%r is not JSON serializable" % obj)
+
+
 def event_log(ts: float, category: str, msg: dict):
     global event_log_fh
     global event_filter
@@ -24,7 +31,7 @@ def event_log(ts: float, category: str, msg: dict):
             return
 
     if event_log_fh is not None:
-        event_log_fh.write("%f %s %s\n" % (ts, category, dumps(msg)))
+        event_log_fh.write("%f %s %s\n" % (ts, category, dumps(msg, default=_render)))
 
 
 def close_log():
@@ -1,6 +1,10 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from itertools import count
 import random
 
+# source of the integer handles of messages
+_handles = count()
+
 
 @dataclass
 class Message(object):
@@ -16,7 +20,15 @@ class Message(object):
     src_service: int = 0
     dst_service: int = 0
     content: dict = None
-    metadata = None
+    metadata: dict = None
+    # identifies the message and all its copies, used instead of the unique id
+    # string to index histories and stores
+    handle: int = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.handle = next(_handles)
+        if self.metadata is None:
+            self.metadata = {}
 
     def __str__(self):
         return "Message(%s, src=%d.%d, dst=%d.%d, size=%d)" % (
@@ -28,7 +40,19 @@ class Message(object):
             self.size,
         )
 
+    def copy(self) -> "Message":
+        """
+        returns the copy of the message held by another node
+        the body (ids, size, times and content) is shared and must not be changed,
+        only the header (hops and metadata) belongs to the copy
+        """
+        clone = object.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        clone.metadata = dict(self.metadata)
+        return clone
+
     def unique_id(self) -> str:
+        """returns the unique id as string, only needed to log or print the message"""
         return "%s-%d-%d" % (self.id, self.src, self.created)
 
     def is_expired(self, now):
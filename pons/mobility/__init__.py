@@ -1,2 +1,20 @@
-from .movement import OneMovement, OneMovementManager, generate_randomwaypoint_movement
-from .ns2_parser import Ns2Movement
\ No newline at end of file
+from .movement import (
+    OneMovement,
+    OneMovementManager,
+    SegmentMovementManager,
+    generate_randomwaypoint_movement,
+    generate_randomwaypoint_segments,
+    generate_randomwaypoint_numpy,
+    moves_to_array,
+)
+from .segments import SegmentMovement
+from .models import (
+    MobilityModel,
+    RandomWaypoint,
+    RandomWalk,
+    GaussMarkov,
+    ManhattanGrid,
+)
+from .ns2_parser import Ns2Movement
+from .compiler import compile_contact_plan
+from .trace import load_trace, save_trace, convert_one_file
@@ -0,0 +1,174 @@
+import hashlib
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+from pons.mobility.segments import (
+    SegmentCursor,
+    segments_from_moves,
+    slab_contact_windows,
+)
+from pons.net.contactplan import CoreContact, CoreContactPlan
+
+# bump when the compiled output changes, so old cache entries are not reused
+COMPILER_VERSION = 2
+
+# environment variable enabling the cache of compiled plans in the given directory
+CACHE_DIR_ENV = "PONS_CACHE_DIR"
+
+
+def default_cache_dir() -> Optional[str]:
+    """returns the directory compiled contact plans are cached in, None if caching is off"""
+    return os.environ.get(CACHE_DIR_ENV) or None
+
+
+def _moves_of(movement) -> list:
+    """returns the list of moves of a OneMovement, Ns2Movement or a plain list of moves"""
+    if hasattr(movement, "moves"):
+        return movement.moves
+    return movement
+
+
+def _end_of(movement, moves) -> float:
+    """returns the end time of a movement"""
+    if hasattr(movement, "duration"):
+        return float(movement.duration)
+    if hasattr(movement, "end") and movement.end is not None:
+        return float(movement.end)
+    if len(moves) == 0:
+        return 0.0
+    return float(max(m[0] for m in moves))
+
+
+def movement_hash(movement) -> str:
+    """returns a hash identifying the moves of a movement"""
+    h = hashlib.sha256()
+    for time, node_id, x, y, z in _moves_of(movement):
+        h.update(("%r %d %r %r %r\n" % (time, node_id, x, y, z)).encode())
+    return h.hexdigest()
+
+
+def contact_windows_from_moves(
+    moves,
+    net_range: float,
+    end: float,
+    interpolate: bool = False,
+    slab: float = 60.0,
+) -> List[Tuple[float, float, int, int]]:
+    """
+    returns all contact windows (start, end, node1, node2) of a movement sorted by start time
+    @param moves: the moves (time, node, x, y, z) sorted by time
+    @param net_range: the radio range
+    @param end: windows still open at this time are closed
+    @param interpolate: move linearly between samples, so window borders may lie between
+        samples, instead of keeping each sample until the next one like the simulation does
+    @param slab: the length of the time slabs the movement is processed in
+    """
+    segments = segments_from_moves(moves, interpolate=interpolate)
+    if len(segments) == 0:
+        return []
+    cursors = {node_id: SegmentCursor(s) for node_id, s in segments.items()}
+    start = min(s[0].start for s in segments.values())
+
+    windows = []
+    # windows reaching the end of the previous slab, joined with their continuation
+    open_windows: Dict[Tuple[int, int], float] = {}
+    while start < end:
+        slab_end = min(start + slab, end)
+        pieces = {
+            node_id: cursor.pieces(start, slab_end)
+            for node_id, cursor in cursors.items()
+        }
+        next_open = {}
+        for w_start, w_end, node1, node2 in slab_contact_windows(
+            pieces, net_range, start, slab_end
+        ):
+            pair = (node1, node2)
+            if w_start == start and pair in open_windows:
+                w_start = open_windows.pop(pair)
+            if w_end >= slab_end and slab_end < end:
+                next_open[pair] = w_start
+            else:
+                windows.append((w_start, w_end, node1, node2))
+        for (node1, node2), w_start in open_windows.items():
+            windows.append((w_start, start, node1, node2))
+        open_windows = next_open
+        start = slab_end
+    if not interpolate:
+        # held samples are replaced by the next ones at their time, so windows closed by
+        # a sample end just before it, like the contacts seen by the simulation
+        windows = [
+            (w_start, math.nextafter(w_end, -math.inf) if w_end < end else w_end, a, b)
+            for w_start, w_end, a, b in windows
+        ]
+    windows.sort()
+    return windows
+
+
+def compile_contact_plan(
+    movement,
+    net_range: float,
+    bw: int = 0,
+    loss: float = 0.0,
+    delay: float = 0.0,
+    jitter: float = 0.0,
+    interpolate: bool = False,
+    cache_dir: Optional[str] = None,
+    use_cache: bool = True,
+) -> CoreContactPlan:
+    """
+    compiles a movement and a radio range into a CoreContactPlan
+    if a cache directory is given, the result is cached on disk, keyed by the hash of the moves
+    and the contact parameters
+    the contacts start and end at the exact times the nodes enter and leave the range, so the
+    timespans are floats unless they fall on integer times
+    @param movement: a OneMovement, Ns2Movement or a list of moves (time, node, x, y, z)
+    @param net_range: the radio range
+    @param bw: the bandwidth of the contacts (0 for the default transmission time)
+    @param loss: the loss of the contacts
+    @param delay: the delay of the contacts in ms
+    @param jitter: the jitter of the contacts
+    @param interpolate: move linearly between samples instead of keeping each sample
+        until the next one
+    @param cache_dir: the cache directory, defaults to $PONS_CACHE_DIR, without either nothing
+        is cached
+    @param use_cache: whether to read and write the cache if a cache directory is set
+    """
+    moves = _moves_of(movement)
+    end = _end_of(movement, moves)
+
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    cache_file = None
+    if use_cache and cache_dir is not None:
+        key = "%s-%d-%r-%r-%r-%d-%r-%r-%r" % (
+            movement_hash(movement),
+            COMPILER_VERSION,
+            float(net_range),
+            end,
+            interpolate,
+            bw,
+            loss,
+            delay,
+            jitter,
+        )
+        key = hashlib.sha256(key.encode()).hexdigest()
+        cache_file = os.path.join(cache_dir, "%s.ccm" % key)
+        if os.path.exists(cache_file):
+            return CoreContactPlan.from_file(cache_file)
+
+    contacts = [
+        CoreContact((w_start, w_end), (node1, node2), bw, loss, delay, jitter)
+        for w_start, w_end, node1, node2 in contact_windows_from_moves(
+            moves, net_range, end, interpolate=interpolate
+        )
+    ]
+    plan = CoreContactPlan(contacts=contacts)
+
+    if cache_file is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        # write to a temporary file first, so concurrent runs never read partial plans
+        tmp_file = "%s.%d.tmp" % (cache_file, os.getpid())
+        plan.save(tmp_file)
+        os.replace(tmp_file, cache_file)
+    return plan
@@ -0,0 +1,316 @@
+import math
+import random
+from typing import Generator, Iterator, Tuple
+
+from pons.mobility.segments import Segment
+
+# (x, y, time, vx, vy) of a node after a move
+MoveState = Tuple[float, float, float, float, float]
+
+
+class MobilityModel(object):
+    """Base class of mobility models generating the movement of each node on the fly.
+
+    The segments of a node are generated one after the other when they are
+    needed, so memory stays constant with the duration of the simulation.
+    Every node draws from its own random generator seeded by the model seed
+    and its id, so its movement does not depend on when it is queried.
+    """
+
+    def __init__(self, width: float, height: float, seed=None):
+        self.width = width
+        self.height = height
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seed = seed
+
+    def __str__(self):
+        return "%s(%.02f, %.02f, seed=%r)" % (
+            self.__class__.__name__,
+            self.width,
+            self.height,
+            self.seed,
+        )
+
+    def __contains__(self, node_id: int) -> bool:
+        # every node moves according to the model
+        return True
+
+    def _random(self, node_id: int) -> random.Random:
+        return random.Random("%s:%d" % (self.seed, node_id))
+
+    def _generate(self, node_id: int, rng: random.Random) -> Iterator[Segment]:
+        """yields the segments of a node starting at time 0"""
+        raise NotImplementedError
+
+    def node_segments(self, node_id: int, time: float = 0.0) -> Iterator[Segment]:
+        """returns an iterator over the segments of a node, starting with the one at the given time"""
+        for segment in self._generate(node_id, self._random(node_id)):
+            if segment.end >= time:
+                yield segment
+
+    def position_at(self, node_id: int, t: float) -> Tuple[float, float, float]:
+        """returns the position of a node at time t, generating its movement up to t"""
+        segment = next(self.node_segments(node_id, t))
+        return segment.position_at(min(max(t, segment.start), segment.end))
+
+    def _move(
+        self, x: float, y: float, t: float, vx: float, vy: float, duration: float
+    ) -> Generator[Segment, None, MoveState]:
+        """
+        yields the segments of a move with constant velocity that is reflected at the borders
+        and returns the state of the node afterwards
+        """
+        # nodes cannot move along a dimension without extent
+        if self.width == 0:
+            vx = 0.0
+        if self.height == 0:
+            vy = 0.0
+        remaining = duration
+        while remaining > 0:
+            # times until the borders are hit
+            hit_x = math.inf
+            if vx > 0:
+                hit_x = max((self.width - x) / vx, 0.0)
+            elif vx < 0:
+                hit_x = max(-x / vx, 0.0)
+            hit_y = math.inf
+            if vy > 0:
+                hit_y = max((self.height - y) / vy, 0.0)
+            elif vy < 0:
+                hit_y = max(-y / vy, 0.0)
+            step = min(remaining, hit_x, hit_y)
+            if step > 0:
+                yield Segment(t, t + step, x, y, 0.0, vx, vy, 0.0)
+            x += vx * step
+            y += vy * step
+            t += step
+            remaining -= step
+            if step == hit_x:
+                x = self.width if vx > 0 else 0.0
+                vx = -vx
+            if step == hit_y:
+                y = self.height if vy > 0 else 0.0
+                vy = -vy
+        return x, y, t, vx, vy
+
+
+class RandomWaypoint(MobilityModel):
+    """Random waypoint: nodes pause, then move to a random point with a random speed."""
+
+    def __init__(
+        self,
+        width: float,
+        height: float,
+        min_speed: float = 1.0,
+        max_speed: float = 5.0,
+        min_pause: float = 0.0,
+        max_pause: float = 120.0,
+        seed=None,
+    ):
+        super().__init__(width, height, seed)
+        self.min_speed = min_speed
+        self.max_speed = max_speed
+        self.min_pause = min_pause
+        self.max_pause = max_pause
+
+    def _generate(self, node_id: int, rng: random.Random) -> Iterator[Segment]:
+        t = 0.0
+        x = rng.uniform(0, self.width)
+        y = rng.uniform(0, self.height)
+        if (self.width == 0 and self.height == 0) or self.max_speed <= 0:
+            yield Segment(t, math.inf, x, y, 0.0)
+            return
+        while True:
+            pause = rng.uniform(self.min_pause, self.max_pause)
+            if pause > 0:
+                yield Segment(t, t + pause, x, y, 0.0)
+                t += pause
+            way_x = rng.uniform(0, self.width)
+            way_y = rng.uniform(0, self.height)
+            speed = rng.uniform(self.min_speed, self.max_speed)
+            dist = math.hypot(way_x - x, way_y - y)
+            if dist == 0 or speed <= 0:
+                continue
+            travel = dist / speed
+            vx = (way_x - x) / travel
+            vy = (way_y - y) / travel
+            yield Segment(t, t + travel, x, y, 0.0, vx, vy, 0.0)
+            t += travel
+            x, y = way_x, way_y
+
+
+class RandomWalk(MobilityModel):
+    """Random walk: nodes move in a random direction with a random speed for a fixed time,
+    bouncing off the borders of the world."""
+
+    def __init__(
+        self,
+        width: float,
+        height: float,
+        min_speed: float = 1.0,
+        max_speed: float = 5.0,
+        interval: float = 10.0,
+        seed=None,
+    ):
+        super().__init__(width, height, seed)
+        self.min_speed = min_speed
+        self.max_speed = max_speed
+        self.interval = interval
+
+    def _generate(self, node_id: int, rng: random.Random) -> Iterator[Segment]:
+        t = 0.0
+        x = rng.uniform(0, self.width)
+        y = rng.uniform(0, self.height)
+        while True:
+            direction = rng.uniform(0, 2 * math.pi)
+            speed = rng.uniform(self.min_speed, self.max_speed)
+            vx = speed * math.cos(direction)
+            vy = speed * math.sin(direction)
+            x, y, t, _, _ = yield from self._move(x, y, t, vx, vy, self.interval)
+
+
+class GaussMarkov(MobilityModel):
+    """Gauss-Markov: speed and direction are updated every interval from their previous
+    values, their means and Gaussian noise, tuned by the memory level alpha.
+
+    Near the borders the mean direction points to the center of the world.
+    """
+
+    def __init__(
+        self,
+        width: float,
+        height: float,
+        mean_speed: float = 3.0,
+        alpha: float = 0.75,
+        interval: float = 1.0,
+        speed_std: float = 1.0,
+        direction_std: float = 0.5,
+        margin: float = 0.1,
+        seed=None,
+    ):
+        """
+        @param alpha: memory level between 0 (random walk) and 1 (linear motion)
+        @param margin: fraction of the world size near the borders in which nodes turn to the center
+        """
+        super().__init__(width, height, seed)
+        self.mean_speed = mean_speed
+        self.alpha = alpha
+        self.interval = interval
+        self.speed_std = speed_std
+        self.direction_std = direction_std
+        self.margin = margin
+
+    def _generate(self, node_id: int, rng: random.Random) -> Iterator[Segment]:
+        t = 0.0
+        x = rng.uniform(0, self.width)
+        y = rng.uniform(0, self.height)
+        speed = self.mean_speed
+        direction = rng.uniform(0, 2 * math.pi)
+        mean_direction = direction
+        noise = math.sqrt(1 - self.alpha * self.alpha)
+        while True:
+            vx = speed * math.cos(direction)
+            vy = speed * math.sin(direction)
+            x, y, t, vx, vy = yield from self._move(x, y, t, vx, vy, self.interval)
+            if vx != 0 or vy != 0:
+                # keep the direction of moves reflected at a border
+                direction = math.atan2(vy, vx)
+            if (
+                x < self.margin * self.width
+                or x > (1 - self.margin) * self.width
+                or y < self.margin * self.height
+                or y > (1 - self.margin) * self.height
+            ):
+                mean_direction = math.atan2(self.height / 2 - y, self.width / 2 - x)
+                # turn the shorter way round
+                direction = mean_direction + math.remainder(
+                    direction - mean_direction, 2 * math.pi
+                )
+            speed = (
+                self.alpha * speed
+                + (1 - self.alpha) * self.mean_speed
+                + noise * rng.gauss(0, self.speed_std)
+            )
+            speed = max(speed, 0.0)
+            direction = (
+                self.alpha * direction
+                + (1 - self.alpha) * mean_direction
+                + noise * rng.gauss(0, self.direction_std)
+            )
+
+
+class ManhattanGrid(MobilityModel):
+    """Manhattan grid: nodes move along the streets of a grid from intersection to
+    intersection, going straight or turning left or right at each intersection."""
+
+    # east, north, west, south
+    DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
+    def __init__(
+        self,
+        width: float,
+        height: float,
+        block_size: float = 100.0,
+        min_speed: float = 1.0,
+        max_speed: float = 5.0,
+        turn_probability: float = 0.5,
+        seed=None,
+    ):
+        """
+        @param block_size: the distance between two streets
+        @param turn_probability: the probability to turn left or right at an intersection
+        """
+        super().__init__(width, height, seed)
+        self.block_size = block_size
+        self.min_speed = min_speed
+        self.max_speed = max_speed
+        self.turn_probability = turn_probability
+        self.columns = int(width // block_size)
+        self.rows = int(height // block_size)
+
+    def _valid(self, i: int, j: int, direction: int) -> bool:
+        di, dj = self.DIRECTIONS[direction]
+        return 0 <= i + di <= self.columns and 0 <= j + dj <= self.rows
+
+    def _generate(self, node_id: int, rng: random.Random) -> Iterator[Segment]:
+        t = 0.0
+        i = rng.randint(0, self.columns)
+        j = rng.randint(0, self.rows)
+        valid = [d for d in range(4) if self._valid(i, j, d)]
+        if len(valid) == 0 or self.max_speed <= 0:
+            yield Segment(t, math.inf, i * self.block_size, j * self.block_size, 0.0)
+            return
+        direction = rng.choice(valid)
+        while True:
+            speed = rng.uniform(self.min_speed, self.max_speed)
+            if speed <= 0:
+                continue
+            di, dj = self.DIRECTIONS[direction]
+            travel = self.block_size / speed
+            yield Segment(
+                t,
+                t + travel,
+                i * self.block_size,
+                j * self.block_size,
+                0.0,
+                di * speed,
+                dj * speed,
+                0.0,
+            )
+            t += travel
+            i += di
+            j += dj
+            turns = [
+                d
+                for d in ((direction + 1) % 4, (direction + 3) % 4)
+                if self._valid(i, j, d)
+            ]
+            straight = self._valid(i, j, direction)
+            if straight and (len(turns) == 0 or rng.random() >= self.turn_probability):
+                continue
+            if len(turns) > 0:
+                direction = rng.choice(turns)
+            else:
+                # dead end, turn around
+                direction = (direction + 2) % 4
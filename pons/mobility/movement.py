@@ -1,10 +1,27 @@
 import random
 import math
+from bisect import bisect_right
 from typing import Dict
 from dataclasses import dataclass
 
 from pons.node import Node
 from pons.simulation import event_log
+from pons.event_log import is_logging
+from pons.mobility.segments import Segment, SegmentMovement
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# fields of a time-sorted structured array of moves
+MOVE_DTYPE = [("time", "<f8"), ("id", "<i8"), ("x", "<f8"), ("y", "<f8"), ("z", "<f8")]
+
+# number of moves searched at once for the last positions before a start time
+SEEK_CHUNK_SIZE = 65536
+
+# number of legs drawn at once by the vectorized random waypoint generator
+RWP_BLOCK_SIZE = 1000000
 
 
 @dataclass
@@ -21,6 +38,8 @@ class OneMovement(object):
         if moves is None:
             moves = []
         self.moves = moves
+        # optional (distinct times, offsets of their first moves) of binary traces
+        self.time_index = None
 
     def __str__(self):
         return "OneMovement(%d, %d, %d, %d, %d)" % (
@@ -54,59 +73,211 @@ class OneMovement(object):
 
 
 class OneMovementManager(object):
-    """A The ONE movement manager."""
+    """A The ONE movement manager.
+
+    A single process applies the moves of each timestamp as one batch. The
+    moves are either a list of (time, node, x, y, z) tuples or a time-sorted
+    structured array with the fields of MOVE_DTYPE.
+    """
 
-    def __init__(self, env, nodes: Dict[int, Node], moves):
+    def __init__(
+        self, env, nodes: Dict[int, Node], moves, positions=None, time_index=None
+    ):
         self.env = env
         self.nodes = nodes
         self.moves = moves
         self.move_idx = 0
+        # optional PositionTable the positions of array batches are written to
+        self.positions = positions
+        self.is_array = np is not None and isinstance(moves, np.ndarray)
+        if self.is_array:
+            self.times = moves["time"]
+        # optional (distinct times, offsets of their first moves) of array moves
+        self.time_index = time_index
+        self.batch = 0
 
     def start(self):
-        if self.move_idx <= len(self.moves):
+        if self.env.now > 0:
+            # start in the middle of the trace
+            time = self.env.now
+            self.move_idx = self._seek(time)
+        else:
+            # apply all moves at time 0 and, as always, also the first later move
             time = 0.0
-            while time == 0.0:
-                time, node_id, x, y, z = self.moves[self.move_idx]
+            while time == 0.0 and self.move_idx < len(self.moves):
+                time, node_id, x, y, z = self._move(self.move_idx)
                 self.move_idx += 1
-                node = self.nodes[node_id]
-                node.x = x
-                node.y = y
-                node.z = z
+                self.nodes[node_id].set_position(x, y, z)
+            if time != 0.0:
+                # the first later move is applied again at its time
+                self.move_idx -= 1
+        if self.time_index is not None:
+            offsets = self.time_index[1]
+            self.batch = int(np.searchsorted(offsets, self.move_idx, side="right")) - 1
 
-            for n in self.nodes.values():
-                n.calc_neighbors(time, self.nodes.values())
-            self.env.process(self.move_next(time, node_id, x, y, z))
-
-    def move_next(self, time, node_id, x, y, z):
-        yield self.env.timeout(time - self.env.now)
-        node = self.nodes[node_id]
-        node.x = x
-        node.y = y
-        node.z = z
-        event_log(time, "MOVE", {"event": "SET", "id": node_id, "x": x, "y": y, "z": z})
-
-        # move all nodes with same timestamp
+        for n in self.nodes.values():
+            n.calc_neighbors(time, self.nodes.values())
+        self.env.process(self.run())
+
+    def _seek(self, time: float) -> int:
+        """
+        places every node at its last position at or before the given time
+        and returns the index of the first later move
+        """
+        if self.time_index is not None:
+            times, offsets = self.time_index
+            end = int(offsets[np.searchsorted(times, time, side="right")])
+        elif self.is_array:
+            end = int(np.searchsorted(self.times, time, side="right"))
+        else:
+            end = bisect_right(self.moves, (time, math.inf))
+        placed = set()
+        # walk back in chunks until the last move of every node has been found
+        stop = end
+        while stop > 0 and len(placed) < len(self.nodes):
+            begin = max(stop - SEEK_CHUNK_SIZE, 0)
+            if self.is_array:
+                chunk = self.moves[begin:stop].tolist()
+            else:
+                chunk = self.moves[begin:stop]
+            for _, node_id, x, y, z in reversed(chunk):
+                if node_id not in placed and node_id in self.nodes:
+                    placed.add(node_id)
+                    self.nodes[node_id].set_position(x, y, z)
+            stop = begin
+        return end
+
+    def _move(self, i: int):
+        if self.is_array:
+            return self.moves[i].tolist()
+        return self.moves[i]
+
+    def _batch_end(self, time: float) -> int:
+        """returns the index after the last move at the given time"""
+        if self.time_index is not None:
+            self.batch += 1
+            return int(self.time_index[1][self.batch])
+        if self.is_array:
+            return int(np.searchsorted(self.times, time, side="right"))
+        end = self.move_idx
+        while end < len(self.moves) and self.moves[end][0] == time:
+            end += 1
+        return end
+
+    def run(self):
         while self.move_idx < len(self.moves):
-            next_time, node_id, x, y, z = self.moves[self.move_idx]
-            self.move_idx += 1
-
-            if time == next_time:
-                node = self.nodes[node_id]
-                node.x = x
-                node.y = y
-                node.z = z
+            time = self._move(self.move_idx)[0]
+            yield self.env.timeout(time - self.env.now)
+            end = self._batch_end(time)
+            if self.is_array:
+                self._apply_array(self.moves[self.move_idx : end])
+            else:
+                for _, node_id, x, y, z in self.moves[self.move_idx : end]:
+                    self.nodes[node_id].set_position(x, y, z)
+                    event_log(
+                        time,
+                        "MOVE",
+                        {"event": "SET", "id": node_id, "x": x, "y": y, "z": z},
+                    )
+            self.move_idx = end
+
+            now = self.env.now
+            for n in self.nodes.values():
+                n.calc_neighbors(now, self.nodes.values())
+
+    def _apply_array(self, batch):
+        """applies a batch of moves from a structured array"""
+        ids = batch["id"]
+        if self.positions is not None:
+            # write all coordinates at once, the nodes' positions are views into the table
+            rows = np.fromiter(
+                (self.positions.rows[i] for i in ids.tolist()),
+                dtype=np.intp,
+                count=len(ids),
+            )
+            self.positions.xyz[rows, 0] = batch["x"]
+            self.positions.xyz[rows, 1] = batch["y"]
+            self.positions.xyz[rows, 2] = batch["z"]
+            for node_id in ids.tolist():
+                self.nodes[node_id]._moved()
+        else:
+            for node_id, x, y, z in zip(
+                ids.tolist(),
+                batch["x"].tolist(),
+                batch["y"].tolist(),
+                batch["z"].tolist(),
+            ):
+                self.nodes[node_id].set_position(x, y, z)
+        if is_logging():
+            for time, node_id, x, y, z in batch.tolist():
                 event_log(
                     time,
                     "MOVE",
                     {"event": "SET", "id": node_id, "x": x, "y": y, "z": z},
                 )
-            else:
-                self.env.process(self.move_next(next_time, node_id, x, y, z))
-                break
 
-        now = self.env.now
-        for n in self.nodes.values():
-            n.calc_neighbors(now, self.nodes.values())
+
+class SegmentMovementManager(object):
+    """Moves the nodes along the segments of a SegmentMovement or MobilityModel.
+
+    Positions are evaluated lazily: the neighbor service asks for the
+    positions at a time before it computes the neighbors. Only the current
+    segment of each node is kept, later ones are read when it has ended.
+    """
+
+    def __init__(self, env, nodes: Dict[int, Node], movement):
+        self.env = env
+        self.nodes = nodes
+        self.movement = movement
+        self.moving = [node_id for node_id in nodes if node_id in movement]
+        # iterators over the remaining segments and the current segment of each node
+        self.sources = {}
+        self.current: Dict[int, Segment] = {}
+        # the stationary segment each node has already been placed on
+        self.placed: Dict[int, Segment] = {}
+        self.time = None
+
+    def __str__(self):
+        return "SegmentMovementManager(%s, time=%r)" % (self.movement, self.time)
+
+    def start(self):
+        self.update(self.env.now)
+
+    def update(self, time: float):
+        """places all nodes at their positions at the given time"""
+        if time == self.time:
+            return
+        self.time = time
+        for node_id in self.moving:
+            segment = self.current.get(node_id)
+            if segment is None:
+                # the first update may start in the middle of the movement
+                self.sources[node_id] = self.movement.node_segments(node_id, time)
+                segment = next(self.sources[node_id], None)
+                if segment is None:
+                    continue
+            while segment.end < time:
+                next_segment = next(self.sources[node_id], None)
+                if next_segment is None:
+                    break
+                segment = next_segment
+            self.current[node_id] = segment
+            stationary = segment.vx == 0 and segment.vy == 0 and segment.vz == 0
+            if stationary and self.placed.get(node_id) is segment:
+                continue
+            self.placed[node_id] = segment
+            x, y, z = segment.position_at(min(max(time, segment.start), segment.end))
+            self.nodes[node_id].set_position(x, y, z)
+            event_log(
+                time, "MOVE", {"event": "SET", "id": node_id, "x": x, "y": y, "z": z}
+            )
+
+
+def moves_to_array(moves) -> "np.ndarray":
+    """converts a list of (time, node, x, y, z) moves into a structured array"""
+    if np is None:
+        raise ImportError("numpy is required for move arrays")
+    return np.array([tuple(m) for m in moves], dtype=MOVE_DTYPE)
 
 
 def generate_randomwaypoint_movement(
@@ -149,3 +320,237 @@ def generate_randomwaypoint_movement(
     moves.sort(key=lambda x: (x[0], x[1]))
 
     return moves
+
+
+def generate_randomwaypoint_segments(
+    duration,
+    num_nodes,
+    width,
+    height,
+    min_speed=1.0,
+    max_speed=5.0,
+    min_pause=0,
+    max_pause=120,
+) -> SegmentMovement:
+    """Generate random waypoint movement as segments.
+
+    Draws the same waypoints as generate_randomwaypoint_movement and moves the
+    nodes the same way, but keeps one segment per pause and leg instead of one
+    move per second.
+    """
+    segments = {}
+    for i in range(num_nodes):
+        node_segments = []
+        cur_time = 0.0
+        x = random.randint(0, width)
+        y = random.randint(0, height)
+        z = 0.0
+        while cur_time < duration:
+            way_x = random.randint(0, width)
+            way_y = random.randint(0, height)
+            speed = random.random() * (max_speed - min_speed) + min_speed
+            pause = random.randint(min_pause, max_pause)
+            if pause > 0:
+                node_segments.append(Segment(cur_time, cur_time + pause, x, y, z))
+            cur_time += pause
+            dist = math.sqrt((way_x - x) ** 2 + (way_y - y) ** 2)
+            time = dist / speed
+            if time == 0:
+                continue
+            step_x = (way_x - x) / time
+            step_y = (way_y - y) / time
+            # the sampled generator checks cur_time + j before each step while
+            # also advancing cur_time, so legs end halfway to the duration
+            steps = min(int(time), max(0, math.ceil((duration - cur_time) / 2)))
+            if steps > 0:
+                node_segments.append(
+                    Segment(cur_time, cur_time + steps, x, y, z, step_x, step_y, 0.0)
+                )
+                cur_time += steps
+                x += step_x * steps
+                y += step_y * steps
+        node_segments.append(Segment(cur_time, math.inf, x, y, z))
+        segments[i] = node_segments
+    return SegmentMovement(segments, duration=duration, width=width, height=height)
+
+
+def generate_randomwaypoint_numpy(
+    duration,
+    num_nodes,
+    width,
+    height,
+    min_speed=1.0,
+    max_speed=5.0,
+    min_pause=0,
+    max_pause=120,
+    seed=None,
+    output="segments",
+):
+    """Generate random waypoint movement with NumPy.
+
+    The waypoints, speeds and pauses of all nodes are drawn in blocks from a
+    seeded Generator, so the movement is reproducible without touching the
+    global random module. Waypoints and pauses are integers like in
+    generate_randomwaypoint_movement, but the nodes reach their waypoints
+    exactly instead of after whole seconds.
+    @param seed: a seed or a numpy Generator
+    @param output: "segments" for a SegmentMovement or "array" for a
+        structured array of moves sampled every second and sorted by time and node
+    """
+    if np is None:
+        raise ImportError(
+            "numpy is required for the vectorized random waypoint generator"
+        )
+    if output not in ("segments", "array"):
+        raise ValueError("unknown output %r" % output)
+    rng = np.random.default_rng(seed)
+    columns = _randomwaypoint_columns(
+        rng,
+        duration,
+        num_nodes,
+        width,
+        height,
+        min_speed,
+        max_speed,
+        min_pause,
+        max_pause,
+    )
+    if output == "array":
+        return _sample_columns(columns, duration)
+    node, start, end, x, y, vx, vy = (c.tolist() for c in columns)
+    segments = {i: [] for i in range(num_nodes)}
+    for i in range(len(node)):
+        segments[node[i]].append(
+            Segment(start[i], end[i], x[i], y[i], 0.0, vx[i], vy[i], 0.0)
+        )
+    return SegmentMovement(segments, duration=duration, width=width, height=height)
+
+
+def _randomwaypoint_columns(
+    rng, duration, num_nodes, width, height, min_speed, max_speed, min_pause, max_pause
+):
+    """returns the node, start, end, x, y, vx and vy columns of all segments sorted by node and time"""
+    # legs drawn per node at once, enough for most nodes to reach the duration
+    # while keeping each block of draws at a few million values
+    mean_leg = (min_pause + max_pause) / 2 + (width + height) / 2 / max(
+        (min_speed + max_speed) / 2, 1e-9
+    )
+    legs = math.ceil(duration / max(mean_leg, 1.0)) + 1
+    legs = max(min(legs, RWP_BLOCK_SIZE // max(num_nodes, 1)), 4)
+
+    nodes = np.arange(num_nodes)
+    cur_x = rng.integers(0, width, size=num_nodes, endpoint=True).astype(np.float64)
+    cur_y = rng.integers(0, height, size=num_nodes, endpoint=True).astype(np.float64)
+    cur_t = np.zeros(num_nodes)
+    init_x = cur_x.copy()
+    init_y = cur_y.copy()
+    blocks = []
+    while len(nodes) > 0:
+        m = len(nodes)
+        way_x = rng.integers(0, width, size=(m, legs), endpoint=True).astype(np.float64)
+        way_y = rng.integers(0, height, size=(m, legs), endpoint=True).astype(
+            np.float64
+        )
+        speed = rng.uniform(min_speed, max_speed, size=(m, legs))
+        pause = rng.integers(min_pause, max_pause, size=(m, legs), endpoint=True)
+        # every leg starts at the waypoint of the previous one
+        from_x = np.concatenate((cur_x[:, None], way_x[:, :-1]), axis=1)
+        from_y = np.concatenate((cur_y[:, None], way_y[:, :-1]), axis=1)
+        travel = np.hypot(way_x - from_x, way_y - from_y) / speed
+        leg_time = pause + travel
+        move_end = cur_t[:, None] + np.cumsum(leg_time, axis=1)
+        leg_start = np.concatenate((cur_t[:, None], move_end[:, :-1]), axis=1)
+        move_start = leg_start + pause
+        with np.errstate(invalid="ignore", divide="ignore"):
+            vx = np.where(travel > 0, (way_x - from_x) / travel, 0.0)
+            vy = np.where(travel > 0, (way_y - from_y) / travel, 0.0)
+
+        # one pause and one move segment per leg, interleaved in time
+        zeros = np.zeros((m, legs))
+        block = [
+            np.stack(column, axis=2).reshape(-1)
+            for column in (
+                (np.broadcast_to(nodes[:, None], (m, legs)),) * 2,
+                (leg_start, move_start),
+                (move_start, move_end),
+                (from_x, from_x),
+                (from_y, from_y),
+                (zeros, vx),
+                (zeros, vy),
+            )
+        ]
+        keep = (block[2] > block[1]) & (block[1] < duration)
+        blocks.append([c[keep] for c in block])
+
+        new_t = move_end[:, -1]
+        # nodes that do not advance in time would never reach the duration
+        active = (new_t < duration) & (new_t > cur_t)
+        nodes = nodes[active]
+        cur_x = way_x[active, -1]
+        cur_y = way_y[active, -1]
+        cur_t = new_t[active]
+
+    columns = [np.concatenate(c) for c in zip(*blocks)]
+    order = np.argsort(columns[0], kind="stable")
+    node, start, end, x, y, vx, vy = (c[order] for c in columns)
+    # each node stays at the end of its last segment or at its initial position
+    last = np.flatnonzero(np.concatenate((node[1:] != node[:-1], [len(node) > 0])))
+    final_x = init_x.copy()
+    final_y = init_y.copy()
+    final_t = np.zeros(num_nodes)
+    last_node = node[last]
+    final_x[last_node] = (x + vx * (end - start))[last]
+    final_y[last_node] = (y + vy * (end - start))[last]
+    final_t[last_node] = end[last]
+    columns = (
+        np.concatenate((node, np.arange(num_nodes))),
+        np.concatenate((start, final_t)),
+        np.concatenate((end, np.full(num_nodes, math.inf))),
+        np.concatenate((x, final_x)),
+        np.concatenate((y, final_y)),
+        np.concatenate((vx, np.zeros(num_nodes))),
+        np.concatenate((vy, np.zeros(num_nodes))),
+    )
+    order = np.argsort(columns[0], kind="stable")
+    return tuple(c[order] for c in columns)
+
+
+def _sample_columns(columns, duration) -> "np.ndarray":
+    """samples segment columns every second into a structured array sorted by time and node"""
+    node, start, end, x, y, vx, vy = columns
+    first = np.flatnonzero(np.concatenate(([True], node[1:] != node[:-1])))
+    # the initial position of every node at time 0
+    parts = [(np.zeros(len(first)), node[first], x[first], y[first])]
+
+    # moving segments are always followed by a segment starting at their waypoint
+    moving = np.flatnonzero((vx != 0) | (vy != 0))
+    after = moving + 1
+    node, start, end, x, y, vx, vy = (c[moving] for c in columns)
+    # every full second within (start, min(end, duration)]
+    last_full = np.floor(np.minimum(end, duration))
+    counts = np.maximum(last_full - np.floor(start), 0).astype(np.int64)
+    seg = np.repeat(np.arange(len(node)), counts)
+    step = np.arange(len(seg)) - np.repeat(np.cumsum(counts) - counts, counts)
+    times = np.floor(start)[seg] + 1 + step
+    dt = times - start[seg]
+    parts.append((times, node[seg], x[seg] + vx[seg] * dt, y[seg] + vy[seg] * dt))
+    # the exact arrival at a waypoint between two full seconds
+    arrival = (end <= duration) & (end != np.floor(end))
+    parts.append(
+        (
+            end[arrival],
+            node[arrival],
+            columns[3][after[arrival]],
+            columns[4][after[arrival]],
+        )
+    )
+
+    times, ids, xs, ys = (np.concatenate(c) for c in zip(*parts))
+    order = np.lexsort((ids, times))
+    moves = np.empty(len(order), dtype=MOVE_DTYPE)
+    moves["time"] = times[order]
+    moves["id"] = ids[order]
+    moves["x"] = xs[order]
+    moves["y"] = ys[order]
+    moves["z"] = 0.0
+    return moves
@@ -1,33 +1,17 @@
 import math
+import re
 from dataclasses import dataclass
-from enum import Enum
-from string import digits
-from typing import List, Tuple, Union
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
 
-from pons.utils import Vector
+from pons.mobility.segments import Segment, SegmentMovement
 
-
-class Token(Enum):
-    """enum for all tokens"""
-
-    NODE = "$node"
-    PARAN_LEFT = "("
-    PARAN_RIGHT = ")"
-    SET = "set"
-    X = "X"
-    Y = "Y"
-    Z = "Z"
-    UNDERLINE = "_"
-    NS = "$ns"
-    AT = "at"
-    QUOTE = '"'
-    SET_DEST = "setdest"
-    BACKSLASH = "\\"
-    NEWLINE = "\n"
-    HASH = "#"
-
-
-TOKENS = [e.value for e in Token]
+# $node_(<node_id>) set <X|Y|Z>_ <value>
+INIT_ROW = re.compile(r"\$node_\(\s*(\d+)\s*\)\s+set\s+([XYZ])_\s+(\S+)\s*$")
+# $ns_ at <time> "$node_(<node_id>) setdest <x> <y> <speed>"
+# the one generated ns2 code uses a backslash before $node_
+DEST_ROW = re.compile(
+    r'\$ns_\s+at\s+(\S+)\s+"\\?\$node_\(\s*(\d+)\s*\)\s+setdest\s+(\S+)\s+(\S+)\s+(\S+)\s*"\s*$'
+)
 
 
 @dataclass
@@ -43,187 +27,63 @@ class Ns2Entry:
 
 
 class Ns2Parser:
-    """ns2 parser"""
-
-    def __init__(self, content: str):
-        self._tokens = self._scan(content)
-        self._current_index = 0
-        self._current_token = self._tokens[0]
-        self._next_token = self._tokens[1]
-
-    @staticmethod
-    def _scan(text: str) -> List[str]:
-        """splits the ns2 file into tokens"""
-        tmp: List[str] = text.split(" ")
-        tokens: List[str] = []
-        for token in tmp:
-            substr_index = 0
-            for i in range(1, len(token)):
-                last_symbol = token[i - 1]
-                current_symbol = token[i]
-                if (
-                    (last_symbol in TOKENS and current_symbol in digits)
-                    or (last_symbol in digits and current_symbol in TOKENS)
-                    or (current_symbol in TOKENS)
-                    or (last_symbol in TOKENS)
-                ):
-                    tokens.append(token[substr_index:i])
-                    substr_index = i
-            tokens.append(token[substr_index:])
-        return list(filter(lambda tok: tok != "", tokens))
+    """line-based ns2 parser"""
 
-    def _check(self, tokens: Union[Token, List[Token]]) -> bool:
+    def __init__(self, content: Union[str, Iterable[str]]):
         """
-        checks if the current token is the given token(s) and returns true in that case
-        @param tokens: either a token or a list of tokens to check for
+        @param content: the content of a ns2 file or an iterable of its lines, e.g., an open file
         """
-        if not isinstance(tokens, list):
-            tokens = [tokens]
-        values = [t.value for t in tokens]
-        return self._current_token in values
-
-    def _accept(self, tokens: Union[Token, List[Token]] = None):
-        """
-        accepts the current token, optionally with a condition
-        @param tokens: either a token, a list of tokens or none if any token should be accepted
-        """
-        if tokens is not None:
-            if not isinstance(tokens, list):
-                tokens = [tokens]
-            if not self._check(tokens):
-                # if the current token is not one of the given tokens
-                raise Exception(
-                    f"expected {', '.join([token.value for token in tokens])} - got {self._current_token}"
-                )
-        # select new current token
-        self._current_index += 1
-        self._current_token = self._tokens[self._current_index]
-        next_index = self._current_index + 1
-        self._next_token = (
-            self._tokens[next_index] if next_index < len(self._tokens) else None
-        )
-
-    def parse(self) -> List[Ns2Entry]:
-        """parses the file and returns a list of ns2 entries"""
-        # parse the first row
-        entries = [self._parse_row()]
-        # as long as a newline and a next token exists
-        while self._check(Token.NEWLINE) and self._next_token is not None:
-            self._accept()
-            # skip commented rows
-            if self._check(Token.HASH):
-                self._skip_until_newline()
+        if isinstance(content, str):
+            content = content.splitlines()
+        self._lines = content
+
+    def entries(self) -> Iterator[Ns2Entry]:
+        """parses the lines one by one and yields their entries"""
+        for line_number, line in enumerate(self._lines, 1):
+            line = line.strip()
+            # skip empty and commented rows
+            if line == "" or line.startswith("#"):
                 continue
-            # parse the row
-            entry = self._parse_row()
+            entry = self._parse_row(line, line_number)
             if entry is not None:
-                entries.append(entry)
-        return entries
+                yield entry
 
-    def _skip_until_newline(self):
-        while not self._check(Token.NEWLINE):
-            self._accept()
+    def parse(self) -> List[Ns2Entry]:
+        """parses the file and returns a list of ns2 entries"""
+        return list(self.entries())
 
-    def _parse_row(self) -> Ns2Entry:
-        """parses a ns2 row"""
-        # row starts with $node
-        if self._check(Token.NODE):
-            return self._parse_init_row()
-        # row starts with $ns
-        if self._check(Token.NS):
-            return self._parse_default_row()
+    @staticmethod
+    def _parse_row(line: str, line_number: int) -> Union[Ns2Entry, None]:
+        """parses a ns2 row, rows setting the z coordinate are skipped"""
+        if line.startswith("$ns"):
+            match = DEST_ROW.match(line)
+            if match is None:
+                raise Exception(f"invalid setdest entry in line {line_number}: {line}")
+            time, node, x, y, speed = match.groups()
+            return Ns2Entry(
+                node=int(node),
+                time=float(time),
+                x=float(x),
+                y=float(y),
+                speed=float(speed),
+            )
+        if line.startswith("$node"):
+            match = INIT_ROW.match(line)
+            if match is None:
+                raise Exception(f"invalid set entry in line {line_number}: {line}")
+            node, coordinate, value = match.groups()
+            if coordinate == "Z":
+                return None
+            entry = Ns2Entry(node=int(node), is_init=True)
+            if coordinate == "X":
+                entry.x = float(value)
+            else:
+                entry.y = float(value)
+            return entry
         raise Exception(
-            f"entries either have to start with {Token.NODE.value} or {Token.NS.value}"
+            f"entries either have to start with $node or $ns - got line {line_number}: {line}"
         )
 
-    def _parse_init_row(self) -> Union[Ns2Entry, None]:
-        """parses a row of the form $node_(<node_id>) set <coordinate>_ <value>"""
-        # initialize entry with node number
-        entry = Ns2Entry(node=self._parse_node(), is_init=True)
-        self._accept(Token.SET)
-        # skip z row
-        if self._skip_row():
-            return None
-        # parse and set the coordinate
-        self._parse_coordinate(entry)
-        return entry
-
-    def _skip_row(self) -> bool:
-        """skips rows setting the z coordinate and returns True if the row has been skipped"""
-        if not self._check(Token.Z):
-            return False
-        # if row is skipped, accept all remaining tokens of the row
-        self._accept()
-        self._accept(Token.UNDERLINE)
-        self._parse_float()
-        return True
-
-    def _parse_default_row(self) -> Ns2Entry:
-        """parses a row of the format $ns_ at <time> "\$node_(<node_id>) setdest <x> <y> <speed>" """
-        self._accept(Token.NS)
-        self._accept(Token.UNDERLINE)
-        self._accept(Token.AT)
-        # parse the time
-        time = self._parse_float()
-        self._accept(Token.QUOTE)
-        # the one generated ns2 code uses a backslash here
-        if self._check(Token.BACKSLASH):
-            self._accept(Token.BACKSLASH)
-        # parse the node
-        node = self._parse_node()
-        self._accept(Token.SET_DEST)
-        # parse coordinates and the speed
-        x = self._parse_float()
-        y = self._parse_float()
-        speed = self._parse_float()
-        self._accept(Token.QUOTE)
-        # build and return an entry based on parsed data
-        return Ns2Entry(node=node, time=time, x=x, y=y, speed=speed)
-
-    def _parse_coordinate(self, entry: Ns2Entry):
-        """
-        parses a coordinate and sets it on an entry
-        @param entry: the entry to set the coordinate on
-        """
-        # check, if token is either x, y or z
-        if not self._check([Token.X, Token.Y, Token.Z]):
-            raise Exception(
-                f"expected {Token.X.value}, {Token.Y.value} or {Token.Z.value} - got {self._current_token}"
-            )
-        # save the coordinate (x,y,z)
-        coordinate = self._current_token
-        self._accept()
-        self._accept(Token.UNDERLINE)
-        # parse the coordinate value
-        value = self._parse_float()
-        # set either x or y value on entry - depending on the parsed coordinate
-        if coordinate == Token.X.value:
-            entry.x = value
-        else:
-            entry.y = value
-
-    def _parse_node(self) -> int:
-        """parses a node and returns the id"""
-        self._accept(Token.NODE)
-        self._accept(Token.UNDERLINE)
-        self._accept(Token.PARAN_LEFT)
-        # get node id
-        node = self._parse_int()
-        self._accept(Token.PARAN_RIGHT)
-        return node
-
-    def _parse_int(self) -> int:
-        """parses an integer"""
-        token = self._current_token
-        self._accept()
-        return int(token)
-
-    def _parse_float(self) -> float:
-        """parses a float"""
-        token = self._current_token
-        self._accept()
-        return float(token)
-
 
 class Ns2Movement:
     """ns2 movement"""
@@ -235,26 +95,32 @@ class Ns2Movement:
         self.end = end
 
     @classmethod
-    def _get_init_coordinates(
-        cls, node: int, entries: List[Ns2Entry]
-    ) -> Tuple[float, float]:
+    def _group_entries(
+        cls, entries: Iterable[Ns2Entry]
+    ) -> Tuple[set, Dict[int, Tuple[float, float]], Dict[int, List[Ns2Entry]]]:
         """
-        returns the initial coordinates for a node set by the init entries
-        @param node: the node id
-        @param entries: entries to search in
+        groups the entries per node in a single pass and returns the nodes,
+        the initial coordinates and the time-sorted setdest entries of each node
+        @param entries: the entries to group
         """
-        x = None
-        y = None
-        # get all init entries for the node
-        init_entries = list(filter(lambda e: e.is_init and e.node == node, entries))
-        for entry in init_entries:
-            # if entry has a x value, set x
-            if entry.x is not None:
-                x = entry.x
-            # if entry has a y value, set y
-            if entry.y is not None:
-                y = entry.y
-        return x, y
+        nodes = set()
+        init = {}
+        entry_dict = {}
+        for entry in entries:
+            nodes.add(entry.node)
+            if entry.is_init:
+                x, y = init.get(entry.node, (None, None))
+                # later init entries override earlier ones
+                if entry.x is not None:
+                    x = entry.x
+                if entry.y is not None:
+                    y = entry.y
+                init[entry.node] = (x, y)
+            else:
+                entry_dict.setdefault(entry.node, []).append(entry)
+        for node_entries in entry_dict.values():
+            node_entries.sort(key=lambda e: e.time)
+        return nodes, init, entry_dict
 
     @classmethod
     def _get_initial_until(
@@ -307,13 +173,20 @@ class Ns2Movement:
         # only append moves if end_time is not surpassed
         if end_time is not None and entry.time >= end_time:
             return node_moves
-        current_pos = Vector(node_moves[-1][2], node_moves[-1][3])
-        target = Vector(entry.x, entry.y)
+        cur_x, cur_y = node_moves[-1][2], node_moves[-1][3]
+        diff_x = entry.x - cur_x
+        diff_y = entry.y - cur_y
+        dist = math.sqrt((diff_x**2) + (diff_y**2))
         # vector the simulation should move forward in one time step
-        direction = (target - current_pos).normalize() * entry.speed
+        if diff_x == 0 and diff_y == 0:
+            dir_x = diff_x * entry.speed
+            dir_y = diff_y * entry.speed
+        else:
+            dir_x = diff_x / dist * entry.speed
+            dir_y = diff_y / dist * entry.speed
 
         # time of arrival at target
-        target_time = abs(target - current_pos) / entry.speed
+        target_time = dist / entry.speed
 
         # first integer time
         first_full = math.ceil(entry.time)
@@ -322,9 +195,10 @@ class Ns2Movement:
         # step from entry start time until first integer time
         first_step = first_full - entry.time
         # calculate next position
-        next = current_pos + first_step * direction
+        next_x = cur_x + dir_x * first_step
+        next_y = cur_y + dir_y * first_step
         # append move
-        node_moves.append((first_full, node, next.x, next.y))
+        node_moves.append((first_full, node, next_x, next_y))
 
         # get last integer move
         # if no next entry, move until destination is reached
@@ -338,22 +212,24 @@ class Ns2Movement:
         last_full = math.floor(until)
 
         # for each time step from first int move to last int move
+        arrival = entry.time + target_time
         for time in range(first_full, last_full + 1):
             # only move forward, if the time is not greater than the target time
-            if time < entry.time + target_time:
+            if time < arrival:
                 # calculate new position
-                current_pos = Vector(node_moves[-1][2], node_moves[-1][3])
-                next = current_pos + direction
+                next_x = node_moves[-1][2] + dir_x
+                next_y = node_moves[-1][3] + dir_y
             # append move
-            node_moves.append((time, node, next.x, next.y))
+            node_moves.append((time, node, next_x, next_y))
 
-        current_pos = Vector(node_moves[-1][2], node_moves[-1][3])
+        cur_x, cur_y = node_moves[-1][2], node_moves[-1][3]
         # step from start time of next entry until last integer time
         last_step = until - last_full
         if last_step != 0 and until >= start_time:
             # calculate next time and append move
-            next = current_pos + last_step * direction
-            node_moves.append((until, node, next.x, next.y))
+            next_x = cur_x + dir_x * last_step
+            next_y = cur_y + dir_y * last_step
+            node_moves.append((until, node, next_x, next_y))
 
         # fill up until end_time
         if (
@@ -363,13 +239,16 @@ class Ns2Movement:
             and end_time >= start_time
         ):
             for time in range(last_full + 1, end_time):
-                node_moves.append((time, node, next.x, next.y))
+                node_moves.append((time, node, next_x, next_y))
 
     @classmethod
-    def _fill_up_until_end(cls, nodes, moves, end_time: float):
-        for node in nodes:
-            node_moves = [move for move in moves if move[1] == node]
-            last_move = node_moves[-1]
+    def _fill_up_until_end(cls, last_moves: Dict[int, tuple], moves, end_time: float):
+        """
+        appends moves keeping each node at its last position until the end time
+        @param last_moves: the last move of each node
+        """
+        for last_move in last_moves.values():
+            node = last_move[1]
             last_int = math.floor(end_time)
             for time in range(math.ceil(last_move[0]), last_int + 1):
                 moves.append((time, node, last_move[2], last_move[3]))
@@ -377,63 +256,61 @@ class Ns2Movement:
                 moves.append((end_time, node, last_move[2], last_move[3]))
 
     @classmethod
-    def _get_moves(cls, entries, start_time: float = None, end_time: float = None):
+    def _get_moves(
+        cls, entries, start_time: float = None, end_time: float = None
+    ) -> "Ns2Movement":
         """
         generates move based on entries
         @param entries: the entries
         @start_time: the optional start time of the simulation
         @end_time: the optional end time of the simulation
         """
-        # get min and max time and nodes
+        nodes, init, entry_dict = cls._group_entries(entries)
+        # get min time
         if start_time is None:
             start_time = min(
-                0, math.floor(min(entry.time for entry in entries if not entry.is_init))
+                0,
+                math.floor(
+                    min(node_entries[0].time for node_entries in entry_dict.values())
+                ),
             )
-        # if end_time is None:
-        #    math.floor(max(entry.time for entry in entries if not entry.is_init))
-        nodes = set(entry.node for entry in entries)
         moves = []
-
-        # create dict assigning entries to nodes
-        non_init_entries = sorted(
-            list(filter(lambda e: not e.is_init, entries)), key=lambda e: e.time
-        )
-        entry_dict = {node: [] for node in nodes}
-        for entry in non_init_entries:
-            entry_dict[entry.node].append(entry)
+        last_moves = {}
 
         # for every node
         for node in nodes:
             node_moves = []
             node_entries = entry_dict[node]
             # get initial coordinates
-            x, y = cls._get_init_coordinates(node, entries)
+            x, y = init.get(node, (None, None))
             # fill moves with init coordinates until first entry
             node_moves += cls._get_initial_until(
-                start_time, entry_dict[node][0].time, node, x, y, end_time
+                start_time, node_entries[0].time, node, x, y, end_time
             )
             # for every entry except last one
             for i in range(0, len(node_entries) - 1):
-                # get current and next entry
-                current_entry = node_entries[i]
-                next_entry = node_entries[i + 1]
-
                 cls._get_moves_for_entry(
-                    node, node_moves, current_entry, next_entry, start_time, end_time
+                    node,
+                    node_moves,
+                    node_entries[i],
+                    node_entries[i + 1],
+                    start_time,
+                    end_time,
                 )
 
-            last_entry = node_entries[-1]
             cls._get_moves_for_entry(
-                node, node_moves, last_entry, None, start_time, end_time
+                node, node_moves, node_entries[-1], None, start_time, end_time
             )
 
             moves += node_moves
+            last_moves[node] = node_moves[-1]
         # build class from num_nodes, moves, min and max time
         max_time = max(move[0] for move in moves)
         if end_time is not None:
             max_time = end_time - 1
-        cls._fill_up_until_end(nodes, moves, max_time)
-        return cls(len(nodes), sorted(moves, key=lambda m: m[0]), start_time, max_time)
+        cls._fill_up_until_end(last_moves, moves, max_time)
+        moves.sort(key=lambda m: m[0])
+        return cls(len(nodes), moves, start_time, max_time)
 
     @classmethod
     def from_file(cls, path: str, start_time: float = None, end_time: float = None):
@@ -444,12 +321,67 @@ class Ns2Movement:
         @param end_time: optional end time of the simulation
             (if none is given, the simulation runs until every nodes have reached their destination)
         """
-        # read and parse file
+        # read and parse the file line by line
         with open(path, "r") as file:
-            content = file.read()
-            entries = Ns2Parser(content).parse()
-        # get moves
-        moves = cls._get_moves(entries, start_time, end_time)
+            movement = cls._get_moves(Ns2Parser(file).entries(), start_time, end_time)
         # append z = 0 to every move
-        moves.moves = [(time, node, x, y, 0) for time, node, x, y in moves.moves]
-        return moves
+        movement.moves = [(time, node, x, y, 0) for time, node, x, y in movement.moves]
+        return movement
+
+    @classmethod
+    def _segments_for_node(
+        cls, x: float, y: float, start_time: float, node_entries: List[Ns2Entry]
+    ) -> List[Segment]:
+        """
+        returns the segments of a node moving from its initial position by setdest entries
+        @param x: the initial x coordinate
+        @param y: the initial y coordinate
+        @param start_time: the time the node is placed at its initial position
+        @param node_entries: the time-sorted setdest entries of the node
+        """
+        segments = [Segment(start_time, math.inf, x, y, 0.0)]
+        for entry in node_entries:
+            # a new destination replaces the rest of the current movement
+            while len(segments) > 1 and segments[-1].start >= entry.time:
+                segments.pop()
+            x, y, _ = segments[-1].position_at(max(entry.time, segments[-1].start))
+            if segments[-1].start < entry.time:
+                segments[-1] = segments[-1]._replace(end=entry.time)
+            else:
+                segments.pop()
+            dist = math.hypot(entry.x - x, entry.y - y)
+            if dist > 0 and entry.speed > 0:
+                duration = dist / entry.speed
+                vx = (entry.x - x) / duration
+                vy = (entry.y - y) / duration
+                arrival = entry.time + duration
+                segments.append(Segment(entry.time, arrival, x, y, 0.0, vx, vy, 0.0))
+                segments.append(Segment(arrival, math.inf, entry.x, entry.y, 0.0))
+            else:
+                segments.append(Segment(entry.time, math.inf, x, y, 0.0))
+        return segments
+
+    @classmethod
+    def segments_from_file(cls, path: str, end_time: float = None) -> SegmentMovement:
+        """
+        get the movement of a ns2 file as segments instead of per-second moves
+        nodes move with constant speed towards their destinations and stay there after arrival
+        @param path: path to the file
+        @param end_time: optional end time of the simulation, later entries are ignored
+        """
+        with open(path, "r") as file:
+            nodes, init, entry_dict = cls._group_entries(Ns2Parser(file).entries())
+        if end_time is not None:
+            entry_dict = {
+                node: [e for e in node_entries if e.time < end_time]
+                for node, node_entries in entry_dict.items()
+            }
+        start_time = min(
+            [0.0] + [math.floor(e[0].time) for e in entry_dict.values() if len(e) > 0]
+        )
+        segments = {}
+        for node in sorted(nodes):
+            x, y = init.get(node, (None, None))
+            node_entries = entry_dict.get(node, [])
+            segments[node] = cls._segments_for_node(x, y, start_time, node_entries)
+        return SegmentMovement(segments, duration=end_time)
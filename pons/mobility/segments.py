@@ -0,0 +1,301 @@
+import math
+from bisect import bisect_right
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# tolerance when merging consecutive segments with the same velocity
+MERGE_EPSILON = 1e-9
+
+
+class Segment(NamedTuple):
+    """A piece of linear movement of a node.
+
+    The node is at (x, y, z) at time start and moves with the velocity
+    (vx, vy, vz) until time end.
+    """
+
+    start: float
+    end: float
+    x: float
+    y: float
+    z: float
+    vx: float = 0.0
+    vy: float = 0.0
+    vz: float = 0.0
+
+    def position_at(self, t: float) -> Tuple[float, float, float]:
+        """returns the position of the node at time t"""
+        dt = t - self.start
+        return (self.x + self.vx * dt, self.y + self.vy * dt, self.z + self.vz * dt)
+
+
+def segments_from_moves(moves, interpolate: bool = True) -> Dict[int, List[Segment]]:
+    """
+    converts a list of sampled moves (time, node, x, y, z) into linear segments per node
+    consecutive samples with the same velocity are merged into one segment and
+    the last sample of a node is kept until the end of time
+    @param moves: the moves sorted by time
+    @param interpolate: move linearly between samples instead of keeping each sample
+        until the next one, like the movement manager does
+    """
+    samples: Dict[int, List[Tuple[float, float, float, float]]] = {}
+    for time, node_id, x, y, z in moves:
+        if node_id not in samples:
+            samples[node_id] = []
+        samples[node_id].append((time, x, y, z))
+
+    segments = {}
+    for node_id, node_samples in samples.items():
+        node_segments = []
+        for i in range(len(node_samples) - 1):
+            t0, x0, y0, z0 = node_samples[i]
+            t1, x1, y1, z1 = node_samples[i + 1]
+            if t1 <= t0:
+                continue
+            if interpolate:
+                dt = t1 - t0
+                vx = (x1 - x0) / dt
+                vy = (y1 - y0) / dt
+                vz = (z1 - z0) / dt
+            else:
+                vx = vy = vz = 0.0
+            if len(node_segments) > 0:
+                last = node_segments[-1]
+                lx, ly, lz = last.position_at(t0)
+                if (
+                    last.end == t0
+                    and abs(last.vx - vx) <= MERGE_EPSILON
+                    and abs(last.vy - vy) <= MERGE_EPSILON
+                    and abs(last.vz - vz) <= MERGE_EPSILON
+                    and abs(lx - x0) <= MERGE_EPSILON * max(1.0, abs(x0))
+                    and abs(ly - y0) <= MERGE_EPSILON * max(1.0, abs(y0))
+                    and abs(lz - z0) <= MERGE_EPSILON * max(1.0, abs(z0))
+                ):
+                    node_segments[-1] = last._replace(end=t1)
+                    continue
+            node_segments.append(Segment(t0, t1, x0, y0, z0, vx, vy, vz))
+        t, x, y, z = node_samples[-1]
+        node_segments.append(Segment(t, math.inf, x, y, z))
+        segments[node_id] = node_segments
+    return segments
+
+
+class SegmentMovement(object):
+    """Movement of nodes stored as linear segments instead of sampled positions.
+
+    Only the waypoint segments are kept, positions are evaluated at any time
+    when they are needed.
+    """
+
+    def __init__(
+        self,
+        segments: Dict[int, List[Segment]],
+        duration: Optional[float] = None,
+        width: float = 0,
+        height: float = 0,
+    ):
+        self.segments = segments
+        self.duration = duration
+        self.width = width
+        self.height = height
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.segments)
+
+    def __str__(self):
+        return "SegmentMovement(#nodes=%d, #segments=%d)" % (
+            len(self.segments),
+            sum(len(s) for s in self.segments.values()),
+        )
+
+    def __contains__(self, node_id: int) -> bool:
+        return node_id in self.segments
+
+    def node_segments(self, node_id: int, time: float = 0.0) -> Iterator[Segment]:
+        """returns an iterator over the segments of a node, starting with the one at the given time"""
+        segments = self.segments.get(node_id, [])
+        i = max(bisect_right(segments, (time, math.inf)) - 1, 0)
+        return islice(segments, i, None)
+
+    @classmethod
+    def from_moves(cls, moves, interpolate: bool = True) -> "SegmentMovement":
+        """creates the segments from a list of sampled moves (time, node, x, y, z)"""
+        return cls(segments_from_moves(moves, interpolate=interpolate))
+
+    def position_at(self, node_id: int, t: float) -> Tuple[float, float, float]:
+        """returns the position of a node at time t"""
+        segments = self.segments[node_id]
+        i = max(bisect_right(segments, (t, math.inf)) - 1, 0)
+        while segments[i].end < t and i + 1 < len(segments):
+            i += 1
+        segment = segments[i]
+        return segment.position_at(min(max(t, segment.start), segment.end))
+
+
+def _in_range_interval(
+    a: Segment, b: Segment, start: float, end: float, range_sq: float
+) -> Optional[Tuple[float, float]]:
+    """returns the part of [start, end] in which both segments are within range"""
+    ax, ay, az = a.position_at(start)
+    bx, by, bz = b.position_at(start)
+    dx = ax - bx
+    dy = ay - by
+    dz = az - bz
+    dvx = a.vx - b.vx
+    dvy = a.vy - b.vy
+    dvz = a.vz - b.vz
+    # solve |d + dv * t|^2 <= range^2 for t
+    qa = dvx * dvx + dvy * dvy + dvz * dvz
+    qb = 2 * (dx * dvx + dy * dvy + dz * dvz)
+    qc = dx * dx + dy * dy + dz * dz - range_sq
+    duration = end - start
+    if qa == 0:
+        if qc <= 0:
+            return (start, end)
+        return None
+    disc = qb * qb - 4 * qa * qc
+    if disc < 0:
+        return None
+    root = math.sqrt(disc)
+    lo = max((-qb - root) / (2 * qa), 0.0)
+    hi = min((-qb + root) / (2 * qa), duration)
+    if lo > hi:
+        return None
+    return (start + lo, start + hi)
+
+
+def contact_windows(
+    segments_a: List[Segment],
+    segments_b: List[Segment],
+    net_range: float,
+    start: float = -math.inf,
+    end: float = math.inf,
+) -> List[Tuple[float, float]]:
+    """
+    returns the time windows in which two nodes are within range of each other
+    @param segments_a: the segments of the first node sorted by time
+    @param segments_b: the segments of the second node sorted by time
+    @param net_range: the radio range
+    @param start: only consider movement from this time on
+    @param end: only consider movement until this time
+    """
+    range_sq = net_range * net_range
+    windows = []
+    i = 0
+    j = 0
+    while i < len(segments_a) and j < len(segments_b):
+        a = segments_a[i]
+        b = segments_b[j]
+        lo = max(a.start, b.start, start)
+        hi = min(a.end, b.end, end)
+        if lo <= hi and not math.isinf(lo):
+            # a stationary tail can only be evaluated up to a finite end
+            interval = _in_range_interval(a, b, lo, hi, range_sq)
+            if interval is not None:
+                if len(windows) > 0 and windows[-1][1] >= interval[0]:
+                    windows[-1] = (windows[-1][0], max(windows[-1][1], interval[1]))
+                else:
+                    windows.append(interval)
+        if a.end <= b.end:
+            i += 1
+        else:
+            j += 1
+    # drop windows only touching the range for an instant
+    return [w for w in windows if w[1] > w[0]]
+
+
+class SegmentCursor(object):
+    """Walks through the segments of one node while time moves forward."""
+
+    def __init__(self, segments: Iterable[Segment]):
+        self.segments = iter(segments)
+        self.pending: List[Segment] = []
+        self.exhausted = False
+
+    def pieces(self, start: float, end: float) -> List[Segment]:
+        """returns all segments overlapping [start, end] and drops the ones ending before start"""
+        self.pending = [s for s in self.pending if s.end > start]
+        while not self.exhausted and (
+            len(self.pending) == 0 or self.pending[-1].end <= end
+        ):
+            segment = next(self.segments, None)
+            if segment is None:
+                self.exhausted = True
+                break
+            if segment.end > start:
+                self.pending.append(segment)
+        return [s for s in self.pending if s.start <= end]
+
+
+def bounding_box(
+    pieces: List[Segment], start: float, end: float
+) -> Tuple[float, float, float, float, float, float]:
+    """returns the box (min x, min y, min z, max x, max y, max z) covered within [start, end]"""
+    points = []
+    for s in pieces:
+        points.append(s.position_at(max(s.start, start)))
+        points.append(s.position_at(min(s.end, end)))
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    zs = [p[2] for p in points]
+    return (min(xs), min(ys), min(zs), max(xs), max(ys), max(zs))
+
+
+def slab_contact_windows(
+    pieces: Dict[int, List[Segment]], net_range: float, start: float, end: float
+) -> List[Tuple[float, float, int, int]]:
+    """
+    returns all contact windows (start, end, node1, node2) within [start, end]
+    candidate pairs are found by binning the bounding boxes of the nodes into a grid,
+    only those are solved exactly
+    @param pieces: the segments of each node overlapping [start, end]
+    @param net_range: the radio range
+    @param start: start of the time slab
+    @param end: end of the time slab
+    """
+    boxes = {}
+    cells: Dict[Tuple[int, int], List[int]] = {}
+    half = net_range / 2
+    for node_id, node_pieces in pieces.items():
+        if len(node_pieces) == 0:
+            continue
+        box = bounding_box(node_pieces, start, end)
+        boxes[node_id] = box
+        for cx in range(
+            math.floor((box[0] - half) / net_range),
+            math.floor((box[3] + half) / net_range) + 1,
+        ):
+            for cy in range(
+                math.floor((box[1] - half) / net_range),
+                math.floor((box[4] + half) / net_range) + 1,
+            ):
+                if (cx, cy) not in cells:
+                    cells[(cx, cy)] = []
+                cells[(cx, cy)].append(node_id)
+
+    candidates = set()
+    for members in cells.values():
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                a = members[i]
+                b = members[j]
+                candidates.add((a, b) if a < b else (b, a))
+
+    windows = []
+    for a, b in candidates:
+        box_a = boxes[a]
+        box_b = boxes[b]
+        if (
+            box_a[0] - box_b[3] > net_range
+            or box_b[0] - box_a[3] > net_range
+            or box_a[1] - box_b[4] > net_range
+            or box_b[1] - box_a[4] > net_range
+            or box_a[2] - box_b[5] > net_range
+            or box_b[2] - box_a[5] > net_range
+        ):
+            continue
+        for w in contact_windows(pieces[a], pieces[b], net_range, start, end):
+            windows.append((w[0], w[1], a, b))
+    windows.sort()
+    return windows
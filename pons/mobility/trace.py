@@ -0,0 +1,151 @@
+import os
+from typing import Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from pons.mobility.movement import MOVE_DTYPE, OneMovement
+
+# number of lines parsed at once when converting text traces
+CONVERT_CHUNK_SIZE = 100000
+
+
+def meta_filename(filename: str) -> str:
+    """returns the name of the file holding the time index and info of a trace"""
+    base, _ = os.path.splitext(filename)
+    return base + ".meta.npz"
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy is required for binary movement traces")
+
+
+def time_index(times) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    returns the distinct timestamps of time-sorted moves and the offsets of their first moves
+    the offsets end with the number of moves, so batch i spans offsets[i]:offsets[i + 1]
+    raises a ValueError if the moves are not sorted by time
+    """
+    _require_numpy()
+    starts = []
+    last = None
+    for begin in range(0, len(times), CONVERT_CHUNK_SIZE):
+        chunk = np.asarray(times[begin : begin + CONVERT_CHUNK_SIZE])
+        if len(chunk) > 0 and last is not None and chunk[0] < last:
+            raise ValueError("moves are not sorted by time at move %d" % begin)
+        backwards = np.flatnonzero(chunk[1:] < chunk[:-1])
+        if len(backwards) > 0:
+            raise ValueError(
+                "moves are not sorted by time at move %d" % (begin + backwards[0] + 1)
+            )
+        changed = np.flatnonzero(chunk[1:] != chunk[:-1]) + 1
+        if len(chunk) > 0 and (last is None or chunk[0] != last):
+            starts.append(np.array([begin]))
+        starts.append(changed + begin)
+        if len(chunk) > 0:
+            last = chunk[-1]
+    offsets = np.concatenate(starts + [np.array([len(times)])]).astype(np.int64)
+    return np.asarray(times[offsets[:-1]], dtype=np.float64), offsets
+
+
+def save_trace(
+    filename: str,
+    moves,
+    duration: Optional[float] = None,
+    num_nodes: Optional[int] = None,
+    width: float = 0,
+    height: float = 0,
+) -> None:
+    """
+    saves moves as a binary trace: a .npy file with the moves and a .meta.npz file with
+    the time index and the info of the trace
+    @param filename: the .npy file to write
+    @param moves: a list of moves (time, node, x, y, z) or a structured array of moves
+    """
+    _require_numpy()
+    if not isinstance(moves, np.ndarray):
+        moves = np.array([tuple(m) for m in moves], dtype=MOVE_DTYPE)
+    np.save(filename, moves)
+    _save_meta(filename, moves, duration, num_nodes, width, height)
+
+
+def _save_meta(filename, moves, duration, num_nodes, width, height):
+    times, offsets = time_index(moves["time"])
+    if duration is None:
+        duration = times[-1] if len(times) > 0 else 0.0
+    if num_nodes is None:
+        num_nodes = int(moves["id"].max()) + 1 if len(moves) > 0 else 0
+    np.savez(
+        meta_filename(filename),
+        times=times,
+        offsets=offsets,
+        info=np.array([duration, num_nodes, width, height], dtype=np.float64),
+    )
+
+
+def convert_one_file(source: str, filename: str) -> None:
+    """
+    converts a ONE movement file into a binary trace without reading it into memory at once
+    the moves of the file have to be sorted by time, otherwise a ValueError is raised
+    @param source: the ONE movement file
+    @param filename: the .npy file to write
+    """
+    _require_numpy()
+    with open(source, "r") as f:
+        header = f.readline().split()
+        count = sum(1 for line in f if line.strip())
+    moves = np.lib.format.open_memmap(
+        filename, mode="w+", dtype=MOVE_DTYPE, shape=(count,)
+    )
+    with open(source, "r") as f:
+        f.readline()
+        i = 0
+        chunk = []
+        for line in f:
+            if line.strip():
+                chunk.append(line)
+            if len(chunk) == CONVERT_CHUNK_SIZE:
+                i = _fill_chunk(moves, i, chunk)
+                chunk = []
+        _fill_chunk(moves, i, chunk)
+    moves.flush()
+    _save_meta(
+        filename,
+        moves,
+        float(header[1]),
+        None,
+        float(header[3]),
+        float(header[5]),
+    )
+
+
+def _fill_chunk(moves, i: int, lines) -> int:
+    if len(lines) == 0:
+        return i
+    values = np.loadtxt(lines, dtype=np.float64, ndmin=2)
+    end = i + len(values)
+    moves["time"][i:end] = values[:, 0]
+    moves["id"][i:end] = values[:, 1]
+    moves["x"][i:end] = values[:, 2]
+    moves["y"][i:end] = values[:, 3]
+    moves["z"][i:end] = 0.0
+    return end
+
+
+def load_trace(filename: str) -> OneMovement:
+    """
+    loads a binary trace, memory-mapping the moves instead of reading them
+    the time index is available as the time_index attribute of the returned movement
+    """
+    _require_numpy()
+    moves = np.load(filename, mmap_mode="r")
+    with np.load(meta_filename(filename)) as meta:
+        times = meta["times"]
+        offsets = meta["offsets"]
+        duration, num_nodes, width, height = meta["info"].tolist()
+    movement = OneMovement(duration, int(num_nodes), width, height, moves)
+    movement.time_index = (times, offsets)
+    return movement
@@ -1,3 +1,5 @@
 from .common import NetworkSettings, BROADCAST_ADDR
 from .contactplan import ContactPlan, CoreContactPlan, CommonContactPlan, CoreContact
-from .netplan import NetworkPlan
\ No newline at end of file
+from .netplan import NetworkPlan
+from .spatial import SpatialGrid, PositionTable, VectorizedIndex, VerletIndex
+from .neighbors import NeighborService
@@ -24,6 +24,7 @@ class NetworkSettings(object):
         loss: float = 0.0,
         delay: float = 0.05,
         contactplan: CommonContactPlan = None,
+        skin: float = 0.0,
     ):
         self.name = name
         self.bandwidth = bandwidth
@@ -32,7 +33,13 @@ class NetworkSettings(object):
         self.range = range
         self.range_sq = range * range
         self.contactplan = contactplan
+        # extra distance of cached neighbor candidate lists of moving nodes, 0 to disable them
+        self.skin = skin
         self.env = None
+        # shared between all nodes using this network, set up by the simulator
+        self.spatial_index = None
+        # set if the contacts of this network are detected by a ContactEngine
+        self.contact_engine = None
 
     def __str__(self):
         if self.contactplan is None:
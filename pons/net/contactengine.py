@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, Set, Tuple
+
+from pons.event_log import event_log
+from pons.mobility.segments import Segment, SegmentCursor, slab_contact_windows
+
+if TYPE_CHECKING:
+    import pons
+
+LINK_DOWN = 0
+LINK_UP = 1
+
+
+class ContactEngine(object):
+    """Event-driven neighbor discovery for range-based networks.
+
+    Instead of polling the positions, the exact times at which two nodes
+    enter and leave each other's range are solved from their piecewise-linear
+    movement. The movement is processed in time slabs, so segments are only
+    read shortly before they are needed.
+    """
+
+    def __init__(
+        self,
+        netsim: pons.NetSim,
+        segments: Dict[int, Iterable[Segment]],
+        slab: float = 60.0,
+    ):
+        self.netsim = netsim
+        self.env = netsim.env
+        self.segments = segments
+        self.slab = slab
+
+    def __str__(self):
+        return "ContactEngine(slab=%.02f, #nodes=%d)" % (self.slab, len(self.segments))
+
+    def start(self, ranges: Dict[str, float]):
+        for net_name, net_range in ranges.items():
+            members = [
+                n.id
+                for n in self.netsim.nodes.values()
+                if net_name in n.net and n.id in self.segments
+            ]
+            for node_id in members:
+                node = self.netsim.nodes[node_id]
+                node.net[net_name].contact_engine = self
+                node.neighbors[net_name] = []
+            self.env.process(self.run(net_name, net_range, members))
+
+    def run(self, net_name: str, net_range: float, members: List[int]):
+        cursors = {
+            node_id: SegmentCursor(self.segments[node_id]) for node_id in members
+        }
+        ongoing: Set[Tuple[int, int]] = set()
+        start = self.env.now
+        end_time = self.netsim.duration + 1.0
+        while start < end_time:
+            end = start + self.slab
+            pieces = {
+                node_id: cursor.pieces(start, end)
+                for node_id, cursor in cursors.items()
+            }
+            windows = slab_contact_windows(pieces, net_range, start, end)
+
+            events = []
+            next_ongoing = set()
+            continued = set()
+            for w_start, w_end, node1, node2 in windows:
+                pair = (node1, node2)
+                if w_start == start and pair in ongoing:
+                    continued.add(pair)
+                else:
+                    events.append((w_start, LINK_UP, node1, node2))
+                if w_end < end:
+                    events.append((w_end, LINK_DOWN, node1, node2))
+                else:
+                    next_ongoing.add(pair)
+            for node1, node2 in ongoing - continued:
+                events.append((start, LINK_DOWN, node1, node2))
+            # links going down are processed before links coming up at the same time
+            events.sort(key=lambda e: (e[0], e[1]))
+
+            for time, kind, node1, node2 in events:
+                if time >= end_time:
+                    return
+                if time > self.env.now:
+                    yield self.env.timeout(time - self.env.now)
+                if kind == LINK_UP:
+                    self._link_up(net_name, node1, node2)
+                else:
+                    self._link_down(net_name, node1, node2)
+
+            ongoing = next_ongoing
+            if end > self.env.now:
+                yield self.env.timeout(end - self.env.now)
+            start = end
+
+    def _link_up(self, net_name: str, node1: int, node2: int):
+        now = self.env.now
+        event_log(now, "LINK", {"event": "UP", "nodes": (node1, node2)})
+        for src, dst in ((node1, node2), (node2, node1)):
+            node = self.netsim.nodes[src]
+            if dst not in node.neighbors[net_name]:
+                node.neighbors[net_name].append(dst)
+        self.netsim.neighbor_service.publish(
+            now, [(net_name, node1, node2), (net_name, node2, node1)], []
+        )
+
+    def _link_down(self, net_name: str, node1: int, node2: int):
+        now = self.env.now
+        event_log(now, "LINK", {"event": "DOWN", "nodes": (node1, node2)})
+        for src, dst in ((node1, node2), (node2, node1)):
+            node = self.netsim.nodes[src]
+            if dst in node.neighbors[net_name]:
+                node.neighbors[net_name].remove(dst)
+        self.netsim.neighbor_service.publish(
+            now, [], [(net_name, node1, node2), (net_name, node2, node1)]
+        )
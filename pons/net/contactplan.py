@@ -1,11 +1,32 @@
 from __future__ import annotations
+import heapq
 from dataclasses import dataclass
+from datetime import datetime, timedelta
 from dateutil.parser import parse
 
 
 from random import random
 from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
 
+from pons.utils.intervals import IntervalIndex
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# header of binary core contact plans: magic, number of contacts, flags, number of boundaries
+BINARY_MAGIC = b"PONSCCB2"
+BINARY_HEADER_SIZE = 64
+BINARY_FLAG_LOOP = 1
+# the contacts are followed by their order by start and the sorted unique starts and ends
+BINARY_FLAG_TIMELINE = 2
+
+# number of CSV rows parsed before they are packed into columns
+CSV_CHUNK_SIZE = 100000
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
 
 class CommonContactPlan(object):
     def all_contacts(self) -> List[Tuple[int, int]]:
@@ -38,6 +59,30 @@ class CommonContactPlan(object):
         return []
 
 
+def _parse_timestamp(value: str) -> datetime:
+    """parses a timestamp, trying ISO 8601 before the much slower generic parser"""
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except ValueError:
+        return parse(value, ignoretz=True)
+    return timestamp.replace(tzinfo=None)
+
+
+def _parse_time(value: str):
+    """parses a timestamp, keeping integral timestamps as int"""
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def _format_time(value) -> str:
+    """formats a timestamp so that it is parsed back to the same value"""
+    if isinstance(value, int):
+        return "%d" % value
+    return repr(float(value))
+
+
 @dataclass(frozen=True)
 class CoreContact(object):
     timespan: Tuple[int, int]
@@ -66,7 +111,7 @@ class CoreContact(object):
         # print(fields, len(fields))
         if len(fields) != 8:
             raise ValueError("Invalid CoreContact line: %s" % line)
-        timespan = (int(fields[0]), int(fields[1]))
+        timespan = (_parse_time(fields[0]), _parse_time(fields[1]))
 
         if fields[2] in mapping:
             fields[2] = mapping[fields[2]]
@@ -78,17 +123,112 @@ class CoreContact(object):
             fields[3] = int(fields[3])
 
         nodes = (fields[2], fields[3])
-        bw = int(
-            fields[4]
-            .replace("mbit", "000000")
-            .replace("kbit", "000")
-            .replace("gbit", "000000000")
-        )
+        if fields[4].isdigit():
+            bw = int(fields[4])
+        else:
+            bw = int(
+                fields[4]
+                .replace("mbit", "000000")
+                .replace("kbit", "000")
+                .replace("gbit", "000000000")
+            )
         loss = float(fields[5])
         delay = float(fields[6])
         jitter = float(fields[7])
         return cls(timespan, nodes, bw, loss, delay, jitter)
 
+    def to_string(self) -> str:
+        return "a contact %s %s %d %d %d %r %r %r" % (
+            _format_time(self.timespan[0]),
+            _format_time(self.timespan[1]),
+            self.nodes[0],
+            self.nodes[1],
+            self.bw,
+            self.loss,
+            self.delay,
+            self.jitter,
+        )
+
+
+class CoreContactColumns(object):
+    """The contacts of a CoreContactPlan stored as one array per field.
+
+    Contacts are only turned into CoreContact objects when they are accessed.
+    The arrays are usually memory-mapped from a binary plan, so they are never
+    copied and parallel runs share the same pages.
+    """
+
+    FIELDS = ("start", "end", "node1", "node2", "bw", "loss", "delay", "jitter")
+    DTYPES = ("<f8", "<f8", "<i8", "<i8", "<i8", "<f8", "<f8", "<f8")
+
+    def __init__(
+        self,
+        columns: Dict[str, "np.ndarray"],
+        boundaries: Optional["np.ndarray"] = None,
+        by_start: Optional["np.ndarray"] = None,
+    ):
+        """
+        @param boundaries: the sorted unique starts and ends of the contacts, given with by_start
+        as in binary plans, so the timeline of the plan is not built again
+        @param by_start: the indexes of the contacts in the order of their starts
+        """
+        self.boundaries = boundaries
+        self.by_start = by_start
+        self.start = columns["start"]
+        self.end = columns["end"]
+        self.node1 = columns["node1"]
+        self.node2 = columns["node2"]
+        self.bw = columns["bw"]
+        self.loss = columns["loss"]
+        self.delay = columns["delay"]
+        self.jitter = columns["jitter"]
+
+    @classmethod
+    def from_contacts(cls, contacts: List[CoreContact]) -> CoreContactColumns:
+        values = (
+            [c.timespan[0] for c in contacts],
+            [c.timespan[1] for c in contacts],
+            [c.nodes[0] for c in contacts],
+            [c.nodes[1] for c in contacts],
+            [c.bw for c in contacts],
+            [c.loss for c in contacts],
+            [c.delay for c in contacts],
+            [c.jitter for c in contacts],
+        )
+        return cls(
+            {
+                field: np.array(column, dtype=dtype)
+                for field, dtype, column in zip(cls.FIELDS, cls.DTYPES, values)
+            }
+        )
+
+    def __str__(self):
+        return "CoreContactColumns(#contacts=%d)" % len(self)
+
+    def __len__(self):
+        return len(self.start)
+
+    def __getitem__(self, i: int) -> CoreContact:
+        return CoreContact(
+            (self.start[i].item(), self.end[i].item()),
+            (int(self.node1[i]), int(self.node2[i])),
+            int(self.bw[i]),
+            float(self.loss[i]),
+            float(self.delay[i]),
+            float(self.jitter[i]),
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __deepcopy__(self, memo):
+        # the columns are never changed, so all copies share them
+        return self
+
+    def columns(self) -> List["np.ndarray"]:
+        return [getattr(self, field) for field in self.FIELDS]
+
 
 class CoreContactPlan(object):
     """A CoreContactPlan file."""
@@ -107,9 +247,79 @@ class CoreContactPlan(object):
             mapping = {}
         if filename:
             self.load(filename, mapping=mapping)
-        self.max_time = max([c.timespan[1] for c in self.contacts])
+        if isinstance(self.contacts, CoreContactColumns):
+            self.max_time = self.contacts.end.max().item() if len(self.contacts) else 0
+        else:
+            self.max_time = max([c.timespan[1] for c in self.contacts], default=0)
         self.last_at = -1
         self.last_cache = []
+        self._build_index()
+
+    def _build_index(self) -> None:
+        """Builds the timeline used to look up the contacts at a given time."""
+        if isinstance(self.contacts, CoreContactColumns):
+            self.index = IntervalIndex(
+                self.contacts.start,
+                self.contacts.end,
+                self.contacts,
+                boundaries=self.contacts.boundaries,
+                by_start=self.contacts.by_start,
+            )
+        else:
+            self.index = IntervalIndex(
+                [c.timespan[0] for c in self.contacts],
+                [c.timespan[1] for c in self.contacts],
+                self.contacts,
+            )
+        self.last_at = -1
+        self.last_cache = []
+        self._reset_pairs()
+
+    def _reset_pairs(self) -> None:
+        # indexes of the active contacts per unordered node pair
+        self.active_pairs: Dict[Tuple[int, int], List[int]] = {}
+        # indexes of active contacts without bandwidth, may contain ended contacts
+        self.active_no_bw: List[int] = []
+
+    def _seek(self, time: float) -> None:
+        """Moves the index to the given time and updates the active contacts per pair."""
+        if self.loop:
+            time = time % self.get_max_time()
+        if time == self.index.time:
+            return
+        if self.index.time is not None and time < self.index.time:
+            self.index.reset()
+            self._reset_pairs()
+        entered, left = self.index.advance(time)
+        for i in left:
+            nodes = self.contacts[i].nodes
+            pair = (min(nodes), max(nodes))
+            self.active_pairs[pair].remove(i)
+            if len(self.active_pairs[pair]) == 0:
+                del self.active_pairs[pair]
+        for i in entered:
+            nodes = self.index.active[i].nodes
+            pair = (min(nodes), max(nodes))
+            if pair not in self.active_pairs:
+                self.active_pairs[pair] = []
+            self.active_pairs[pair].append(i)
+            if self.index.active[i].bw == 0:
+                heapq.heappush(self.active_no_bw, i)
+
+    def _contact_between(self, node1: int, node2: int) -> Optional[int]:
+        """Returns the index of the first active contact between two nodes."""
+        indexes = self.active_pairs.get((min(node1, node2), max(node1, node2)))
+        if indexes is None:
+            return None
+        return min(indexes)
+
+    def _first_without_bw(self) -> Optional[int]:
+        """Returns the index of the first active contact without bandwidth."""
+        while len(self.active_no_bw) > 0:
+            if self.active_no_bw[0] in self.index.active:
+                return self.active_no_bw[0]
+            heapq.heappop(self.active_no_bw)
+        return None
 
     @classmethod
     def from_file(
@@ -134,76 +344,98 @@ class CoreContactPlan(object):
             mapping = {}
         if node_rename_mapping is None:
             node_rename_mapping = {}
-        contacts = []
-        sim_start = 0
+
+        def node_id(name: str) -> int:
+            name = node_rename_mapping.get(name, name)
+            if name in mapping:
+                return mapping[name]
+            return int(name)
+
+        # rows as (start, end, node1, node2) with timestamps in microseconds since 1970,
+        # packed into integer columns every CSV_CHUNK_SIZE rows if numpy is available
+        rows = []
+        chunks = []
+        sim_start = None
         with open(filename, "r") as f:
             if parse_header:
                 hdr = f.readline()
                 if "# Simulation starting time:" in hdr:
-                    sim_start = parse(hdr.split(":")[1].strip(), ignoretz=True)
+                    sim_start = _parse_timestamp(hdr.split(":", 1)[1].strip())
+                    sim_start = (sim_start - _EPOCH) // _MICROSECOND
 
-            for line in f.readlines():
+            # stream the rows instead of reading the whole file at once
+            for line in f:
                 line = line.strip()
+                if len(line) == 0:
+                    continue
                 fields = line.split(delimiter)
                 if len(fields) != 5:
                     raise ValueError(
                         "Invalid CSV contact line (expected: node1,node2,start,end,duration): %s"
                         % line
                     )
-
-                # strip all fields
-                fields = [f.strip() for f in fields]
-
-                start = parse(fields[2], ignoretz=True)
-                end = parse(fields[3], ignoretz=True)
-
-                node1 = fields[0]
-                node2 = fields[1]
-
-                if node1 in node_rename_mapping:
-                    node1 = node_rename_mapping[node1]
-                if node2 in node_rename_mapping:
-                    node2 = node_rename_mapping[node2]
-
-                if node1 in mapping:
-                    node1 = mapping[node1]
-                else:
-                    node1 = int(node1)
-                if node2 in mapping:
-                    node2 = mapping[node2]
-                else:
-                    node2 = int(node2)
-
-                nodes = (node1, node2)
-
-                contact = (start, end, node1, node2, int(fields[4]))
-                contacts.append(contact)
-        contacts.sort(key=lambda x: x[0])
-        if sim_start == 0:
-            sim_start = contacts[0][0]
-
-        # adjust start times relative in seconds to sim_start
-        contacts = [
-            (
-                int((start - sim_start).total_seconds()),
-                int((end - sim_start).total_seconds()),
-                src,
-                dst,
-                duration,
+                # the duration is not used, but still has to be valid
+                int(fields[4])
+                rows.append(
+                    (
+                        (_parse_timestamp(fields[2].strip()) - _EPOCH) // _MICROSECOND,
+                        (_parse_timestamp(fields[3].strip()) - _EPOCH) // _MICROSECOND,
+                        node_id(fields[0].strip()),
+                        node_id(fields[1].strip()),
+                    )
+                )
+                if np is not None and len(rows) == CSV_CHUNK_SIZE:
+                    chunks.append(np.array(rows, dtype=np.int64))
+                    rows = []
+
+        if np is None:
+            rows.sort(key=lambda row: row[0])
+            if sim_start is None:
+                sim_start = rows[0][0] if len(rows) > 0 else 0
+            # rebase to seconds relative to sim_start and apply the speedup in one pass
+            contacts = [
+                CoreContact(
+                    (
+                        int(int((start - sim_start) / 10**6) / speedup),
+                        int(int((end - sim_start) / 10**6) / speedup),
+                    ),
+                    (node1, node2),
+                    0,
+                    0,
+                    0,
+                    0,
+                )
+                for start, end, node1, node2 in rows
+            ]
+            return cls(contacts=contacts, mapping=mapping)
+
+        chunks.append(np.array(rows, dtype=np.int64).reshape(-1, 4))
+        table = np.concatenate(chunks)
+        del chunks, rows
+        table = table[np.argsort(table[:, 0], kind="stable")]
+        if sim_start is None:
+            sim_start = table[0, 0] if len(table) > 0 else 0
+
+        def rebase(times):
+            # seconds relative to sim_start, truncated like int() before the speedup
+            return np.trunc(np.trunc((times - sim_start) / 10**6) / speedup).astype(
+                np.int64
             )
-            for start, end, src, dst, duration in contacts
-        ]
-        # apply speedup
-        contacts = [
-            (int(start / speedup), int(end / speedup), src, dst, duration)
-            for start, end, src, dst, duration in contacts
-        ]
-        contacts = [
-            CoreContact((start, end), (src, dst), 0, 0, 0, 0)
-            for start, end, src, dst, duration in contacts
-        ]
-        plan = cls(contacts=contacts, mapping=mapping)
-        return plan
+
+        count = len(table)
+        contacts = CoreContactColumns(
+            {
+                "start": rebase(table[:, 0]),
+                "end": rebase(table[:, 1]),
+                "node1": np.ascontiguousarray(table[:, 2]),
+                "node2": np.ascontiguousarray(table[:, 3]),
+                "bw": np.zeros(count, dtype=np.int64),
+                "loss": np.zeros(count),
+                "delay": np.zeros(count),
+                "jitter": np.zeros(count),
+            }
+        )
+        return cls(contacts=contacts, mapping=mapping)
 
     def __eq__(self, value: object) -> bool:
         if not isinstance(value, CoreContactPlan):
@@ -249,13 +481,86 @@ class CoreContactPlan(object):
                         contacts.append(contact)
         self.contacts = contacts
 
+    def save(self, filename: str) -> None:
+        with open(filename, "w") as f:
+            f.write("s loop %d\n" % (1 if self.loop else 0))
+            for c in self.contacts:
+                f.write(c.to_string() + "\n")
+
+    def save_binary(self, filename: str) -> None:
+        """
+        Saves the plan in the columnar binary format read by from_binary.
+        The contacts keep their order, which decides the contact used for the link
+        between two nodes, and are followed by their order by start.
+        """
+        if np is None:
+            raise ImportError("numpy is required for binary contact plans")
+        contacts = self.contacts
+        if not isinstance(contacts, CoreContactColumns):
+            contacts = CoreContactColumns.from_contacts(contacts)
+        by_start = np.argsort(contacts.start, kind="stable")
+        boundaries = np.unique(np.concatenate((contacts.start, contacts.end)))
+        flags = BINARY_FLAG_TIMELINE | (BINARY_FLAG_LOOP if self.loop else 0)
+        header = np.zeros(BINARY_HEADER_SIZE, dtype=np.uint8)
+        header[:8] = np.frombuffer(BINARY_MAGIC, dtype=np.uint8)
+        header[8:32] = np.array(
+            [len(contacts), flags, len(boundaries)], dtype="<u8"
+        ).view(np.uint8)
+        with open(filename, "wb") as f:
+            f.write(header.tobytes())
+            for column, dtype in zip(contacts.columns(), CoreContactColumns.DTYPES):
+                f.write(np.ascontiguousarray(column, dtype=dtype).tobytes())
+            f.write(np.ascontiguousarray(by_start, dtype="<i8").tobytes())
+            f.write(np.ascontiguousarray(boundaries, dtype="<f8").tobytes())
+
+    @classmethod
+    def from_binary(cls, filename: str) -> CoreContactPlan:
+        """
+        Loads a binary plan, memory-mapping its columns instead of reading them.
+        The timeline of the plan is memory-mapped as well, only the starts are
+        gathered once in their sorted order.
+        """
+        if np is None:
+            raise ImportError("numpy is required for binary contact plans")
+        with open(filename, "rb") as f:
+            header = f.read(BINARY_HEADER_SIZE)
+        if len(header) != BINARY_HEADER_SIZE or header[:8] != BINARY_MAGIC:
+            raise ValueError("Invalid binary contact plan: %s" % filename)
+        count, flags, num_boundaries = np.frombuffer(header[8:32], dtype="<u8").tolist()
+
+        def column(dtype, offset, size):
+            if size == 0:
+                return np.zeros(0, dtype=dtype)
+            return np.memmap(
+                filename, dtype=dtype, mode="r", offset=offset, shape=(size,)
+            )
+
+        columns = {}
+        offset = BINARY_HEADER_SIZE
+        for field, dtype in zip(CoreContactColumns.FIELDS, CoreContactColumns.DTYPES):
+            columns[field] = column(dtype, offset, count)
+            offset += count * np.dtype(dtype).itemsize
+        boundaries = None
+        by_start = None
+        if flags & BINARY_FLAG_TIMELINE:
+            by_start = column("<i8", offset, count)
+            offset += count * 8
+            boundaries = column("<f8", offset, num_boundaries)
+        plan = cls(contacts=CoreContactColumns(columns, boundaries, by_start))
+        plan.loop = flags & BINARY_FLAG_LOOP != 0
+        return plan
+
     def all_contacts(self) -> List[Tuple[int, int]]:
+        if isinstance(self.contacts, CoreContactColumns):
+            pairs = zip(self.contacts.node1.tolist(), self.contacts.node2.tolist())
+            return list(set(pairs))
         all = [(c.nodes[0], c.nodes[1]) for c in self.contacts]
         # remove duplicates
         return list(set(all))
 
     def clean(self, time: int) -> None:
         self.contacts = [c for c in self.contacts if c.timespan[1] >= time]
+        self._build_index()
 
     def at(self, time: int) -> List[CoreContact]:
         """Returns the list of contacts at the given time."""
@@ -269,23 +574,10 @@ class CoreContactPlan(object):
         # print("cache miss", time, self.last_at)
         self.last_at = time
 
-        if self.loop:
-            time = time % self.get_max_time()
-
-        contacts = [
-            c for c in self.contacts if time >= c.timespan[0] and time <= c.timespan[1]
-        ]
+        # past contacts drop out of the index while time moves forward
+        self._seek(time)
+        contacts = [self.index.active[i] for i in sorted(self.index.active)]
         self.last_cache = contacts
-
-        if not self.loop:
-            # only clean old entries if not in loop mode
-
-            # print("at: %d (%d) %s" % (time, orig, [str(c) for c in contacts]))
-            tenth_time = self.get_max_time() / 10
-            # check if time is a multiple of 10% of the max time
-            if time % tenth_time == 0:
-                self.clean(time)
-
         return contacts
 
     def next_event(self, time: int) -> Optional[int]:
@@ -293,15 +585,13 @@ class CoreContactPlan(object):
         if self.loop:
             time = time % self.get_max_time()
 
-        nexts_1 = [c.timespan[0] for c in self.contacts if c.timespan[0] > time]
-        nexts_2 = [c.timespan[1] for c in self.contacts if c.timespan[1] > time]
-        nexts = nexts_1 + nexts_2
-        if len(nexts) == 0:
+        next_time = self.index.next_event(time)
+        if next_time is None:
             return None
         if not self.loop:
-            return min(nexts)
+            return next_time
         else:
-            return min(nexts) + (orig - time)
+            return next_time + (orig - time)
 
     # def next_deactivation(self, time : int) -> Optional[int]:
     #   """Returns the next deactivation time.
@@ -316,45 +606,34 @@ class CoreContactPlan(object):
         return self.max_time
 
     def has_contact(self, simtime: float, node1: int, node2: int) -> bool:
-        current_contacts = self.at(simtime)
-        # print("[ %f ] has_contact: %d %d | %s" % (simtime, node1, node2, current_contacts[0]))
-        for c in current_contacts:
-            if c.nodes[0] == node1 and c.nodes[1] == node2:
-                return True
-            if c.nodes[0] == node2 and c.nodes[1] == node1:
-                return True
-        return False
+        self._seek(simtime)
+        return self._contact_between(node1, node2) is not None
 
     def loss_for_contact(self, simtime: float, node1: int, node2: int) -> float:
-        current_contacts = self.at(simtime)
-        # print("[ %f ] loss_for_contact: %d %d | %s" % (simtime, node1, node2, current_contacts))
-        for c in current_contacts:
-            if c.nodes[0] == node1 and c.nodes[1] == node2:
-                return c.loss
-            if c.nodes[0] == node2 and c.nodes[1] == node1:
-                return c.loss
-
-        return 0.0
+        self._seek(simtime)
+        i = self._contact_between(node1, node2)
+        if i is None:
+            return 0.0
+        return self.index.active[i].loss
 
     def tx_time_for_contact(
         self, simtime: float, node1: int, node2: int, size: int
     ) -> float:
-        current_contacts = self.at(simtime)
-        for c in current_contacts:
-            if c.bw == 0:
-                return 0.000005 * size
-            if c.nodes[0] == node1 and c.nodes[1] == node2:
-                # calculate jitter to apply
-                jitter = 0
-                if c.jitter > 0:
-                    jitter = (random() - 0.5) * c.jitter
-                return size / c.bw + c.delay / 1000 + jitter
-            if c.nodes[0] == node2 and c.nodes[1] == node1:
-                jitter = 0
-                if c.jitter > 0:
-                    jitter = (random() - 0.5) * c.jitter
-                return size / c.bw + c.delay / 1000 + jitter
-        raise Exception("no contact found")
+        self._seek(simtime)
+        i = self._contact_between(node1, node2)
+        # any contact without bandwidth active before the one of the pair
+        # makes the default transmission time apply
+        no_bw = self._first_without_bw()
+        if no_bw is not None and (i is None or no_bw <= i):
+            return 0.000005 * size
+        if i is None:
+            raise Exception("no contact found")
+        c = self.index.active[i]
+        # calculate jitter to apply
+        jitter = 0
+        if c.jitter > 0:
+            jitter = (random() - 0.5) * c.jitter
+        return size / c.bw + c.delay / 1000 + jitter
 
     def fixed_links(self) -> List[Tuple[int, int]]:
         return []
@@ -366,8 +645,37 @@ class ContactPlan(CommonContactPlan):
     def __init__(self, name: str, contacts=None):
         self.name = name
         if contacts is None:
-            self.contacts = []
+            contacts = []
         self.contacts = contacts
+        self._build_index()
+
+    def _build_index(self) -> None:
+        """Builds the timelines of all entries, per kind and per node and kind."""
+        by_kind = {}
+        by_node = {}
+        for c in self.contacts:
+            by_kind.setdefault(c[0], []).append(c)
+            by_node.setdefault((c[0], c[2]), []).append(c)
+            if c[3] != c[2]:
+                by_node.setdefault((c[0], c[3]), []).append(c)
+        self.entry_index = self._index(self.contacts)
+        self.kind_indexes = {
+            kind: self._index(entries) for kind, entries in by_kind.items()
+        }
+        self.node_indexes = {
+            key: self._index(entries) for key, entries in by_node.items()
+        }
+
+    @staticmethod
+    def _index(entries) -> IntervalIndex:
+        return IntervalIndex(
+            [c[1][0] for c in entries], [c[1][1] for c in entries], entries
+        )
+
+    def _at(self, index: Optional[IntervalIndex], t) -> list:
+        if index is None:
+            return []
+        return index.at(t)
 
     def __str__(self):
         return "ContactPlan(%s, %d)" % (self.name, len(self.contacts))
@@ -426,45 +734,41 @@ class ContactPlan(CommonContactPlan):
         # remove duplicates
         return list(set(all))
 
+    def at(self, time: float) -> List[CoreContact]:
+        """Returns the contact entries at the given time as CoreContacts."""
+        return [
+            CoreContact(c[1], (c[2], c[3]), int(c[4]), 0.0, 0.0, 0.0)
+            for c in self.get_contacts(time)
+        ]
+
+    def next_event(self, time: float) -> Optional[float]:
+        index = self.kind_indexes.get("contact")
+        if index is None:
+            return None
+        return index.next_event(time)
+
     def get_entries(self, t):
-        return [c for c in self.contacts if c[1][0] <= t and c[1][1] >= t]
+        return self.entry_index.at(t)
 
     def get_contacts(self, t):
-        return [
-            c
-            for c in self.contacts
-            if c[1][0] <= t and c[1][1] >= t and c[0] == "contact"
-        ]
+        return self._at(self.kind_indexes.get("contact"), t)
 
     def get_ranges(self, t):
-        return [
-            c
-            for c in self.contacts
-            if c[1][0] <= t and c[1][1] >= t and c[0] == "range"
-        ]
+        return self._at(self.kind_indexes.get("range"), t)
 
     def get_contacts_for_node(self, t, node_id: int):
-        return [
-            c
-            for c in self.contacts
-            if c[1][0] <= t
-            and c[1][1] >= t
-            and (c[2] == node_id or c[3] == node_id)
-            and c[0] == "contact"
-        ]
+        return self._at(self.node_indexes.get(("contact", node_id)), t)
 
     def get_ranges_for_node(self, t, node_id: int):
-        return [
-            c
-            for c in self.contacts
-            if c[1][0] <= t
-            and c[1][1] >= t
-            and (c[2] == node_id or c[3] == node_id)
-            and c[0] == "range"
-        ]
+        return self._at(self.node_indexes.get(("range", node_id)), t)
 
     def remove_past_entries(self, t):
-        self.contacts = [c for c in self.contacts if c[1][1] >= t]
+        # entries ending before t drop out when the cursors move forward
+        self.entry_index.advance(t)
+        for index in self.kind_indexes.values():
+            index.advance(t)
+        for index in self.node_indexes.values():
+            index.advance(t)
 
     def has_contact(self, simtime: float, node1: int, node2: int) -> bool:
         contacts_of_src = self.get_contacts_for_node(simtime, node1)
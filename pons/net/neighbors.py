@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pons
+
+# (network name, node id, peer id)
+Link = Tuple[str, int, int]
+
+
+class NeighborService(object):
+    """Computes the neighbors of all nodes once per simulated instant.
+
+    The adjacency is cached until the simulation time changes or a node moves,
+    so routers and the movement manager share a single computation. Event-driven
+    neighbor discovery publishes the links that came up or went down through the
+    service to the listeners of their nodes.
+    """
+
+    def __init__(self, netsim: pons.NetSim):
+        self.netsim = netsim
+        self.adjacency: Dict[int, Dict[str, List[int]]] = {}
+        self.time: Optional[float] = None
+        self.dirty = True
+        self.listeners: Dict[
+            int, List[Callable[[float, List[Link], List[Link]], None]]
+        ] = {}
+
+    def __str__(self):
+        return "NeighborService(time=%r, #nodes=%d)" % (self.time, len(self.adjacency))
+
+    def invalidate(self):
+        """Marks the cached adjacency as outdated, e.g., because a node has moved."""
+        self.dirty = True
+
+    def subscribe(
+        self, node_id: int, listener: Callable[[float, List[Link], List[Link]], None]
+    ):
+        """Registers a listener called with (time, links up, links down) of a node."""
+        if node_id not in self.listeners:
+            self.listeners[node_id] = []
+        self.listeners[node_id].append(listener)
+
+    def publish(self, simtime: float, links_up: List[Link], links_down: List[Link]):
+        """Notifies the listeners of the nodes whose links came up or went down."""
+        changes: Dict[int, Tuple[List[Link], List[Link]]] = {}
+        for link in links_up:
+            if link[1] not in changes:
+                changes[link[1]] = ([], [])
+            changes[link[1]][0].append(link)
+        for link in links_down:
+            if link[1] not in changes:
+                changes[link[1]] = ([], [])
+            changes[link[1]][1].append(link)
+        for node_id, (up, down) in changes.items():
+            for listener in self.listeners.get(node_id, []):
+                listener(simtime, up, down)
+
+    def update(self, simtime: float):
+        """Recomputes the adjacency of all nodes if it is outdated."""
+        lazy_mover = getattr(self.netsim, "lazy_mover", None)
+        if lazy_mover is not None:
+            # segment movement places the nodes only when they are needed
+            lazy_mover.update(simtime)
+        if not self.dirty and simtime == self.time:
+            return
+        nodes = self.netsim.nodes.values()
+        self.adjacency = {n.id: n.find_neighbors(simtime, nodes) for n in nodes}
+        self.time = simtime
+        self.dirty = False
+
+    def neighbors_of(self, node_id: int, simtime: float) -> Dict[str, List[int]]:
+        """Returns the neighbors of a node per network at the given time."""
+        self.update(simtime)
+        return self.adjacency[node_id]
+
+    def discover(self, node_id: int, simtime: float) -> List[int]:
+        """Updates the neighbor table of a node and returns its peers on all networks."""
+        node = self.netsim.nodes[node_id]
+        node.calc_neighbors(simtime, self.netsim.nodes.values())
+        peers = set()
+        for net in node.neighbors.values():
+            peers.update(net)
+        return list(peers)
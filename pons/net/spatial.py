@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import math
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if TYPE_CHECKING:
+    from pons import Node
+
+# number of rows for which the distances are computed at once
+DISTANCE_BLOCK_SIZE = 1024
+
+
+class SpatialGrid(object):
+    """A uniform grid index over node positions for range-based neighbor queries.
+
+    The cell size equals the radio range, so every node within range of a
+    node is located in the same or one of the eight surrounding cells.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Dict[int, Node]] = {}
+        self.node_cells: Dict[int, Tuple[int, int]] = {}
+        # insertion order of the nodes, used to return candidates in a stable order
+        self.order: Dict[int, int] = {}
+
+    def __str__(self):
+        return "SpatialGrid(%.02f, #nodes=%d, #cells=%d)" % (
+            self.cell_size,
+            len(self.node_cells),
+            len(self.cells),
+        )
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def add(self, node: Node):
+        """Adds a node to the index at its current position."""
+        if node.id not in self.order:
+            self.order[node.id] = len(self.order)
+        self.update(node)
+
+    def remove(self, node: Node):
+        """Removes a node from the index."""
+        cell = self.node_cells.pop(node.id, None)
+        if cell is not None:
+            del self.cells[cell][node.id]
+            if len(self.cells[cell]) == 0:
+                del self.cells[cell]
+        self.order.pop(node.id, None)
+
+    def update(self, node: Node):
+        """Moves a node to the cell matching its current position."""
+        if node.id not in self.order:
+            return
+        cell = self._cell(node.x, node.y)
+        old_cell = self.node_cells.get(node.id)
+        if old_cell == cell:
+            return
+        if old_cell is not None:
+            del self.cells[old_cell][node.id]
+            if len(self.cells[old_cell]) == 0:
+                del self.cells[old_cell]
+        if cell not in self.cells:
+            self.cells[cell] = {}
+        self.cells[cell][node.id] = node
+        self.node_cells[node.id] = cell
+
+    def candidates(self, node: Node) -> List[Node]:
+        """Returns all nodes in the cells surrounding the given node (including itself)."""
+        cx, cy = self.node_cells[node.id]
+        found = []
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                cell = self.cells.get((i, j))
+                if cell is not None:
+                    found.extend(cell.values())
+        found.sort(key=lambda n: self.order[n.id])
+        return found
+
+
+class VerletIndex(object):
+    """Verlet neighbor lists for range-based networks of moving nodes.
+
+    Every node keeps a list of the nodes within range + skin. The lists are
+    only rebuilt once some node has moved more than skin / 2 since the last
+    rebuild, until then no pair outside the lists can have come within range.
+    The exact range check is done by the network settings.
+    """
+
+    def __init__(self, range: float, skin: float):
+        self.range = range
+        self.skin = skin
+        self.list_range_sq = (range + skin) * (range + skin)
+        self.max_shift_sq = (skin / 2) * (skin / 2)
+        self.members: Dict[int, Node] = {}
+        # positions of the nodes at the last rebuild
+        self.anchors: Dict[int, Tuple[float, float, float]] = {}
+        self.lists: Dict[int, List[Node]] = {}
+        self.stale = True
+        self.rebuilds = 0
+
+    def __str__(self):
+        return "VerletIndex(%.02f, %.02f, #nodes=%d, #rebuilds=%d)" % (
+            self.range,
+            self.skin,
+            len(self.members),
+            self.rebuilds,
+        )
+
+    def add(self, node: Node):
+        self.members[node.id] = node
+        self.stale = True
+
+    def remove(self, node: Node):
+        self.members.pop(node.id, None)
+        self.stale = True
+
+    def update(self, node: Node):
+        """Marks the lists as outdated if the node has moved too far since the last rebuild."""
+        if self.stale:
+            return
+        anchor = self.anchors.get(node.id)
+        if anchor is None:
+            return
+        dx = node.x - anchor[0]
+        dy = node.y - anchor[1]
+        dz = node.z - anchor[2]
+        if dx * dx + dy * dy + dz * dz > self.max_shift_sq:
+            self.stale = True
+
+    def candidates(self, node: Node) -> List[Node]:
+        """Returns the Verlet list of the given node (including itself)."""
+        if self.stale:
+            self._rebuild()
+        return self.lists[node.id]
+
+    def _rebuild(self):
+        grid = SpatialGrid(self.range + self.skin)
+        for n in self.members.values():
+            grid.add(n)
+        self.lists = {}
+        self.anchors = {}
+        for n in self.members.values():
+            x, y, z = n.x, n.y, n.z
+            found = []
+            for other in grid.candidates(n):
+                dx = other.x - x
+                dy = other.y - y
+                dz = other.z - z
+                if dx * dx + dy * dy + dz * dz <= self.list_range_sq:
+                    found.append(other)
+            self.lists[n.id] = found
+            self.anchors[n.id] = (x, y, z)
+        self.stale = False
+        self.rebuilds += 1
+
+
+class PositionTable(object):
+    """A NumPy-backed table holding the positions of all nodes.
+
+    The coordinates of each node become a view into one row of the table,
+    so positions can be processed for all nodes at once.
+    """
+
+    def __init__(self, nodes: Iterable[Node]):
+        if np is None:
+            raise ImportError("numpy is required for the position table")
+        nodes = list(nodes)
+        self.rows: Dict[int, int] = {}
+        self.xyz = np.zeros((len(nodes), 3))
+        for i, node in enumerate(nodes):
+            self.rows[node.id] = i
+            self.xyz[i] = node._pos
+            node._pos = self.xyz[i]
+
+    def __str__(self):
+        return "PositionTable(#nodes=%d)" % len(self.rows)
+
+
+class VectorizedIndex(object):
+    """A neighbor index computing the full adjacency of a network from a PositionTable.
+
+    The squared distances between all members are computed in one vectorized
+    pass the first time neighbors are queried after any node has moved.
+    """
+
+    def __init__(self, table: PositionTable, range: float):
+        self.table = table
+        self.range = range
+        # small slack, the exact range check is done by the network settings
+        self.range_sq = range * range * (1 + 1e-9)
+        self.members: Dict[int, Node] = {}
+        self.dirty = True
+        self.adjacency: Dict[int, List[Node]] = {}
+
+    def __str__(self):
+        return "VectorizedIndex(%.02f, #nodes=%d)" % (self.range, len(self.members))
+
+    def add(self, node: Node):
+        self.members[node.id] = node
+        self.dirty = True
+
+    def remove(self, node: Node):
+        self.members.pop(node.id, None)
+        self.dirty = True
+
+    def update(self, node: Node):
+        self.dirty = True
+
+    def candidates(self, node: Node) -> List[Node]:
+        """Returns all nodes within range of the given node (including itself)."""
+        if self.dirty:
+            self._compute_adjacency()
+        return self.adjacency[node.id]
+
+    def _compute_adjacency(self):
+        nodes = list(self.members.values())
+        rows = np.array([self.table.rows[n.id] for n in nodes], dtype=np.intp)
+        pos = self.table.xyz[rows]
+        x = pos[:, 0]
+        y = pos[:, 1]
+        z = pos[:, 2]
+        use_z = bool(np.any(z))
+        self.adjacency = {}
+        for start in range(0, len(nodes), DISTANCE_BLOCK_SIZE):
+            end = min(start + DISTANCE_BLOCK_SIZE, len(nodes))
+            dist = np.subtract.outer(x[start:end], x)
+            dist *= dist
+            d = np.subtract.outer(y[start:end], y)
+            d *= d
+            dist += d
+            if use_z:
+                d = np.subtract.outer(z[start:end], z)
+                d *= d
+                dist += d
+            row_idx, col_idx = np.nonzero(dist <= self.range_sq)
+            counts = np.bincount(row_idx, minlength=end - start).tolist()
+            col_idx = col_idx.tolist()
+            offset = 0
+            for i, count in enumerate(counts):
+                self.adjacency[nodes[start + i].id] = [
+                    nodes[j] for j in col_idx[offset : offset + count]
+                ]
+                offset += count
+        self.dirty = False
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from copy import deepcopy
-from typing import List
+from typing import Dict, List
 import pons
 from pons.message import Message
 
@@ -25,9 +25,7 @@ class Node(object):
         self.name = node_name
         if self.name == "":
             self.name = "n%d" % self.id
-        self.x = 0.0
-        self.y = 0.0
-        self.z = 0.0
+        self._pos = [0.0, 0.0, 0.0]
         self.net = {}
         if net is not None:
             for n in net:
@@ -47,6 +45,47 @@ class Node(object):
             self.z,
         )
 
+    @property
+    def x(self) -> float:
+        return self._pos[0]
+
+    @x.setter
+    def x(self, value: float):
+        self._pos[0] = value
+        self._moved()
+
+    @property
+    def y(self) -> float:
+        return self._pos[1]
+
+    @y.setter
+    def y(self, value: float):
+        self._pos[1] = value
+        self._moved()
+
+    @property
+    def z(self) -> float:
+        return self._pos[2]
+
+    @z.setter
+    def z(self, value: float):
+        self._pos[2] = value
+        self._moved()
+
+    def set_position(self, x: float, y: float, z: float):
+        """Sets all coordinates at once and updates the spatial indexes only once."""
+        self._pos[0] = x
+        self._pos[1] = y
+        self._pos[2] = z
+        self._moved()
+
+    def _moved(self):
+        for net in self.net.values():
+            if net.spatial_index is not None:
+                net.spatial_index.update(self)
+        if self.netsim is not None:
+            self.netsim.neighbor_service.invalidate()
+
     def log(self, msg: str):
         if self.netsim is not None:
             now = self.netsim.env.now
@@ -60,14 +99,34 @@ class Node(object):
             self.router.start(netsim, self.id)
 
     def calc_neighbors(self, simtime, nodes: List[Node]):
+        if self.netsim is not None:
+            # reuse the adjacency shared by all nodes of the simulation
+            self.neighbors.update(
+                self.netsim.neighbor_service.neighbors_of(self.id, simtime)
+            )
+        else:
+            self.neighbors.update(self.find_neighbors(simtime, nodes))
+        # self.log("neighbors: %s @ %f" % (self.neighbors, simtime))
+
+    def find_neighbors(self, simtime, nodes: List[Node]) -> Dict[str, List[int]]:
+        """Returns the ids of all nodes in contact with this node per network."""
+        neighbors = {}
         for net in self.net.values():
-            self.neighbors[net.name] = []
-            for node in nodes:
+            if net.contact_engine is not None:
+                # neighbors are maintained by link up/down events
+                continue
+            neighbors[net.name] = []
+            if net.spatial_index is not None:
+                # only check the nodes in the surrounding cells
+                candidates = net.spatial_index.candidates(self)
+            else:
+                candidates = nodes
+            for node in candidates:
                 if node.id != self.id:
                     # print("node %d: %s %s %s" % (node.id, node.net, net.name,  net.has_contact(simtime, self, node)))
                     if net.name in node.net and net.has_contact(simtime, self, node):
-                        self.neighbors[net.name].append(node.id)
-        # self.log("neighbors: %s @ %f" % (self.neighbors, simtime))
+                        neighbors[net.name].append(node.id)
+        return neighbors
 
     def add_all_neighbors(self, simtime, nodes: List[Node]):
         for net in self.net.values():
@@ -103,7 +162,7 @@ class Node(object):
                             {
                                 "event": "TX",
                                 "id": self.id,
-                                "msg": msg.unique_id(),
+                                "msg": msg,
                                 "to": nid,
                             },
                         )
@@ -117,7 +176,7 @@ class Node(object):
                             {
                                 "event": "LOST",
                                 "id": self.id,
-                                "msg": msg.unique_id(),
+                                "msg": msg,
                                 "to": nid,
                             },
                         )
@@ -143,7 +202,7 @@ class Node(object):
                             {
                                 "event": "TX",
                                 "id": self.id,
-                                "msg": msg.unique_id(),
+                                "msg": msg,
                                 "to": to_nid,
                             },
                         )
@@ -160,7 +219,7 @@ class Node(object):
                             {
                                 "event": "LOST",
                                 "id": self.id,
-                                "msg": msg.unique_id(),
+                                "msg": msg,
                                 "to": to_nid,
                             },
                         )
@@ -177,34 +236,38 @@ class Node(object):
             if from_nid in self.neighbors[net.name]:
                 # self.log("Node %d received msg %s from %d" % (self.id, msg.id, from_nid))
                 netsim.net_stats["rx"] += 1
-                netsim.nodes[from_nid].router._on_tx_succeeded(msg.unique_id(), self.id)
+                netsim.nodes[from_nid].router._on_tx_succeeded(msg.handle, self.id)
                 pons.simulation.event_log(
                     netsim.env.now,
                     "NET",
                     {
                         "event": "RX",
                         "id": self.id,
-                        "msg": msg.unique_id(),
+                        "msg": msg,
                         "from": from_nid,
                     },
                 )
                 if self.router is not None:
                     if msg.id == "HELLO":
-                        self.router.on_scan_received(deepcopy(msg), from_nid)
+                        self.router.on_scan_received(msg.copy(), from_nid)
+                    elif msg.id == "SUMMARY":
+                        self.router.on_summary_received(
+                            msg.metadata["summary"], from_nid
+                        )
                     else:
-                        self.router._on_msg_received(deepcopy(msg), from_nid)
+                        self.router._on_msg_received(msg.copy(), from_nid)
             else:
                 # print("Node %d received msg %s from %d (not neighbor)" %
                 #      (to_nid, msg, from_nid))
                 netsim.net_stats["drop"] += 1
-                netsim.nodes[from_nid].router._on_tx_failed(msg.unique_id(), self.id)
+                netsim.nodes[from_nid].router._on_tx_failed(msg.handle, self.id)
                 pons.simulation.event_log(
                     netsim.env.now,
                     "NET",
                     {
                         "event": "RX_FAIL",
                         "id": self.id,
-                        "msg": msg.unique_id(),
+                        "msg": msg,
                         "to": from_nid,
                     },
                 )
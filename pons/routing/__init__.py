@@ -1,4 +1,17 @@
 from .router import Router
+from .store import MessageStore
+from .history import History
+from .summary import BloomFilter
+from .eviction import (
+    EvictionPolicy,
+    SmallestFirst,
+    FIFO,
+    OldestFirst,
+    LargestFirst,
+    LRU,
+    MostForwardedFirst,
+    ShortestTTLFirst,
+)
 from .epidemic import EpidemicRouter
 from .directdelivery import DirectDeliveryRouter
 from .firstcontact import FirstContactRouter
@@ -2,8 +2,10 @@ from .router import Router
 
 
 class DirectDeliveryRouter(Router):
-    def __init__(self, scan_interval=2.0, capacity=0, apps=None):
-        super(DirectDeliveryRouter, self).__init__(scan_interval, capacity, apps=apps)
+    def __init__(self, scan_interval=2.0, capacity=0, apps=None, eviction=None):
+        super(DirectDeliveryRouter, self).__init__(
+            scan_interval, capacity, apps=apps, eviction=eviction
+        )
 
     def __str__(self):
         return "DirectDeliveryRouter"
@@ -20,7 +22,7 @@ class DirectDeliveryRouter(Router):
             # self.netsim.env.process(
             self.send(msg.dst, msg)
             # )
-            self.remember(msg.dst, msg.unique_id())
+            self.remember(msg.dst, msg)
             self.store_del(msg)
 
     def on_peer_discovered(self, peer_id):
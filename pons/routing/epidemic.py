@@ -1,9 +1,36 @@
-from .router import Router
+import pons
+from .router import Router, HELLO_MSG_SIZE
+from .summary import summary_size
 
 
 class EpidemicRouter(Router):
-    def __init__(self, scan_interval=2.0, capacity=0, apps=None):
-        super(EpidemicRouter, self).__init__(scan_interval, capacity, apps)
+    def __init__(
+        self,
+        scan_interval=2.0,
+        capacity=0,
+        apps=None,
+        eviction=None,
+        summary_vector=None,
+        bloom_fp_rate=0.01,
+        summary_timeout=5.0,
+    ):
+        """
+        @param summary_vector: None to guess what a new peer lacks from the local history only,
+        "exact" or "bloom" to send the summary vector to a new peer as a set of message handles or a
+        Bloom filter, the peer then only sends the messages missing from it
+        @param bloom_fp_rate: the false positive rate of the Bloom filters, messages hit by a false
+        positive are not sent to the peer
+        @param summary_timeout: the seconds to wait for the summary vector of a peer before falling back
+        to the local history, e.g., because the peer does not send one or the link went down
+        """
+        super(EpidemicRouter, self).__init__(scan_interval, capacity, apps, eviction)
+        if summary_vector not in (None, "exact", "bloom"):
+            raise ValueError("unknown summary vector type: %s" % summary_vector)
+        self.summary_vector = summary_vector
+        self.bloom_fp_rate = bloom_fp_rate
+        self.summary_timeout = summary_timeout
+        # peers whose summary vector has not arrived yet
+        self.awaiting_summary = set()
 
     def __str__(self):
         return "EpidemicRouter"
@@ -22,7 +49,7 @@ class EpidemicRouter(Router):
             # self.netsim.env.process(
             self.send(msg.dst, msg)
             # )
-            self.remember(msg.dst, msg.unique_id())
+            self.remember(msg.dst, msg)
             self.store_del(msg)
         else:
             # self.log("broadcasting to peers ", self.peers)
@@ -33,16 +60,68 @@ class EpidemicRouter(Router):
                     # self.netsim.env.process(
                     self.send(peer, msg)
                     # )
-                    self.remember(peer, msg.unique_id())
+                    self.remember(peer, msg)
 
     def on_peer_discovered(self, peer_id):
         # self.log("new peer discovered: %d" % peer_id)
+        if self.summary_vector is not None:
+            # the peer sends what it lacks once our summary vector arrived
+            self.awaiting_summary.add(peer_id)
+            self.send_summary_vector(peer_id)
+            self.env.process(self.await_summary(peer_id))
+            return
+        self.forward_to_peer(peer_id)
+
+    def forward_to_peer(self, peer_id):
+        """forwards the stored messages the local history does not list as spread to the peer"""
         for msg in self.store:
-            if msg.is_expired(self.netsim.env.now):
-                self.store_del(msg)
+            if not self.msg_already_spread(msg, peer_id):
+                self.forward(msg)
+
+    def await_summary(self, peer_id):
+        """falls back to the local history if the peer's summary vector does not arrive in time"""
+        yield self.env.timeout(self.summary_timeout)
+        if peer_id in self.awaiting_summary:
+            self.awaiting_summary.discard(peer_id)
+            if peer_id in self.peers:
+                self.forward_to_peer(peer_id)
+
+    def send_summary_vector(self, peer_id):
+        """sends the summary vector to a peer as a control message of its encoded size"""
+        if self.summary_vector == "bloom":
+            summary = self.get_summary_vector(self.bloom_fp_rate)
+        else:
+            summary = self.get_summary_vector()
+        size = HELLO_MSG_SIZE + summary_size(summary)
+        self.netsim.routing_stats["summaries"] += 1
+        self.netsim.routing_stats["summary_bytes"] += size
+        self.netsim.nodes[self.my_id].send(
+            self.netsim,
+            peer_id,
+            pons.Message(
+                "SUMMARY",
+                self.my_id,
+                peer_id,
+                size,
+                self.env.now,
+                metadata={"summary": summary},
+            ),
+        )
+
+    def on_summary_received(self, summary, remote_id):
+        self.awaiting_summary.discard(remote_id)
+        self.store_cleanup()
+        for msg in self.store:
+            if msg.handle in summary:
+                # the peer already has the message
+                self.remember(remote_id, msg)
+            elif not self.msg_already_spread(msg, remote_id):
+                self.netsim.routing_stats["started"] += 1
+                self.send(remote_id, msg)
             else:
-                if not self.msg_already_spread(msg, peer_id):
-                    self.forward(msg)
+                continue
+            if msg.dst == remote_id:
+                self.store_del(msg)
 
     def on_msg_received(self, msg, remote_id, was_known):
         # self.log("msg received: %s from %d" % (msg, remote_id))
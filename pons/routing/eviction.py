@@ -0,0 +1,133 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+import pons
+
+
+class EvictionPolicy(object):
+    """Base class of the policies choosing which messages to drop when a store is full.
+
+    The stored messages are kept in a min-heap ordered by the key of the policy,
+    so a victim is selected in O(log n). Entries of removed messages and outdated
+    keys are skipped lazily.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[tuple, int, int]] = []
+        # message handle -> counter of the valid heap entry
+        self._entries: Dict[int, int] = {}
+        self._counter = 0
+
+    def __str__(self):
+        return self.__class__.__name__
+
+    def key(self, msg: "pons.Message") -> tuple:
+        """returns the key of a message, the message with the smallest key is dropped first"""
+        raise NotImplementedError
+
+    def _push(self, msg: "pons.Message"):
+        if len(self._heap) > 2 * len(self._entries) + 16:
+            self._compact()
+        self._counter += 1
+        self._entries[msg.handle] = self._counter
+        heapq.heappush(self._heap, (self.key(msg), self._counter, msg.handle))
+
+    def _compact(self):
+        self._heap = [e for e in self._heap if self._entries.get(e[2]) == e[1]]
+        heapq.heapify(self._heap)
+
+    def added(self, msg: "pons.Message"):
+        """called when a message is added to the store"""
+        self._push(msg)
+
+    def removed(self, msg: "pons.Message"):
+        """called when a message is removed from the store"""
+        self._entries.pop(msg.handle, None)
+
+    def forwarded(self, msg: "pons.Message"):
+        """called when a stored message is sent to a peer"""
+        pass
+
+    def victim(self) -> Optional[int]:
+        """returns the handle of the next message to drop or None if the store is empty"""
+        while len(self._heap) > 0:
+            _, counter, handle = self._heap[0]
+            if self._entries.get(handle) == counter:
+                return handle
+            heapq.heappop(self._heap)
+        return None
+
+    def clear(self):
+        self._heap.clear()
+        self._entries.clear()
+
+
+class SmallestFirst(EvictionPolicy):
+    """Drops the smallest messages first, the oldest first among the same size."""
+
+    def key(self, msg):
+        return (msg.size, msg.created)
+
+
+class FIFO(EvictionPolicy):
+    """Drops the messages in the order they were added to the store."""
+
+    def key(self, msg):
+        return ()
+
+
+class OldestFirst(EvictionPolicy):
+    """Drops the messages created first."""
+
+    def key(self, msg):
+        return (msg.created,)
+
+
+class LargestFirst(EvictionPolicy):
+    """Drops the largest messages first, the oldest first among the same size."""
+
+    def key(self, msg):
+        return (-msg.size, msg.created)
+
+
+class LRU(EvictionPolicy):
+    """Drops the least recently used messages, a message is used when it is added or sent."""
+
+    def key(self, msg):
+        # the heap counter orders the messages by their last use
+        return ()
+
+    def forwarded(self, msg):
+        if msg.handle in self._entries:
+            self._push(msg)
+
+
+class MostForwardedFirst(EvictionPolicy):
+    """Drops the messages sent most often by this router first."""
+
+    def __init__(self):
+        super().__init__()
+        self._forwards: Dict[int, int] = {}
+
+    def key(self, msg):
+        return (-self._forwards.get(msg.handle, 0),)
+
+    def removed(self, msg):
+        super().removed(msg)
+        self._forwards.pop(msg.handle, None)
+
+    def forwarded(self, msg):
+        if msg.handle in self._entries:
+            self._forwards[msg.handle] = self._forwards.get(msg.handle, 0) + 1
+            self._push(msg)
+
+    def clear(self):
+        super().clear()
+        self._forwards.clear()
+
+
+class ShortestTTLFirst(EvictionPolicy):
+    """Drops the messages expiring first."""
+
+    def key(self, msg):
+        return (msg.created + msg.ttl,)
@@ -2,9 +2,10 @@ from .router import Router
 
 
 class FirstContactRouter(Router):
-    def __init__(self, scan_interval=2.0, capacity=0, apps=None):
-        super(FirstContactRouter, self).__init__(scan_interval, capacity, apps)
-        self.store = []
+    def __init__(self, scan_interval=2.0, capacity=0, apps=None, eviction=None):
+        super(FirstContactRouter, self).__init__(
+            scan_interval, capacity, apps, eviction
+        )
 
     def __str__(self):
         return "FirstContactRouter"
@@ -21,7 +22,7 @@ class FirstContactRouter(Router):
             # self.netsim.env.process(
             self.send(msg.dst, msg)
             # )
-            self.remember(msg.dst, msg.unique_id())
+            self.remember(msg.dst, msg)
             self.store_del(msg)
         else:
             # self.log("broadcasting to peers ", self.peers)
@@ -32,7 +33,7 @@ class FirstContactRouter(Router):
                     # self.netsim.env.process(
                     self.send(peer, msg)
                     # )
-                    self.remember(peer, msg.unique_id())
+                    self.remember(peer, msg)
                     self.store_del(msg)
                     return
 
@@ -0,0 +1,100 @@
+import heapq
+from typing import Dict, Iterator, List, Tuple, Union
+
+import pons
+
+
+class History(object):
+    """The messages a router has seen and the peers known to have each of them.
+
+    Peers get dense indexes in the order they are first seen, and the peers of a
+    message are kept as a bitmask over these indexes, which takes a few bytes
+    instead of a set. Entries of expired messages can be pruned, as routers drop
+    expired copies on arrival, so the history stays bounded by the messages alive
+    at a time.
+    """
+
+    def __init__(self):
+        # message handle -> bitmask of peer indexes
+        self._peers: Dict[int, int] = {}
+        # peer id -> index of its bit and the reverse mapping
+        self._indexes: Dict[int, int] = {}
+        self._ids: List[int] = []
+        # (created + ttl, message handle, created, ttl) of the entries that can be pruned
+        self._expiry: List[Tuple[float, int, float, float]] = []
+
+    def __len__(self) -> int:
+        return len(self._peers)
+
+    def __iter__(self) -> Iterator[int]:
+        """iterates over the handles of the known messages"""
+        return iter(self._peers)
+
+    def __contains__(self, msg: Union[int, "pons.Message"]) -> bool:
+        if isinstance(msg, pons.Message):
+            msg = msg.handle
+        return msg in self._peers
+
+    def _bit(self, peer_id: int) -> int:
+        index = self._indexes.get(peer_id)
+        if index is None:
+            index = len(self._ids)
+            self._indexes[peer_id] = index
+            self._ids.append(peer_id)
+        return 1 << index
+
+    def add(self, msg: Union[int, "pons.Message"], peer_id: int) -> None:
+        """
+        notes that a peer has a message
+        @param msg: the message or its handle, entries only added by handle are never pruned
+        """
+        if isinstance(msg, pons.Message):
+            handle = msg.handle
+            if handle not in self._peers and msg.ttl is not None:
+                heapq.heappush(
+                    self._expiry,
+                    (msg.created + msg.ttl, handle, msg.created, msg.ttl),
+                )
+        else:
+            handle = msg
+        self._peers[handle] = self._peers.get(handle, 0) | self._bit(peer_id)
+
+    def discard(self, msg: Union[int, "pons.Message"], peer_id: int) -> None:
+        """notes that a peer does not have a message, which stays known"""
+        if isinstance(msg, pons.Message):
+            msg = msg.handle
+        index = self._indexes.get(peer_id)
+        if msg in self._peers and index is not None:
+            self._peers[msg] &= ~(1 << index)
+
+    def has(self, msg: Union[int, "pons.Message"], peer_id: int) -> bool:
+        """returns whether a peer is known to have a message"""
+        if isinstance(msg, pons.Message):
+            msg = msg.handle
+        index = self._indexes.get(peer_id)
+        if index is None:
+            return False
+        return (self._peers.get(msg, 0) >> index) & 1 == 1
+
+    def peers(self, msg: Union[int, "pons.Message"]) -> Iterator[int]:
+        """yields the ids of the peers known to have a message, in the order they were first seen"""
+        if isinstance(msg, pons.Message):
+            msg = msg.handle
+        mask = self._peers.get(msg, 0)
+        while mask:
+            low = mask & -mask
+            yield self._ids[low.bit_length() - 1]
+            mask ^= low
+
+    def prune(self, now: float) -> int:
+        """forgets the messages expired at the given time and returns their number"""
+        pruned = 0
+        while len(self._expiry) > 0:
+            expires, handle, created, ttl = self._expiry[0]
+            # same test as Message.is_expired
+            if expires > now or not now - created > ttl:
+                break
+            heapq.heappop(self._expiry)
+            if self._peers.pop(handle, None) is not None:
+                pruned += 1
+        return pruned
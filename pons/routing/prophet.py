@@ -40,10 +40,14 @@ class PRoPHETRouter(Router):
     """
 
     def __init__(
-        self, scan_interval=2.0, capacity=0, config: PRoPHETConfig = None, apps=None
+        self,
+        scan_interval=2.0,
+        capacity=0,
+        config: PRoPHETConfig = None,
+        apps=None,
+        eviction=None,
     ):
-        super().__init__(scan_interval, capacity, apps=apps)
-        self.store = []
+        super().__init__(scan_interval, capacity, apps=apps, eviction=eviction)
         self.predictabilities = {}
         self.config = PRoPHETConfig() if config is None else config
 
@@ -56,7 +60,7 @@ class PRoPHETRouter(Router):
 
     def add(self, msg):
         # self.log("adding new msg to store")
-        self.store.append(msg)
+        self.store.add(msg)
         self.forward(msg)
 
     def forward(self, msg):
@@ -69,7 +73,7 @@ class PRoPHETRouter(Router):
             # self.netsim.env.process(
             self.send(msg.dst, msg)
             # )
-            self.remember(msg.dst, msg.unique_id())
+            self.remember(msg.dst, msg)
             self.store.remove(msg)
         else:
             # self.log("broadcasting to peers ", self.peers)
@@ -84,7 +88,7 @@ class PRoPHETRouter(Router):
                         # self.netsim.env.process(
                         self.send(peer, msg)
                         # )
-                        self.remember(peer, msg.unique_id())
+                        self.remember(peer, msg)
 
     def on_peer_discovered(self, peer_id):
         self._update_predictability(peer_id)
@@ -1,18 +1,23 @@
 from copy import copy
 import pons
 from pons.event_log import event_log
+from .store import MessageStore
+from .history import History
+from .summary import BloomFilter
 
 HELLO_MSG_SIZE = 42
 
 
 class Router(object):
-    def __init__(self, scan_interval=2.0, capacity=0, apps=None):
+    def __init__(self, scan_interval=2.0, capacity=0, apps=None, eviction=None):
+        """
+        @param capacity: the capacity of the store in bytes, 0 for unlimited
+        @param eviction: the EvictionPolicy used when the store is full, smallest first by default
+        """
         self.scan_interval = scan_interval
         self.peers = []
-        self.history = {}
-        self.store = []
-        self.capacity = capacity
-        self.used = 0
+        self.history = History()
+        self.store = MessageStore(capacity, eviction)
         if apps is None:
             apps = []
         self.apps = apps
@@ -23,11 +28,24 @@ class Router(object):
             "delivered": 0,
             "dropped": 0,
             "removed": 0,
+            "expired_on_arrival": 0,
         }
 
     def __str__(self):
         return "Router"
 
+    @property
+    def capacity(self) -> int:
+        return self.store.capacity
+
+    @capacity.setter
+    def capacity(self, capacity: int):
+        self.store.capacity = capacity
+
+    @property
+    def used(self) -> int:
+        return self.store.used
+
     def __repr__(self):
         """Allow seeing value instead of object description"""
         return str(self)
@@ -37,35 +55,38 @@ class Router(object):
 
     def send(self, to_nid: int, msg: pons.Message):
         self.stats["tx"] += 1
-        self.remember(to_nid, msg.unique_id())
+        self.remember(to_nid, msg)
+        if msg in self.store:
+            self.store.forwarded(msg)
         self.netsim.nodes[self.my_id].send(self.netsim, to_nid, msg)
         event_log(
             self.env.now,
             "ROUTER",
-            {"event": "TX", "src": self.my_id, "dst": to_nid, "msg": msg.unique_id()},
+            {"event": "TX", "src": self.my_id, "dst": to_nid, "msg": msg},
         )
 
     def add(self, msg: pons.Message):
         self.store_add(msg)
 
     def store_add(self, msg: pons.Message):
-        if self.capacity > 0 and self.used + msg.size > self.capacity:
+        if msg.is_expired(self.env.now):
+            return False
+        self.store_cleanup()
+        if not self.store.fits(msg.size):
             # self.log("store full, no room for msg %s" % msg.id)
-            self.store_cleanup()
             self.make_room_for(msg)
-            if self.used + msg.size > self.capacity:
+            if not self.store.fits(msg.size):
                 # self.log("store still full, no room for msg %s" % msg.id)
                 return False
             # self.log("store cleaned up, made room for msg %s" % msg.id)
-        self.store.append(msg)
-        self.used += msg.size
+        self.store.add(msg)
         event_log(
             self.env.now,
             "STORE",
             {
                 "event": "ADDED",
                 "id": self.my_id,
-                "msg": msg.unique_id(),
+                "msg": msg,
                 "used": self.used,
                 "capacity": self.capacity,
             },
@@ -73,8 +94,8 @@ class Router(object):
         return True
 
     def store_del(self, msg: pons.Message, dropped: bool = False):
-        self.used -= msg.size
-        self.store.remove(msg)
+        if self.store.remove(msg) is None:
+            return
         event = "DROPPED" if dropped else "REMOVED"
         event_log(
             self.env.now,
@@ -82,7 +103,7 @@ class Router(object):
             {
                 "event": event,
                 "id": self.my_id,
-                "msg": msg.unique_id(),
+                "msg": msg,
                 "used": self.used,
                 "capacity": self.capacity,
             },
@@ -94,28 +115,27 @@ class Router(object):
             self.stats["removed"] += 1
             self.netsim.routing_stats["removed"] += 1
 
-    def store_del_by_id(self, msg_id: str, dropped: bool = False):
-        for msg in self.store:
-            if msg.unique_id() == msg_id:
-                self.store_del(msg, dropped)
-                return
+    def store_del_by_id(self, handle: int, dropped: bool = False):
+        msg = self.store.get(handle)
+        if msg is not None:
+            self.store_del(msg, dropped)
 
     def store_cleanup(self):
-        # [self.store_del(msg)
-        # for msg in self.store if msg.is_expired(self.netsim.env.now)]
-
-        for msg in self.store:
-            if msg.is_expired(self.netsim.env.now):
-                # self.log("removing expired msg %s" % msg.id)
-                self.store_del(msg, dropped=True)
+        """drops the expired messages and forgets them, taking O(log n) per expired message"""
+        for msg in self.store.expired(self.netsim.env.now):
+            # self.log("removing expired msg %s" % msg.id)
+            self.store_del(msg, dropped=True)
+        self.history.prune(self.netsim.env.now)
 
     def make_room_for(self, msg: pons.Message):
         if msg.size < self.capacity:
             # self.log("making room for msg %s" % msg.id)
-            self.store.sort(key=lambda m: (m.size, m.created))
-            while self.used + msg.size > self.capacity:
-                # self.log("removing msg %s" % self.store[0].id)
-                self.store_del(self.store[0], dropped=True)
+            while not self.store.fits(msg.size):
+                victim = self.store.victim()
+                if victim is None:
+                    break
+                # self.log("removing msg %s" % victim.id)
+                self.store_del(victim, dropped=True)
 
     def start(self, netsim: pons.NetSim, my_id: int):
         self.netsim = netsim
@@ -125,7 +145,14 @@ class Router(object):
         for app in self.apps:
             # self.log("starting app %s" % app)
             app.start(netsim, my_id)
-        self.env.process(self.scan())
+        self.last_peer_found = self.netsim.env.now
+        self.netsim.neighbor_service.subscribe(self.my_id, self._on_links_changed)
+        node = self.netsim.nodes[self.my_id]
+        if len(node.net) == 0 or any(
+            net.contact_engine is None for net in node.net.values()
+        ):
+            # only poll if some peers are not reported by a contact engine
+            self.env.process(self.scan())
 
     def scan(self):
         self.last_peer_found = self.netsim.env.now
@@ -149,19 +176,16 @@ class Router(object):
                 )
             else:
                 # assume some kind of peer discovery mechanism
-                self.netsim.nodes[self.my_id].calc_neighbors(
-                    self.netsim.env.now, self.netsim.nodes.values()
-                )
-
                 old_peers = copy(self.peers)
-                peers = set()
-                for net in self.netsim.nodes[self.my_id].neighbors.values():
-                    peers.update(net)
-                self.peers = list(peers)
+                self.peers = self.netsim.neighbor_service.discover(
+                    self.my_id, self.netsim.env.now
+                )
                 # self.peers = copy(self.netsim.nodes[self.my_id].neighbors)
 
                 new_peers = [p for p in self.peers if p not in old_peers]
 
+                if len(new_peers) > 0:
+                    self.store_cleanup()
                 for peer in new_peers:
                     self.on_peer_discovered(peer)
 
@@ -183,19 +207,56 @@ class Router(object):
 
             yield self.env.timeout(self.scan_interval)
 
-    def _on_tx_failed(self, msg_id: str, remote_id: int):
+    def _on_links_changed(self, simtime: float, links_up, links_down):
+        """Called with the links of this node published by event-driven neighbor discovery."""
+        node = self.netsim.nodes[self.my_id]
+        for _, _, peer_id in links_down:
+            # the peer may still be reachable on another network
+            if not any(peer_id in peers for peers in node.neighbors.values()):
+                self._on_link_down(peer_id)
+        for _, _, peer_id in links_up:
+            self._on_link_up(peer_id)
+
+    def _on_link_up(self, peer_id: int):
+        """Called by event-driven neighbor discovery when a link to a peer comes up."""
+        if peer_id in self.peers:
+            return
+        if len(self.peers) == 0:
+            diff = self.netsim.env.now - self.last_peer_found
+            event_log(
+                self.netsim.env.now,
+                "PEERS",
+                {
+                    "event": "NO_PEERS_PERIOD",
+                    "id": self.my_id,
+                    "duration": diff,
+                },
+            )
+        self.peers.append(peer_id)
+        self.store_cleanup()
+        self.on_peer_discovered(peer_id)
+
+    def _on_link_down(self, peer_id: int):
+        """Called by event-driven neighbor discovery when the last link to a peer goes down."""
+        if peer_id not in self.peers:
+            return
+        self.peers.remove(peer_id)
+        if len(self.peers) == 0:
+            self.last_peer_found = self.netsim.env.now
+
+    def _on_tx_failed(self, handle: int, remote_id: int):
         self.stats["aborted"] += 1
         self.netsim.routing_stats["aborted"] += 1
-        self.forget(remote_id, msg_id)
-        self.on_tx_failed(msg_id, remote_id)
+        self.forget(remote_id, handle)
+        self.on_tx_failed(handle, remote_id)
 
-    def on_tx_failed(self, msg_id: str, remote_id: int):
+    def on_tx_failed(self, handle: int, remote_id: int):
         pass
 
-    def _on_tx_succeeded(self, msg_id: str, remote_id: int):
-        self.on_tx_succeeded(msg_id, remote_id)
+    def _on_tx_succeeded(self, handle: int, remote_id: int):
+        self.on_tx_succeeded(handle, remote_id)
 
-    def on_tx_succeeded(self, msg_id: str, remote_id: int):
+    def on_tx_succeeded(self, handle: int, remote_id: int):
         pass
 
     def on_scan_received(self, msg: pons.Message, remote_id: int):
@@ -204,6 +265,7 @@ class Router(object):
         if msg.id == "HELLO" and remote_id not in self.peers:
             self.peers.append(remote_id)
             # self.log("NEW PEER: %d (%s)" % (remote_id, self.peers))
+            self.store_cleanup()
             self.on_peer_discovered(remote_id)
         # elif remote_id in self.peers:
         # self.log("DUP PEER: %d" % remote_id)
@@ -211,6 +273,10 @@ class Router(object):
     def on_peer_discovered(self, peer_id):
         self.log("peer discovered: %d" % peer_id)
 
+    def on_summary_received(self, summary, remote_id: int):
+        """called with the summary vector a peer sent, a set of handles or a BloomFilter"""
+        pass
+
     def _on_msg_received(self, msg: pons.Message, remote_id: int):
         event_log(
             self.env.now,
@@ -221,15 +287,21 @@ class Router(object):
                 "from": remote_id,
                 "src": msg.src,
                 "dst": msg.dst,
-                "msg": msg.unique_id(),
+                "msg": msg,
             },
         )
         self.stats["rx"] += 1
         # self.log("msg received: %s from %d" % (msg, remote_id))
         self.netsim.routing_stats["relayed"] += 1
+        if msg.is_expired(self.env.now):
+            # late copies are ignored, their history entry may already be pruned,
+            # "dropped" only counts messages leaving the store
+            self.stats["expired_on_arrival"] += 1
+            self.netsim.routing_stats["expired_on_arrival"] += 1
+            return
         was_known = self.is_msg_known(msg)
         if not was_known:
-            self.remember(remote_id, msg.unique_id())
+            self.remember(remote_id, msg)
             msg.hops += 1
             if msg.dst == self.my_id:
                 # self.log("msg (%s) arrived on %s" % (msg.id, self.my_id))
@@ -250,7 +322,7 @@ class Router(object):
                             "event": "DELIVERED",
                             "src": msg.src,
                             "dst": msg.dst,
-                            "msg": msg.unique_id(),
+                            "msg": msg,
                         },
                     )
                 else:
@@ -261,7 +333,7 @@ class Router(object):
                             "event": "APP_NOT_FOUND",
                             "src": msg.src,
                             "dst": msg.dst,
-                            "msg": msg.unique_id(),
+                            "msg": msg,
                         },
                     )
         else:
@@ -272,27 +344,28 @@ class Router(object):
     def on_msg_received(self, msg: pons.Message, remote_id: int, was_known: bool):
         self.log("msg received: %s from %d" % (msg, remote_id))
 
-    def remember(self, peer_id, msg_id: str):
-        if isinstance(msg_id, pons.Message):
-            msg_id = msg_id.unique_id()
-
-        if msg_id not in self.history:
-            self.history[msg_id] = set()
-
-        self.history[msg_id].add(peer_id)
-
-    def forget(self, peer_id, msg_id: str):
-        if isinstance(msg_id, pons.Message):
-            msg_id = msg_id.unique_id()
-
-        if msg_id in self.history:
-            self.history[msg_id].remove(peer_id)
+    def remember(self, peer_id, msg):
+        """
+        @param msg: the message or its handle, pass the message so its entry can be pruned once expired
+        """
+        self.history.add(msg, peer_id)
+
+    def forget(self, peer_id, msg):
+        self.history.discard(msg, peer_id)
+
+    def get_summary_vector(self, bloom_fp_rate: float = None):
+        """
+        returns the handles of the known and stored messages, exchanged with peers at the start of a contact
+        @param bloom_fp_rate: if set, a BloomFilter with this false positive rate is returned instead of a set
+        """
+        handles = set(self.history)
+        handles.update(msg.handle for msg in self.store)
+        if bloom_fp_rate is None:
+            return handles
+        return BloomFilter.from_handles(handles, bloom_fp_rate)
 
     def is_msg_known(self, msg: pons.Message):
-        return msg.unique_id() in self.history
+        return msg in self.history
 
     def msg_already_spread(self, msg: pons.Message, remote_id):
-        if msg.unique_id() not in self.history:
-            return False
-
-        return remote_id in self.history[msg.unique_id()]
+        return self.history.has(msg, remote_id)
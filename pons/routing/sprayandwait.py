@@ -1,15 +1,21 @@
 from .router import Router
 
-import copy
 import math
 
 
 class SprayAndWaitRouter(Router):
     def __init__(
-        self, copies=7, binary=False, scan_interval=2.0, capacity=0, apps=None
+        self,
+        copies=7,
+        binary=False,
+        scan_interval=2.0,
+        capacity=0,
+        apps=None,
+        eviction=None,
     ):
-        super(SprayAndWaitRouter, self).__init__(scan_interval, capacity, apps)
-        self.store = []
+        super(SprayAndWaitRouter, self).__init__(
+            scan_interval, capacity, apps, eviction
+        )
         self.copies = copies
         self.binary = binary
 
@@ -31,7 +37,7 @@ class SprayAndWaitRouter(Router):
             # self.netsim.env.process(
             self.send(msg.dst, msg)
             # )
-            self.remember(msg.dst, msg.unique_id())
+            self.remember(msg.dst, msg)
             self.store_del(msg)
         elif msg.metadata["copies"] > 1:
             # self.log("broadcasting to peers ", self.peers)
@@ -41,7 +47,7 @@ class SprayAndWaitRouter(Router):
                     and msg.metadata["copies"] > 1
                 ):
                     # print("forwarding to peer")
-                    outmsg = copy.deepcopy(msg)
+                    outmsg = msg.copy()
                     self.netsim.routing_stats["started"] += 1
                     if self.binary:
                         outmsg.metadata["copies"] = math.ceil(
@@ -55,7 +61,7 @@ class SprayAndWaitRouter(Router):
                     # self.netsim.env.process(
                     self.send(peer, outmsg)
                     # )
-                    self.remember(peer, msg.unique_id())
+                    self.remember(peer, msg)
 
     def on_peer_discovered(self, peer_id):
         # self.log("peer discovered: %d" % peer_id)
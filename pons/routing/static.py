@@ -45,8 +45,9 @@ class StaticRouter(Router):
         capacity=0,
         shortest_paths_only=False,
         pick_random_next_hop=True,
+        eviction=None,
     ):
-        super(StaticRouter, self).__init__(scan_interval, capacity)
+        super(StaticRouter, self).__init__(scan_interval, capacity, eviction=eviction)
         if routes is None:
             routes = []
         self.routes = routes
@@ -116,7 +117,7 @@ class StaticRouter(Router):
             # self.netsim.env.process(
             self.send(msg.dst, msg)
             # )
-            self.remember(msg.dst, msg.unique_id())
+            self.remember(msg.dst, msg)
             # self.store_del(msg)
             return
 
@@ -150,16 +151,16 @@ class StaticRouter(Router):
             # self.netsim.env.process(
             self.send(next_hop, msg)
             # )
-            self.remember(next_hop, msg.unique_id())
+            self.remember(next_hop, msg)
             # only delete if tx was successful
             # self.store_del(msg)
 
-    def on_tx_succeeded(self, msg_id, remote_id):
-        # self.log("msg %s sent to %d" % (msg_id, remote_id))
-        self.store_del_by_id(msg_id)
+    def on_tx_succeeded(self, handle, remote_id):
+        # self.log("msg %d sent to %d" % (handle, remote_id))
+        self.store_del_by_id(handle)
 
-    def on_tx_failed(self, msg_id: str, remote_id: int):
-        # self.log("msg %s failed to send to %d" % (msg_id, remote_id))
+    def on_tx_failed(self, handle: int, remote_id: int):
+        # self.log("msg %d failed to send to %d" % (handle, remote_id))
         pass
 
     def on_peer_discovered(self, peer_id):
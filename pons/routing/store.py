@@ -0,0 +1,138 @@
+import heapq
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import pons
+from .eviction import EvictionPolicy, SmallestFirst
+
+
+class MessageStore(object):
+    """The buffer of a router.
+
+    Messages are indexed by their handle, so lookups and removals take constant
+    time, and are iterated in the order they were added. The store keeps track of
+    the bytes used by its messages and of their expiry times in a min-heap.
+    """
+
+    def __init__(self, capacity: int = 0, eviction: EvictionPolicy = None):
+        """
+        @param capacity: the capacity of the store in bytes, 0 for unlimited
+        @param eviction: the policy choosing the messages to drop when the store is full,
+        smallest first by default
+        """
+        self.capacity = capacity
+        if eviction is None:
+            eviction = SmallestFirst()
+        self.eviction = eviction
+        self.used = 0
+        self._msgs: Dict[int, pons.Message] = {}
+        # (created + ttl, insertion counter, handle), entries of removed messages
+        # are skipped when they reach the top
+        self._expiry: List[Tuple[float, int, int]] = []
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self._msgs)
+
+    def __contains__(self, msg: Union[int, "pons.Message"]) -> bool:
+        if isinstance(msg, pons.Message):
+            msg = msg.handle
+        return msg in self._msgs
+
+    def __iter__(self) -> Iterator["pons.Message"]:
+        """
+        iterates over a snapshot of the messages, so messages can be added and removed
+        while iterating, messages removed meanwhile are skipped
+        """
+        for handle, msg in list(self._msgs.items()):
+            if self._msgs.get(handle) is msg:
+                yield msg
+
+    def __str__(self):
+        return "MessageStore(%d messages, %d/%d bytes)" % (
+            len(self._msgs),
+            self.used,
+            self.capacity,
+        )
+
+    def get(self, handle: int) -> Optional["pons.Message"]:
+        """returns the message with the given handle or None"""
+        return self._msgs.get(handle)
+
+    def fits(self, size: int) -> bool:
+        """returns whether a message of the given size fits into the free space"""
+        return self.capacity <= 0 or self.used + size <= self.capacity
+
+    def add(self, msg: "pons.Message") -> None:
+        """
+        adds a message
+        a stored copy with the same handle is replaced by the new one, so the store
+        keeps a single copy per handle and accounts for its size once
+        """
+        handle = msg.handle
+        old = self._msgs.pop(handle, None)
+        if old is not None:
+            self.used -= old.size
+            self.eviction.removed(old)
+        self._msgs[handle] = msg
+        self.used += msg.size
+        self.eviction.added(msg)
+        if msg.ttl is not None:
+            if len(self._expiry) > 2 * len(self._msgs) + 16:
+                self._compact()
+            self._counter += 1
+            heapq.heappush(self._expiry, (msg.created + msg.ttl, self._counter, handle))
+
+    def remove(self, msg: Union[int, "pons.Message"]) -> Optional["pons.Message"]:
+        """removes a message by its handle and returns it or None if it is not stored"""
+        if isinstance(msg, pons.Message):
+            msg = msg.handle
+        old = self._msgs.pop(msg, None)
+        if old is not None:
+            self.used -= old.size
+            self.eviction.removed(old)
+        return old
+
+    def forwarded(self, msg: "pons.Message") -> None:
+        """notes that a stored message was sent to a peer"""
+        self.eviction.forwarded(msg)
+
+    def victim(self) -> Optional["pons.Message"]:
+        """returns the next message to drop according to the eviction policy or None"""
+        handle = self.eviction.victim()
+        if handle is None:
+            return None
+        return self._msgs[handle]
+
+    def expired(self, now: float) -> Iterator["pons.Message"]:
+        """
+        yields the stored messages that are expired at the given time, earliest first
+        the messages are not removed, but have to be removed before resuming the iteration
+        """
+        while len(self._expiry) > 0:
+            expires, _, handle = self._expiry[0]
+            if expires > now:
+                return
+            msg = self._msgs.get(handle)
+            if msg is None or msg.created + msg.ttl != expires:
+                # removed or replaced message
+                heapq.heappop(self._expiry)
+                continue
+            if not msg.is_expired(now):
+                return
+            heapq.heappop(self._expiry)
+            yield msg
+
+    def _compact(self):
+        self._expiry = [
+            entry
+            for entry in self._expiry
+            if entry[2] in self._msgs
+            and self._msgs[entry[2]].created + self._msgs[entry[2]].ttl == entry[0]
+        ]
+        heapq.heapify(self._expiry)
+
+    def clear(self) -> None:
+        self._msgs.clear()
+        self._expiry.clear()
+        self.eviction.clear()
+        self.used = 0
@@ -0,0 +1,69 @@
+import math
+from typing import Iterable, Union
+
+import pons
+
+# odd 64 bit constants of the two hash functions combined into k hashes
+_HASH1 = 0x9E3779B97F4A7C15
+_HASH2 = 0xC2B2AE3D27D4EB4F
+_MASK = (1 << 64) - 1
+# bytes of a message handle in an exact summary vector
+HANDLE_SIZE = 8
+
+
+class BloomFilter(object):
+    """A Bloom filter over message handles, a compact summary vector.
+
+    Lookups of added handles always succeed, other handles are reported as
+    contained with the false positive rate the filter was sized for.
+    """
+
+    def __init__(self, num_bits: int, num_hashes: int):
+        self.num_bits = max(num_bits, 8)
+        self.num_hashes = max(num_hashes, 1)
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    @classmethod
+    def for_size(cls, size: int, fp_rate: float = 0.01) -> "BloomFilter":
+        """returns a filter sized for the given number of handles and false positive rate"""
+        size = max(size, 1)
+        num_bits = math.ceil(-size * math.log(fp_rate) / (math.log(2) ** 2))
+        num_hashes = round(num_bits / size * math.log(2))
+        return cls(num_bits, num_hashes)
+
+    @classmethod
+    def from_handles(cls, handles, fp_rate: float = 0.01) -> "BloomFilter":
+        handles = list(handles)
+        bloom = cls.for_size(len(handles), fp_rate)
+        for handle in handles:
+            bloom.add(handle)
+        return bloom
+
+    def __len__(self) -> int:
+        """returns the size of the filter in bytes"""
+        return len(self._bits)
+
+    def _positions(self, handle: int) -> Iterable[int]:
+        h1 = ((handle + 1) * _HASH1) & _MASK
+        h2 = (((handle + 1) * _HASH2) & _MASK) | 1
+        for i in range(self.num_hashes):
+            yield ((h1 + i * h2) & _MASK) % self.num_bits
+
+    def add(self, handle: int) -> None:
+        for pos in self._positions(handle):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, msg: Union[int, "pons.Message"]) -> bool:
+        if isinstance(msg, pons.Message):
+            msg = msg.handle
+        for pos in self._positions(msg):
+            if not self._bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+def summary_size(summary: Union[set, BloomFilter]) -> int:
+    """returns the size of a summary vector in bytes, a set of handles or a Bloom filter"""
+    if isinstance(summary, BloomFilter):
+        return len(summary)
+    return HANDLE_SIZE * len(summary)
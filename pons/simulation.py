@@ -1,3 +1,4 @@
+import math
 import time
 from typing import List, Dict, Optional, Tuple
 from copy import deepcopy
@@ -11,6 +12,12 @@ from simpy.rt import RealtimeEnvironment
 
 import pons
 from pons.node import Node
+from pons.net.spatial import SpatialGrid, PositionTable, VectorizedIndex, VerletIndex
+from pons.net.neighbors import NeighborService
+from pons.net.contactengine import ContactEngine
+from pons.net.contactplan import ContactPlan, CoreContactPlan
+from pons.mobility.segments import Segment, SegmentMovement, segments_from_moves
+from pons.mobility.models import MobilityModel
 from pons.event_log import event_log
 
 aborted = False
@@ -62,11 +69,17 @@ class NetSim(object):
         realtime: bool = False,
         factor: float = 1,
         strict: bool = True,
+        start_time: float = 0,
     ):
+        # the simulation may start in the middle of its movement and contact traces,
+        # the duration remains the time the simulation ends
+        self.start_time = start_time
         if realtime:
-            self.env = RealtimeEnvironment(factor=factor, strict=strict)
+            self.env = RealtimeEnvironment(
+                initial_time=start_time, factor=factor, strict=strict
+            )
         else:
-            self.env = Environment()
+            self.env = Environment(initial_time=start_time)
 
         self.realtime = realtime
 
@@ -74,6 +87,11 @@ class NetSim(object):
         if "SIM_DURATION" in os.environ:
             print("ENV SIM_DURATION found! Using duration: ", os.getenv("SIM_DURATION"))
             self.duration = int(os.getenv("SIM_DURATION"))
+        if not 0 <= self.start_time < self.duration:
+            raise ValueError(
+                "start time %r must be at least 0 and before the duration %r"
+                % (self.start_time, self.duration)
+            )
 
         # convert list from Node to dict with id as key
         self.nodes = {n.id: n for n in nodes}
@@ -81,6 +99,16 @@ class NetSim(object):
         self.world = world_size
         if movements is None:
             movements = []
+        self.time_index = None
+        # segment movement and mobility models are evaluated lazily instead of replayed as moves
+        self.segment_movement = None
+        if isinstance(movements, (SegmentMovement, MobilityModel)):
+            self.segment_movement = movements
+            movements = []
+        elif hasattr(movements, "moves"):
+            # a movement object, e.g., a memory-mapped binary trace
+            self.time_index = getattr(movements, "time_index", None)
+            movements = movements.moves
         self.movements = movements
         if msggens is None:
             msggens = []
@@ -103,6 +131,9 @@ class NetSim(object):
             "removed": 0,
             "aborted": 0,
             "dups": 0,
+            "expired_on_arrival": 0,
+            "summaries": 0,
+            "summary_bytes": 0,
             "latency_avg": 0.0,
             "delivery_prob": 0.0,
             "hops_avg": 0.0,
@@ -123,7 +154,57 @@ class NetSim(object):
                 max(n.y for n in self.nodes.values()) + 50,
             )
 
-        self.mover = pons.OneMovementManager(self.env, self.nodes, self.movements)
+        # optional NumPy-backed storage of all node positions
+        self.positions = None
+        if config.get("numpy_positions", False):
+            self.positions = PositionTable(self.nodes.values())
+
+        self.network_ranges = {}
+        self.spatial_indexes = {}
+        self._setup_spatial_indexes()
+        self.contact_engine = None
+
+        # shared neighbor computation, used by the nodes as soon as they know the simulator
+        self.neighbor_service = NeighborService(self)
+        for n in self.nodes.values():
+            n.netsim = self
+
+        self.mover = pons.OneMovementManager(
+            self.env,
+            self.nodes,
+            self.movements,
+            positions=self.positions,
+            time_index=self.time_index,
+        )
+        self.lazy_mover = None
+        if self.segment_movement is not None:
+            self.lazy_mover = pons.SegmentMovementManager(
+                self.env, self.nodes, self.segment_movement
+            )
+
+    def _setup_spatial_indexes(self):
+        """Shares one spatial index between all node copies of a range-based network."""
+        ranges = {}
+        skins = {}
+        for n in self.nodes.values():
+            for net in n.net.values():
+                if net.contactplan is None and net.range > 0:
+                    ranges[net.name] = max(ranges.get(net.name, 0), net.range)
+                    skins[net.name] = max(skins.get(net.name, 0), net.skin)
+        self.network_ranges = ranges
+        self.spatial_indexes = {}
+        for name, r in ranges.items():
+            if skins[name] > 0:
+                self.spatial_indexes[name] = VerletIndex(r, skins[name])
+            elif self.positions is not None:
+                self.spatial_indexes[name] = VectorizedIndex(self.positions, r)
+            else:
+                self.spatial_indexes[name] = SpatialGrid(r)
+        for n in self.nodes.values():
+            for net in n.net.values():
+                if net.contactplan is None and net.name in self.spatial_indexes:
+                    net.spatial_index = self.spatial_indexes[net.name]
+                    net.spatial_index.add(n)
 
     def get_id_by_name(self, name):
         return self.name_to_id_map.get(name, -1)
@@ -149,10 +230,17 @@ class NetSim(object):
     def setup(self):
         print("initialize simulation: ", self.config)
 
+        if self.config.get("contact_engine", False):
+            self.start_contact_engine()
+
         if self.movements is not None and len(self.movements) > 0:
             print("-> start movement manager")
             self.mover.start()
 
+        if self.lazy_mover is not None:
+            print("-> start segment movement manager")
+            self.lazy_mover.start()
+
         if self.config is not None:
             if self.config.get("movement_logger", True):
                 self.env.process(self.start_movement_logger())
@@ -196,7 +284,25 @@ class NetSim(object):
 
         print(self.nodes)
         for n in self.nodes.values():
-            n.calc_neighbors(0, self.nodes.values())
+            n.calc_neighbors(self.env.now, self.nodes.values())
+
+    def start_contact_engine(self):
+        """Detects the contacts of range-based networks from the movement instead of polling."""
+        print("-> start contact engine")
+        if self.segment_movement is not None:
+            segments = {
+                n.id: self.segment_movement.node_segments(n.id, self.env.now)
+                for n in self.nodes.values()
+                if n.id in self.segment_movement
+            }
+        else:
+            segments = segments_from_moves(self.movements)
+        for n in self.nodes.values():
+            if n.id not in segments:
+                # nodes without movement stay at their current position
+                segments[n.id] = [Segment(self.env.now, math.inf, n.x, n.y, n.z)]
+        self.contact_engine = ContactEngine(self, segments)
+        self.contact_engine.start(self.network_ranges)
 
     def using_contactplan(self):
         for n in self.nodes.values():
@@ -219,18 +325,20 @@ class NetSim(object):
         if contactplan is None:
             print("No contact plan")
             return
-        initial_events = contactplan.at(0)
+        start = self.env.now
+        initial_events = contactplan.at(start)
         if len(initial_events) != 0:
             for e in initial_events:
-                if e.timespan[0] == 0:
-                    event_log(0, "LINK", {"event": "UP", "nodes": e.nodes})
+                if e.timespan[0] == start:
+                    event_log(start, "LINK", {"event": "UP", "nodes": e.nodes})
 
-        next_event = contactplan.next_event(0)
+        next_event = contactplan.next_event(start)
         if next_event is None:
             print("No events in contact plan")
             return
 
-        total = 0
+        total = start
+        next_event -= total
         while True:
             yield self.env.timeout(next_event)
             total += next_event
@@ -258,11 +366,12 @@ class NetSim(object):
 
         signal.signal(signal.SIGINT, signal_handler)
 
-        all_contactplans = set()
+        # unique contact plans by their contacts, nodes hold copies of the same plan
+        all_contactplans = {}
 
         for n in self.nodes.values():
             event_log(
-                0,
+                self.env.now,
                 "CONFIG",
                 {
                     "event": "START",
@@ -277,19 +386,25 @@ class NetSim(object):
             for net in n.net.values():
                 net.start(self)
                 if net.contactplan is not None and net.contactplan.contacts is not None:
-                    if isinstance(net.contactplan.contacts, list):
-                        all_contactplans.add(tuple(net.contactplan.contacts))
-                    else:
-                        all_contactplans.add(net.contactplan.contacts)
-
-        for cp in all_contactplans:
+                    if isinstance(net.contactplan, (ContactPlan, CoreContactPlan)):
+                        contacts = net.contactplan.contacts
+                        if isinstance(contacts, list):
+                            # copied plans have equal contact lists
+                            contacts = tuple(contacts)
+                        all_contactplans.setdefault(contacts, net.contactplan)
+                    elif not isinstance(net.contactplan.contacts, list):
+                        all_contactplans.setdefault(
+                            net.contactplan.contacts, net.contactplan.contacts
+                        )
+
+        for cp in all_contactplans.values():
             print(cp)
             self.env.process(self.contact_logger(cp))
         print("global number of unique contact plans: ", len(all_contactplans))
 
         start_real = time.time()
         last_real = start_real
-        last_sim = 0.0
+        last_sim = self.env.now
 
         if self.using_contactplan():
             contacts = set()
@@ -310,7 +425,7 @@ class NetSim(object):
             print("global number of unique contacts: ", len(contacts), contacts)
             for c in contacts:
                 event_log(
-                    0,
+                    self.env.now,
                     "LINK",
                     {
                         "event": "SET",
@@ -349,8 +464,8 @@ class NetSim(object):
                 last_real = now_real
                 last_sim = now_sim
             printProgressBar(
-                now_sim,
-                self.duration,
+                now_sim - self.start_time,
+                self.duration - self.start_time,
                 prefix="Progress:",
                 suffix="Complete",
                 length=50,
@@ -362,7 +477,7 @@ class NetSim(object):
         now_sim = self.env.now
 
         if diff > 0:
-            rate = (now_sim) / diff
+            rate = (now_sim - self.start_time) / diff
         else:
             rate = 0.0
 
@@ -372,7 +487,7 @@ class NetSim(object):
             print("\nsimulation finished")
         print(
             "simulated %d seconds in %.02f seconds (%.2f x real time)"
-            % (now_sim, diff, rate)
+            % (now_sim - self.start_time, diff, rate)
         )
         print("real: %f, sim: %d rate: %.02f steps/s" % (diff, now_sim, rate))
 
@@ -0,0 +1,163 @@
+import heapq
+from bisect import bisect_right
+from typing import Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+T = TypeVar("T")
+
+
+class IntervalIndex(Generic[T]):
+    """A timeline of closed intervals [start, end] built once for fast time queries.
+
+    A cursor keeps the intervals active at the last queried time. Moving forward
+    in time only touches the intervals starting or ending in between, so a run
+    costs O(n log n) in total. The first query and jumps back in time place
+    the cursor directly by a binary search over the starts.
+
+    The timeline is never changed after it is built, so copies of an index
+    share it and only get their own cursor.
+    """
+
+    def __init__(
+        self,
+        starts: Sequence[float],
+        ends: Sequence[float],
+        items: Sequence[T],
+        boundaries: Optional[Sequence[float]] = None,
+        by_start: Optional[Sequence[int]] = None,
+    ):
+        """
+        @param boundaries: the sorted unique starts and ends of the intervals, the timeline
+        then uses the given columns without sorting them
+        @param by_start: the indexes of the intervals in the order of their starts,
+        given with boundaries unless the intervals are already in this order
+        """
+        self.ends = ends
+        self.items = items
+        if boundaries is not None:
+            self.by_start = by_start
+            if by_start is None:
+                # the intervals are already in the order of their starts
+                self.starts = starts
+            elif np is not None and isinstance(starts, np.ndarray):
+                self.starts = starts[by_start]
+            else:
+                self.starts = [starts[i] for i in by_start]
+            self.boundaries = boundaries
+        elif np is not None and isinstance(starts, np.ndarray):
+            # sort the columns of large plans without creating Python objects
+            self.by_start = np.argsort(starts, kind="stable")
+            self.starts = starts[self.by_start]
+            self.boundaries = np.unique(np.concatenate((starts, ends)))
+        else:
+            self.by_start = sorted(range(len(starts)), key=starts.__getitem__)
+            self.starts = [starts[i] for i in self.by_start]
+            boundaries = set(starts)
+            boundaries.update(ends)
+            self.boundaries = sorted(boundaries)
+        self.reset()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __str__(self):
+        return "IntervalIndex(#intervals=%d, time=%r, #active=%d)" % (
+            len(self.items),
+            self.time,
+            len(self.active),
+        )
+
+    def __deepcopy__(self, memo):
+        copy = self.__class__.__new__(self.__class__)
+        copy.__dict__.update(self.__dict__)
+        copy.ending = list(self.ending)
+        copy.active = dict(self.active)
+        memo[id(self)] = copy
+        return copy
+
+    def reset(self):
+        """Moves the cursor back before the first interval."""
+        self.time = None
+        self.next_start = 0
+        # (end, index) of all active intervals
+        self.ending: List[Tuple[float, int]] = []
+        self.active: Dict[int, T] = {}
+
+    def advance(self, time: float) -> Tuple[List[int], List[int]]:
+        """
+        moves the cursor to the given time and returns the indexes of the intervals
+        that became active and the ones that are no longer active
+        """
+        if self.time is None or time < self.time:
+            return self.seek(time), []
+        self.time = time
+        left = []
+        while len(self.ending) > 0 and self.ending[0][0] < time:
+            _, i = heapq.heappop(self.ending)
+            del self.active[i]
+            left.append(i)
+        entered = []
+        while (
+            self.next_start < len(self.starts) and self.starts[self.next_start] <= time
+        ):
+            i = self.next_start
+            if self.by_start is not None:
+                i = int(self.by_start[i])
+            self.next_start += 1
+            end = self.ends[i]
+            if end >= time:
+                heapq.heappush(self.ending, (end, i))
+                self.active[i] = self.items[i]
+                entered.append(i)
+        return entered, left
+
+    def seek(self, time: float) -> List[int]:
+        """
+        moves the cursor directly to the given time without passing the times
+        in between and returns the indexes of the active intervals
+        """
+        self.reset()
+        self.time = time
+        if np is not None and isinstance(self.starts, np.ndarray):
+            self.next_start = int(np.searchsorted(self.starts, time, side="right"))
+            if self.by_start is None:
+                ends = np.asarray(self.ends[: self.next_start])
+                active = np.flatnonzero(ends >= time)
+                ends = ends[active]
+            else:
+                started = self.by_start[: self.next_start]
+                ends = self.ends[started]
+                keep = ends >= time
+                active = started[keep]
+                ends = ends[keep]
+            active = active.tolist()
+            ends = ends.tolist()
+        else:
+            self.next_start = bisect_right(self.starts, time)
+            started = self.by_start
+            if started is None:
+                started = range(len(self.starts))
+            active = [i for i in started[: self.next_start] if self.ends[i] >= time]
+            ends = [self.ends[i] for i in active]
+        self.ending = list(zip(ends, active))
+        heapq.heapify(self.ending)
+        self.active = {i: self.items[i] for i in active}
+        return active
+
+    def at(self, time: float) -> List[T]:
+        """returns the items of all intervals containing the given time in their original order"""
+        self.advance(time)
+        return [self.active[i] for i in sorted(self.active)]
+
+    def next_event(self, time: float) -> Optional[float]:
+        """returns the first start or end of an interval after the given time"""
+        i = bisect_right(self.boundaries, time)
+        if i == len(self.boundaries):
+            return None
+        if np is not None and isinstance(self.boundaries, np.ndarray):
+            return self.boundaries[i].item()
+        return self.boundaries[i]
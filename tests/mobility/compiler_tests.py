@@ -0,0 +1,76 @@
+import math
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import pons
+from pons.mobility.compiler import compile_contact_plan
+
+
+class CompilerTests(unittest.TestCase):
+    """
+    tests for compiling movements into contact plans
+    """
+
+    def test_plan_matches_distances(self):
+        """
+        tests if the compiled plan has a contact exactly when the sampled nodes are within range
+        """
+        random.seed(42)
+        moves = pons.generate_randomwaypoint_movement(300, 10, 200, 200, max_pause=20)
+        plan = compile_contact_plan(moves, 50, use_cache=False)
+        positions = {}
+        for i, (time, node_id, x, y, z) in enumerate(moves):
+            if time == moves[-1][0]:
+                # the plan ends with the last sample
+                break
+            positions[node_id] = (x, y)
+            if i + 1 < len(moves) and moves[i + 1][0] == time:
+                # check once all nodes have moved
+                continue
+            for a in range(10):
+                for b in range(a + 1, 10):
+                    dist = math.dist(positions[a], positions[b])
+                    # skip samples right at the range border
+                    if abs(dist - 50) < 1e-6:
+                        continue
+                    # contacts are checked at the sample times like the simulation does
+                    self.assertEqual(
+                        plan.has_contact(time, a, b), dist <= 50, (time, a, b)
+                    )
+
+    def test_cache(self):
+        """
+        tests if a compiled plan is read back from the cache unchanged
+        """
+        random.seed(1)
+        moves = pons.generate_randomwaypoint_movement(200, 5, 100, 100)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            plan = compile_contact_plan(moves, 30, bw=1000, cache_dir=cache_dir)
+            cached = compile_contact_plan(moves, 30, bw=1000, cache_dir=cache_dir)
+            self.assertGreater(len(plan.contacts), 0)
+            self.assertEqual(plan, cached)
+            other = compile_contact_plan(moves, 40, bw=1000, cache_dir=cache_dir)
+            self.assertNotEqual(plan, other)
+
+    def test_no_cache_by_default(self):
+        """
+        tests if plans are only cached when a cache directory is set
+        """
+        random.seed(2)
+        moves = pons.generate_randomwaypoint_movement(100, 4, 100, 100)
+        with tempfile.TemporaryDirectory() as home:
+            with mock.patch.dict(os.environ, {"HOME": home}):
+                os.environ.pop("PONS_CACHE_DIR", None)
+                compile_contact_plan(moves, 30)
+                self.assertEqual(os.listdir(home), [])
+                cache_dir = os.path.join(home, "cache")
+                os.environ["PONS_CACHE_DIR"] = cache_dir
+                compile_contact_plan(moves, 30)
+                self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import itertools
+import unittest
+
+import pons
+from pons.mobility import GaussMarkov, ManhattanGrid, RandomWalk, RandomWaypoint
+
+
+class MobilityModelTests(unittest.TestCase):
+    """
+    tests for mobility models generating segments on the fly
+    """
+
+    WIDTH = 500
+    HEIGHT = 300
+
+    def _models(self):
+        return [
+            RandomWaypoint(self.WIDTH, self.HEIGHT, max_pause=30, seed=1),
+            RandomWalk(self.WIDTH, self.HEIGHT, seed=1),
+            GaussMarkov(self.WIDTH, self.HEIGHT, mean_speed=10, seed=1),
+            ManhattanGrid(self.WIDTH, self.HEIGHT, block_size=50, seed=1),
+        ]
+
+    def test_segments_are_continuous(self):
+        """
+        tests if the generated segments follow each other, stay in the world and are reproducible
+        """
+        for model in self._models():
+            segments = list(
+                itertools.takewhile(lambda s: s.start < 3600, model.node_segments(4))
+            )
+            self.assertGreater(len(segments), 10)
+            self.assertEqual(segments[0].start, 0.0)
+            for a, b in zip(segments, segments[1:]):
+                x, y, _ = a.position_at(a.end)
+                self.assertAlmostEqual(a.end, b.start)
+                self.assertAlmostEqual(x, b.x)
+                self.assertAlmostEqual(y, b.y)
+                self.assertTrue(-1e-9 <= x <= self.WIDTH + 1e-9)
+                self.assertTrue(-1e-9 <= y <= self.HEIGHT + 1e-9)
+            again = itertools.takewhile(
+                lambda s: s.start < 3600, model.node_segments(4)
+            )
+            self.assertEqual(list(again), segments)
+
+    def test_netsim_with_model(self):
+        """
+        tests if the nodes of a simulation are moved by a model
+        """
+        for model in self._models():
+            net = pons.NetworkSettings("WIFI", range=50)
+            nodes = pons.generate_nodes(
+                10, net=[net], router=pons.routing.EpidemicRouter()
+            )
+            netsim = pons.NetSim(
+                600,
+                nodes,
+                world_size=(self.WIDTH, self.HEIGHT),
+                movements=model,
+                config={"movement_logger": False, "peers_logger": False},
+                start_time=100,
+            )
+            netsim.setup()
+            netsim.run()
+            now = netsim.neighbor_service.time
+            for n in nodes:
+                x, y, _ = model.position_at(n.id, now)
+                self.assertAlmostEqual(n.x, x)
+                self.assertAlmostEqual(n.y, y)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+import os
+import random
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import pons
+import pons.mobility.trace
+from pons.mobility.movement import moves_to_array
+from pons.mobility.trace import convert_one_file, load_trace, save_trace
+
+
+class MovementManagerTests(unittest.TestCase):
+    """
+    tests for applying movements to the nodes
+    """
+
+    def _run(self, moves, config, start_time=0):
+        random.seed(0)
+        net = pons.NetworkSettings("WIFI", range=40)
+        nodes = pons.generate_nodes(8, net=[net], router=pons.routing.EpidemicRouter())
+        config = dict(config, movement_logger=False, peers_logger=False)
+        netsim = pons.NetSim(
+            200,
+            nodes,
+            world_size=(200, 200),
+            movements=moves,
+            config=config,
+            start_time=start_time,
+        )
+        netsim.setup()
+        positions = []
+        neighbors = []
+
+        def sample():
+            while True:
+                yield netsim.env.timeout(10)
+                positions.append([(n.x, n.y, n.z) for n in nodes])
+                neighbors.append([list(n.neighbors["WIFI"]) for n in nodes])
+
+        netsim.env.process(sample())
+        netsim.run()
+        return positions, neighbors, netsim.routing_stats
+
+    @unittest.skipUnless(np, "numpy required")
+    def test_array_matches_list(self):
+        """
+        tests if a structured move array moves the nodes like the list of moves
+        """
+        random.seed(42)
+        moves = pons.generate_randomwaypoint_movement(200, 8, 200, 200, max_pause=20)
+        expected = self._run(moves, {})
+        self.assertEqual(self._run(moves_to_array(moves), {}), expected)
+        self.assertEqual(
+            self._run(moves_to_array(moves), {"numpy_positions": True}), expected
+        )
+
+    @unittest.skipUnless(np, "numpy required")
+    def test_start_time(self):
+        """
+        tests if a simulation starting in the middle of a trace places the nodes
+        like a simulation replaying the trace from the beginning
+        """
+        random.seed(5)
+        moves = pons.generate_randomwaypoint_movement(200, 8, 200, 200, max_pause=20)
+        positions, neighbors, _ = self._run(moves, {})
+        expected = (positions[-10:], neighbors[-10:])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "trace.npy")
+            save_trace(filename, moves, duration=200, num_nodes=8)
+            for movement in [moves, moves_to_array(moves), load_trace(filename)]:
+                positions, neighbors, _ = self._run(movement, {}, start_time=100)
+                self.assertEqual((positions, neighbors), expected)
+
+    def test_invalid_start_time(self):
+        """
+        tests if a simulation only starts before its end
+        """
+        nodes = pons.generate_nodes(2)
+        for start_time in [-1, 200, 300]:
+            with self.assertRaises(ValueError):
+                pons.NetSim(200, nodes, world_size=(200, 200), start_time=start_time)
+
+    @unittest.skipUnless(np, "numpy required")
+    def test_binary_trace(self):
+        """
+        tests if a memory-mapped binary trace moves the nodes like the list of moves
+        """
+        random.seed(7)
+        moves = pons.generate_randomwaypoint_movement(200, 8, 200, 200, max_pause=20)
+        expected = self._run(moves, {})
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "trace.npy")
+            save_trace(filename, moves, width=200, height=200)
+            trace = load_trace(filename)
+            self.assertEqual(trace.num_nodes, 8)
+            self.assertEqual(len(trace.moves), len(moves))
+            self.assertEqual(self._run(trace, {}), expected)
+
+    @unittest.skipUnless(np, "numpy required")
+    def test_convert_one_file(self):
+        """
+        tests if a converted ONE file contains the same moves as the parsed file
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source = os.path.join(tmp_dir, "trace.one")
+            with open(source, "w") as f:
+                f.write("0.0 20.0 0.0 100.0 0.0 50.0\n")
+                for t in range(20):
+                    for node in range(3):
+                        f.write("%d.0 %d %f %f\n" % (t, node, t * node, 50 - t))
+            filename = os.path.join(tmp_dir, "trace.npy")
+            convert_one_file(source, filename)
+            trace = load_trace(filename)
+            movement = pons.OneMovement.from_file(source)
+        self.assertEqual(
+            (trace.duration, trace.num_nodes, trace.width, trace.height),
+            (20.0, 3, 100.0, 50.0),
+        )
+        self.assertEqual([tuple(m) for m in trace.moves.tolist()], movement.moves)
+        times, offsets = trace.time_index
+        self.assertEqual(times.tolist(), [float(t) for t in range(20)])
+        self.assertEqual(offsets.tolist(), list(range(0, 61, 3)))
+
+    @unittest.skipUnless(np, "numpy required")
+    def test_convert_unsorted_one_file(self):
+        """
+        tests if converting a ONE file with moves out of time order fails
+        """
+        # moves going back in time inside a chunk and across chunks
+        for times in [[0, 1, 3, 2, 4, 5], [0, 1, 2, 1, 4, 5]]:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                source = os.path.join(tmp_dir, "trace.one")
+                with open(source, "w") as f:
+                    f.write("0.0 5.0 0.0 100.0 0.0 50.0\n")
+                    for t in times:
+                        f.write("%d.0 0 %f 10.0\n" % (t, t * 2))
+                filename = os.path.join(tmp_dir, "trace.npy")
+                with self.assertRaises(ValueError):
+                    convert_one_file(source, filename)
+                chunk_size = pons.mobility.trace.CONVERT_CHUNK_SIZE
+                pons.mobility.trace.CONVERT_CHUNK_SIZE = 3
+                try:
+                    with self.assertRaises(ValueError):
+                        convert_one_file(source, filename)
+                finally:
+                    pons.mobility.trace.CONVERT_CHUNK_SIZE = chunk_size
+
+    @unittest.skipUnless(np, "numpy required")
+    def test_randomwaypoint_numpy(self):
+        """
+        tests if the vectorized generator is seeded and its samples lie on its segments
+        """
+        movement = pons.generate_randomwaypoint_numpy(600, 6, 300, 200, seed=7)
+        moves = pons.generate_randomwaypoint_numpy(
+            600, 6, 300, 200, seed=7, output="array"
+        )
+        again = pons.generate_randomwaypoint_numpy(
+            600, 6, 300, 200, seed=7, output="array"
+        )
+        self.assertEqual(moves.tolist(), again.tolist())
+        self.assertEqual(sorted(moves.tolist()), moves.tolist())
+        for time, node_id, x, y, _ in moves.tolist():
+            self.assertTrue(0 <= x <= 300 and 0 <= y <= 200)
+            pos = movement.position_at(node_id, time)
+            self.assertAlmostEqual(pos[0], x)
+            self.assertAlmostEqual(pos[1], y)
+        for segments in movement.segments.values():
+            self.assertEqual(segments[0].start, 0.0)
+            for a, b in zip(segments, segments[1:]):
+                self.assertEqual(a.end, b.start)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import math
+import os
+import random
+import tempfile
+import unittest
+
+import pons
+from pons.mobility.segments import (
+    Segment,
+    contact_windows,
+    segments_from_moves,
+    slab_contact_windows,
+    SegmentCursor,
+)
+
+
+class SegmentTests(unittest.TestCase):
+    """
+    tests for segment based movement and exact contact windows
+    """
+
+    def test_merge_samples(self):
+        """
+        tests if samples with the same velocity are merged into one segment
+        """
+        moves = [(float(t), 0, 2.0 * t, 0.0, 0.0) for t in range(11)]
+        moves += [(11.0, 0, 20.0, 5.0, 0.0)]
+        segments = segments_from_moves(moves)[0]
+        self.assertEqual(len(segments), 3)
+        self.assertEqual((segments[0].start, segments[0].end), (0.0, 10.0))
+        self.assertEqual(segments[0].vx, 2.0)
+        self.assertEqual(segments[-1].end, math.inf)
+
+    def test_crossing_nodes(self):
+        """
+        tests if the window of two nodes passing each other is solved exactly
+        """
+        # node a moves from (0, 0) to (100, 0), node b stands at (50, 30)
+        a = [Segment(0, 100, 0, 0, 0, 1, 0, 0)]
+        b = [Segment(0, math.inf, 50, 30, 0)]
+        windows = contact_windows(a, b, 50)
+        self.assertEqual(len(windows), 1)
+        # in range while |x - 50| <= 40
+        self.assertAlmostEqual(windows[0][0], 10)
+        self.assertAlmostEqual(windows[0][1], 90)
+
+    def test_slabs_match_pairwise_solution(self):
+        """
+        tests if the grid based slab computation finds the same windows as solving all pairs
+        """
+        random.seed(42)
+        moves = pons.generate_randomwaypoint_movement(600, 20, 300, 300, max_pause=20)
+        segments = segments_from_moves(moves)
+        expected = []
+        for a in segments:
+            for b in segments:
+                if a < b:
+                    for w in contact_windows(segments[a], segments[b], 50, 0, 600):
+                        expected.append((w[0], w[1], a, b))
+        expected.sort()
+
+        cursors = {n: SegmentCursor(s) for n, s in segments.items()}
+        found = []
+        for start in range(0, 600, 60):
+            pieces = {n: c.pieces(start, start + 60) for n, c in cursors.items()}
+            found += slab_contact_windows(pieces, 50, start, start + 60)
+        # join windows continuing over slab boundaries
+        joined = {}
+        for w_start, w_end, a, b in sorted(found):
+            windows = joined.setdefault((a, b), [])
+            if len(windows) > 0 and windows[-1][1] == w_start:
+                windows[-1] = (windows[-1][0], w_end)
+            else:
+                windows.append((w_start, w_end))
+        found = sorted((w[0], w[1], a, b) for (a, b), ws in joined.items() for w in ws)
+        self.assertEqual(len(found), len(expected))
+        for f, e in zip(found, expected):
+            self.assertEqual(f[2:], e[2:])
+            self.assertAlmostEqual(f[0], e[0])
+            self.assertAlmostEqual(f[1], e[1])
+
+    def test_contact_engine(self):
+        """
+        tests if the contact engine reports peers when nodes come into range
+        """
+        moves = [(float(t), 0, float(t), 0.0, 0.0) for t in range(101)]
+        moves = sorted(moves + [(0.0, 1, 100.0, 0.0, 0.0)])
+        net = pons.NetworkSettings("WIFI", range=30)
+        nodes = pons.generate_nodes(2, net=[net], router=pons.routing.EpidemicRouter())
+        found = []
+        nodes[1].router.on_peer_discovered = lambda peer: found.append(
+            (netsim.env.now, peer)
+        )
+        netsim = pons.NetSim(
+            100,
+            nodes,
+            world_size=(200, 200),
+            movements=moves,
+            config={
+                "contact_engine": True,
+                "movement_logger": False,
+                "peers_logger": False,
+            },
+        )
+        netsim.setup()
+        netsim.run()
+        self.assertEqual(len(found), 1)
+        self.assertAlmostEqual(found[0][0], 70)
+        self.assertEqual(found[0][1], 0)
+        self.assertEqual(nodes[0].neighbors["WIFI"], [1])
+
+    def test_randomwaypoint_segments(self):
+        """
+        tests if the segment generator moves the nodes like the sampled generator
+        """
+        random.seed(42)
+        moves = pons.generate_randomwaypoint_movement(600, 5, 500, 500, max_pause=30)
+        random.seed(42)
+        movement = pons.generate_randomwaypoint_segments(
+            600, 5, 500, 500, max_pause=30
+        )
+        self.assertEqual(movement.num_nodes, 5)
+        for time, node_id, x, y, _ in moves:
+            pos = movement.position_at(node_id, time)
+            self.assertAlmostEqual(pos[0], x)
+            self.assertAlmostEqual(pos[1], y)
+
+    def test_lazy_movement(self):
+        """
+        tests if nodes are placed on their segments when neighbors are discovered
+        """
+        a = [Segment(0, 100, 0, 0, 0, 1, 0, 0), Segment(100, math.inf, 100, 0, 0)]
+        b = [Segment(0, math.inf, 100, 0, 0)]
+        movement = pons.SegmentMovement({0: a, 1: b})
+        net = pons.NetworkSettings("WIFI", range=30)
+        nodes = pons.generate_nodes(2, net=[net], router=pons.routing.EpidemicRouter())
+        netsim = pons.NetSim(
+            100,
+            nodes,
+            world_size=(200, 200),
+            movements=movement,
+            config={"movement_logger": False, "peers_logger": False},
+        )
+        netsim.setup()
+        netsim.run()
+        self.assertAlmostEqual(nodes[0].x, netsim.neighbor_service.time)
+        self.assertEqual(nodes[0].neighbors["WIFI"], [1])
+
+    def test_ns2_segments(self):
+        """
+        tests if ns2 destinations are reached and replaced by later entries
+        """
+        content = "\n".join(
+            [
+                "$node_(0) set X_ 0.0",
+                "$node_(0) set Y_ 0.0",
+                '$ns_ at 10.0 "$node_(0) setdest 100.0 0.0 10.0"',
+                '$ns_ at 15.0 "$node_(0) setdest 50.0 50.0 5.0"',
+                '$ns_ at 100.0 "$node_(0) setdest 0.0 0.0 1.0"',
+                "",
+            ]
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ns2.txt")
+            with open(path, "w") as f:
+                f.write(content)
+            movement = pons.Ns2Movement.segments_from_file(path, end_time=50.0)
+        self.assertEqual(movement.position_at(0, 5.0), (0.0, 0.0, 0.0))
+        self.assertEqual(movement.position_at(0, 15.0), (50.0, 0.0, 0.0))
+        self.assertEqual(movement.position_at(0, 25.0), (50.0, 50.0, 0.0))
+        self.assertEqual(movement.position_at(0, 1000.0), (50.0, 50.0, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,291 @@
+import os
+import random
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import pons
+from pons.net import contactplan
+
+
+class CoreContactPlanTests(unittest.TestCase):
+    """
+    tests for looking up contacts in core contact plans
+    """
+
+    def _random_plan(self, seed, num_contacts=300):
+        random.seed(seed)
+        contacts = []
+        for _ in range(num_contacts):
+            start = random.randint(0, 1000)
+            end = start + random.randint(0, 50)
+            node1 = random.randint(0, 9)
+            node2 = random.randint(0, 9)
+            bw = random.choice([0, 1000, 100000])
+            loss = random.random()
+            contacts.append(
+                pons.CoreContact((start, end), (node1, node2), bw, loss, 10, 0)
+            )
+        return pons.CoreContactPlan(contacts=contacts)
+
+    def _expected_at(self, plan, time):
+        return [c for c in plan.contacts if c.timespan[0] <= time <= c.timespan[1]]
+
+    def _expected_next(self, plan, time):
+        nexts = [t for c in plan.contacts for t in c.timespan if t > time]
+        return min(nexts) if len(nexts) > 0 else None
+
+    def test_at_and_next_event(self):
+        """
+        tests if the indexed lookups match filtering all contacts
+        """
+        plan = self._random_plan(42)
+        time = 0
+        while time is not None:
+            self.assertEqual(plan.at(time), self._expected_at(plan, time))
+            self.assertEqual(plan.next_event(time), self._expected_next(plan, time))
+            time = plan.next_event(time)
+
+    def test_jump_back_in_time(self):
+        """
+        tests if lookups are still correct when time jumps back
+        """
+        plan = self._random_plan(7)
+        for time in [500, 100.5, 900, 900, 0, 1200]:
+            self.assertEqual(plan.at(time), self._expected_at(plan, time))
+
+    def test_pair_queries(self):
+        """
+        tests if the per pair lookups match scanning the active contacts
+        """
+        plan = self._random_plan(11)
+        for time in list(range(0, 1100, 13)) + [400, 20.5]:
+            active = self._expected_at(plan, time)
+            for node1 in range(10):
+                for node2 in range(10):
+                    found = [c for c in active if set(c.nodes) == {node1, node2}]
+                    self.assertEqual(
+                        plan.has_contact(time, node1, node2), len(found) > 0
+                    )
+                    expected_loss = found[0].loss if len(found) > 0 else 0.0
+                    self.assertEqual(
+                        plan.loss_for_contact(time, node1, node2), expected_loss
+                    )
+                    # the first active contact without bandwidth or of the pair decides
+                    first = [c for c in active if c.bw == 0 or c in found]
+                    if len(first) == 0:
+                        with self.assertRaises(Exception):
+                            plan.tx_time_for_contact(time, node1, node2, 100)
+                        continue
+                    if first[0].bw == 0:
+                        expected_tx_time = 0.000005 * 100
+                    else:
+                        expected_tx_time = 100 / first[0].bw + 0.01
+                    self.assertEqual(
+                        plan.tx_time_for_contact(time, node1, node2, 100),
+                        expected_tx_time,
+                    )
+
+    def test_csv_file(self):
+        """
+        tests if csv contact traces are rebased to the start time and sped up
+        """
+        lines = [
+            "# Simulation starting time: 2024-03-01 09:59:00",
+            "a,b,2024-03-01 10:00:20,2024-03-01T10:01:00,40",
+            "b,3,2024-03-01 10:00:00+02:00,2024-03-01 10:00:30,30",
+            "",
+            "a,3,March 1 2024 10:02:00,March 1 2024 10:03:00,60",
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "trace.csv")
+            with open(filename, "w") as f:
+                f.write("\n".join(lines) + "\n")
+            plan = pons.CoreContactPlan.from_csv_file(
+                filename,
+                mapping={"a": 1, "b": 2},
+                parse_header=True,
+                speedup=2,
+            )
+            with open(filename, "w") as f:
+                f.write("\n".join(lines[1:]) + "\n")
+            no_header = pons.CoreContactPlan.from_csv_file(
+                filename, mapping={"a": 1, "b": 2}
+            )
+        self.assertEqual(
+            [(c.timespan, c.nodes) for c in plan.contacts],
+            [((30, 45), (2, 3)), ((40, 60), (1, 2)), ((90, 120), (1, 3))],
+        )
+        self.assertEqual(no_header.contacts[0].timespan, (0, 30))
+
+    def test_csv_file_chunks(self):
+        """
+        tests if csv contact traces read in several chunks are sorted across the chunks
+        """
+        lines = [
+            "%d,%d,2024-03-01 10:00:%02d,2024-03-01 10:01:00,1" % (i, i + 1, 50 - i)
+            for i in range(7)
+        ]
+        chunk_size = contactplan.CSV_CHUNK_SIZE
+        contactplan.CSV_CHUNK_SIZE = 3
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                filename = os.path.join(tmp_dir, "trace.csv")
+                with open(filename, "w") as f:
+                    f.write("\n".join(lines) + "\n")
+                plan = pons.CoreContactPlan.from_csv_file(filename)
+        finally:
+            contactplan.CSV_CHUNK_SIZE = chunk_size
+        self.assertEqual(
+            [(c.timespan, c.nodes) for c in plan.contacts],
+            [((6 - i, 16), (i, i + 1)) for i in reversed(range(7))],
+        )
+
+    @unittest.skipUnless(np, "numpy required")
+    def test_binary_plan(self):
+        """
+        tests if a plan saved in the binary format answers the same queries
+        """
+        plan = self._random_plan(13)
+        plan.loop = True
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "plan.ccmb")
+            plan.save_binary(filename)
+            binary = pons.CoreContactPlan.from_binary(filename)
+            # the contacts keep their order
+            self.assertEqual(list(binary.contacts), plan.contacts)
+            self.assertEqual(binary, plan)
+            self.assertTrue(binary.loop)
+            self.assertEqual(binary.get_max_time(), plan.get_max_time())
+            self.assertEqual(sorted(binary.all_contacts()), sorted(plan.all_contacts()))
+            for time in range(0, 2000, 17):
+                self.assertEqual(binary.at(time), plan.at(time))
+                self.assertEqual(binary.next_event(time), plan.next_event(time))
+                self.assertEqual(
+                    binary.loss_for_contact(time, 1, 2),
+                    plan.loss_for_contact(time, 1, 2),
+                )
+
+    @unittest.skipUnless(np, "numpy required")
+    def test_binary_unsorted_plan(self):
+        """
+        tests if the contacts of a plan not sorted by start decide the links
+        of the binary plan in their original order
+        """
+        plan = self._random_plan(19, num_contacts=354)
+        self.assertNotEqual(
+            plan.contacts, sorted(plan.contacts, key=lambda c: c.timespan[0])
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "plan.ccmb")
+            plan.save_binary(filename)
+            binary = pons.CoreContactPlan.from_binary(filename)
+            self.assertEqual(binary, plan)
+            for time in list(range(0, 1100, 7)) + [300, 12.5]:
+                self.assertEqual(binary.at(time), plan.at(time))
+                for node1 in range(10):
+                    for node2 in range(node1, 10):
+                        self.assertEqual(
+                            binary.loss_for_contact(time, node1, node2),
+                            plan.loss_for_contact(time, node1, node2),
+                        )
+                        if not plan.has_contact(time, node1, node2):
+                            continue
+                        self.assertEqual(
+                            binary.tx_time_for_contact(time, node1, node2, 100),
+                            plan.tx_time_for_contact(time, node1, node2, 100),
+                        )
+
+    @unittest.skipUnless(np, "numpy required")
+    def test_binary_index_mapped(self):
+        """
+        tests if the timeline of a binary plan is memory-mapped instead of built again
+        """
+        plan = self._random_plan(17)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "plan.ccmb")
+            plan.save_binary(filename)
+            binary = pons.CoreContactPlan.from_binary(filename)
+            self.assertIsInstance(binary.index.by_start, np.memmap)
+            self.assertIsInstance(binary.index.boundaries, np.memmap)
+            self.assertIs(binary.index.by_start, binary.contacts.by_start)
+            for time in list(range(0, 1100, 13)) + [500, 20, 900]:
+                self.assertEqual(binary.at(time), self._expected_at(binary, time))
+                self.assertEqual(
+                    binary.next_event(time), self._expected_next(binary, time)
+                )
+
+    def test_loop(self):
+        """
+        tests if contacts repeat after the end of a looping plan
+        """
+        plan = self._random_plan(3)
+        plan.loop = True
+        max_time = plan.get_max_time()
+        for time in range(0, 3 * max_time, 7):
+            self.assertEqual(plan.at(time), self._expected_at(plan, time % max_time))
+        next_time = plan.next_event(max_time + 3)
+        self.assertEqual(next_time, self._expected_next(plan, 3) + max_time)
+
+
+class ContactPlanTests(unittest.TestCase):
+    """
+    tests for looking up entries in ION contact plans
+    """
+
+    def test_lookups_per_node(self):
+        """
+        tests if the indexed lookups match filtering all entries
+        """
+        random.seed(5)
+        entries = []
+        for _ in range(300):
+            start = float(random.randint(0, 500))
+            end = start + random.randint(0, 40)
+            kind = random.choice(["contact", "range"])
+            node1 = random.randint(0, 5)
+            node2 = random.randint(0, 5)
+            entries.append((kind, (start, end), node1, node2, 1000.0))
+        plan = pons.ContactPlan("random", entries)
+        for t in [0, 3, 3, 50.5, 20, 200, 499, 560]:
+            if t == 200:
+                plan.remove_past_entries(t)
+            active = [e for e in entries if e[1][0] <= t <= e[1][1]]
+            self.assertEqual(plan.get_entries(t), active)
+            self.assertEqual(plan.get_ranges(t), [e for e in active if e[0] == "range"])
+            for node in range(6):
+                self.assertEqual(
+                    plan.get_contacts_for_node(t, node),
+                    [e for e in active if e[0] == "contact" and node in (e[2], e[3])],
+                )
+
+    def test_contact_events(self):
+        """
+        tests if the contact entries are reported like the contacts of core contact plans
+        """
+        plan = pons.ContactPlan(
+            "simple",
+            [
+                ("contact", (0.0, 20.0), 0, 1, 1000.0),
+                ("range", (5.0, 50.0), 0, 1, 0.0),
+                ("contact", (10.0, 30.0), 1, 2, 1000.0),
+            ],
+        )
+        self.assertEqual(
+            plan.at(15.0),
+            [
+                pons.CoreContact((0.0, 20.0), (0, 1), 1000, 0.0, 0.0, 0.0),
+                pons.CoreContact((10.0, 30.0), (1, 2), 1000, 0.0, 0.0, 0.0),
+            ],
+        )
+        self.assertEqual(plan.next_event(0.0), 10.0)
+        self.assertEqual(plan.next_event(20.0), 30.0)
+        self.assertIsNone(plan.next_event(30.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
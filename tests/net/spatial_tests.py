@@ -0,0 +1,137 @@
+import random
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import pons
+from pons.net.spatial import SpatialGrid, VerletIndex
+
+
+class SpatialGridTests(unittest.TestCase):
+    """
+    tests for the spatial neighbor indexes
+    """
+
+    RANGE = 50
+    NUM_NODES = 200
+    WORLD_SIZE = 1000
+
+    def _random_nodes(self, seed):
+        random.seed(seed)
+        net = pons.NetworkSettings("WIFI", range=self.RANGE)
+        nodes = pons.generate_nodes(self.NUM_NODES, net=[net])
+        for n in nodes:
+            n.set_position(
+                random.random() * self.WORLD_SIZE,
+                random.random() * self.WORLD_SIZE,
+                0.0,
+            )
+        return nodes
+
+    def _brute_force_neighbors(self, node, nodes):
+        net = node.net["WIFI"]
+        return [
+            other.id
+            for other in nodes
+            if other.id != node.id and net.has_contact(0, node, other)
+        ]
+
+    def test_grid_matches_brute_force(self):
+        """
+        tests if the grid finds exactly the same neighbors as checking all pairs
+        """
+        nodes = self._random_nodes(42)
+        netsim = pons.NetSim(10, nodes, world_size=(self.WORLD_SIZE, self.WORLD_SIZE))
+        self.assertIn("WIFI", netsim.spatial_indexes)
+        for n in nodes:
+            n.calc_neighbors(0, nodes)
+            self.assertEqual(n.neighbors["WIFI"], self._brute_force_neighbors(n, nodes))
+
+    def test_grid_follows_movement(self):
+        """
+        tests if the grid is updated when nodes move
+        """
+        nodes = self._random_nodes(7)
+        pons.NetSim(10, nodes, world_size=(self.WORLD_SIZE, self.WORLD_SIZE))
+        for _ in range(5):
+            for n in nodes:
+                n.x = min(max(n.x + random.uniform(-80, 80), 0), self.WORLD_SIZE)
+                n.y = min(max(n.y + random.uniform(-80, 80), 0), self.WORLD_SIZE)
+            for n in nodes:
+                n.calc_neighbors(0, nodes)
+                self.assertEqual(
+                    n.neighbors["WIFI"], self._brute_force_neighbors(n, nodes)
+                )
+
+    @unittest.skipUnless(np, "numpy required")
+    def test_vectorized_matches_brute_force(self):
+        """
+        tests if the NumPy position table finds the same neighbors as checking all pairs
+        """
+        nodes = self._random_nodes(3)
+        netsim = pons.NetSim(
+            10,
+            nodes,
+            world_size=(self.WORLD_SIZE, self.WORLD_SIZE),
+            config={"numpy_positions": True},
+        )
+        self.assertIsNotNone(netsim.positions)
+        for _ in range(3):
+            for n in nodes:
+                n.x = min(max(n.x + random.uniform(-80, 80), 0), self.WORLD_SIZE)
+            for n in nodes:
+                self.assertEqual(
+                    netsim.positions.xyz[netsim.positions.rows[n.id]][0], n.x
+                )
+                n.calc_neighbors(0, nodes)
+                self.assertEqual(
+                    n.neighbors["WIFI"], self._brute_force_neighbors(n, nodes)
+                )
+
+    def test_verlet_lists_follow_movement(self):
+        """
+        tests if the Verlet lists find the same neighbors as checking all pairs
+        and are only rebuilt after nodes moved more than half the skin
+        """
+        random.seed(11)
+        net = pons.NetworkSettings("WIFI", range=self.RANGE, skin=20)
+        nodes = pons.generate_nodes(self.NUM_NODES, net=[net])
+        for n in nodes:
+            n.set_position(
+                random.random() * self.WORLD_SIZE, random.random() * self.WORLD_SIZE, 0
+            )
+        netsim = pons.NetSim(10, nodes, world_size=(self.WORLD_SIZE, self.WORLD_SIZE))
+        index = netsim.spatial_indexes["WIFI"]
+        self.assertIsInstance(index, VerletIndex)
+        for step in range(20):
+            for n in nodes:
+                n.set_position(
+                    n.x + random.uniform(-3, 3), n.y + random.uniform(-3, 3), 0
+                )
+            for n in nodes:
+                n.calc_neighbors(step, nodes)
+                self.assertEqual(
+                    n.neighbors["WIFI"], self._brute_force_neighbors(n, nodes)
+                )
+        self.assertLess(index.rebuilds, 20)
+
+    def test_candidates_are_in_surrounding_cells(self):
+        """
+        tests if only nodes of the surrounding cells are returned as candidates
+        """
+        nodes = pons.generate_nodes(3)
+        grid = SpatialGrid(10)
+        nodes[0].set_position(5, 5, 0)
+        nodes[1].set_position(25, 5, 0)
+        nodes[2].set_position(14, 14, 0)
+        for n in nodes:
+            grid.add(n)
+        self.assertEqual([n.id for n in grid.candidates(nodes[0])], [0, 2])
+        self.assertEqual([n.id for n in grid.candidates(nodes[2])], [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
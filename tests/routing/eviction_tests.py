@@ -0,0 +1,73 @@
+import random
+import unittest
+
+import pons
+from pons.routing import (
+    MessageStore,
+    SmallestFirst,
+    FIFO,
+    LargestFirst,
+    LRU,
+    MostForwardedFirst,
+    ShortestTTLFirst,
+)
+
+
+class EvictionPolicyTests(unittest.TestCase):
+    """
+    tests for the eviction policies of message stores
+    """
+
+    def _store(self, eviction, count=50):
+        random.seed(7)
+        store = MessageStore(eviction=eviction)
+        msgs = []
+        for i in range(count):
+            msg = pons.Message(
+                "M%d" % i,
+                0,
+                1,
+                random.randint(1, 5),
+                random.randint(0, 100),
+                ttl=random.randint(10, 1000),
+            )
+            store.add(msg)
+            msgs.append(msg)
+        return store, msgs
+
+    def _drain(self, store):
+        victims = []
+        while len(store) > 0:
+            victim = store.victim()
+            victims.append(victim)
+            store.remove(victim)
+        self.assertIsNone(store.victim())
+        return victims
+
+    def test_sorted_policies(self):
+        for eviction, key in [
+            (SmallestFirst(), lambda m: (m.size, m.created)),
+            (FIFO(), lambda m: 0),
+            (LargestFirst(), lambda m: (-m.size, m.created)),
+            (ShortestTTLFirst(), lambda m: m.created + m.ttl),
+        ]:
+            store, msgs = self._store(eviction)
+            for msg in msgs[::3]:
+                store.remove(msg)
+            remaining = [m for m in msgs if m in store]
+            self.assertEqual(self._drain(store), sorted(remaining, key=key))
+
+    def test_usage_policies(self):
+        store, msgs = self._store(LRU(), count=4)
+        store.forwarded(msgs[0])
+        store.forwarded(msgs[2])
+        self.assertEqual(self._drain(store), [msgs[1], msgs[3], msgs[0], msgs[2]])
+
+        store, msgs = self._store(MostForwardedFirst(), count=4)
+        for msg in [msgs[2], msgs[1], msgs[2]]:
+            store.forwarded(msg)
+        self.assertEqual(self._drain(store), [msgs[2], msgs[1], msgs[0], msgs[3]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+import pons
+from pons.routing import History
+
+
+class HistoryTests(unittest.TestCase):
+    """
+    tests for the delivery history of routers
+    """
+
+    def test_peers(self):
+        history = History()
+        msg = pons.Message("M1", 0, 1, 10, 0)
+        for peer in [3, 0, 70]:
+            history.add(msg, peer)
+        history.discard(msg, 3)
+        self.assertIn(msg, history)
+        self.assertTrue(history.has(msg, 70))
+        self.assertFalse(history.has(msg, 3))
+        self.assertFalse(history.has(msg, 1))
+        self.assertEqual(list(history.peers(msg)), [0, 70])
+
+    def test_prune(self):
+        history = History()
+        msgs = [pons.Message("M%d" % i, 0, 1, 10, 0, ttl=10 * i) for i in range(1, 4)]
+        for msg in msgs:
+            history.add(msg, 1)
+        history.add(msgs[0], 2)
+        history.add(42, 1)
+        self.assertEqual(history.prune(20), 1)
+        self.assertNotIn(msgs[0], history)
+        self.assertIn(msgs[1], history)
+        self.assertEqual(history.prune(1000), 2)
+        self.assertEqual(len(history), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
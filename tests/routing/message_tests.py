@@ -0,0 +1,26 @@
+import unittest
+
+import pons
+
+
+class MessageTests(unittest.TestCase):
+    """
+    tests for the copies of messages
+    """
+
+    def test_copy_shares_body(self):
+        msg = pons.Message("M1", 0, 1, 10, 0, content={"start": 0})
+        msg.metadata["copies"] = 4
+        clone = msg.copy()
+        clone.hops += 1
+        clone.metadata["copies"] = 2
+
+        self.assertEqual(clone.handle, msg.handle)
+        self.assertEqual(clone.unique_id(), msg.unique_id())
+        self.assertIs(clone.content, msg.content)
+        self.assertEqual(msg.hops, 0)
+        self.assertEqual(msg.metadata["copies"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
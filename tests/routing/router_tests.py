@@ -0,0 +1,119 @@
+import unittest
+
+import pons
+import pons.routing
+
+
+class RouterTests(unittest.TestCase):
+    """
+    tests for the message handling of routers
+    """
+
+    def _netsim(self, router, num_nodes=2):
+        net = pons.NetworkSettings("WIFI", range=100)
+        nodes = pons.generate_nodes(num_nodes, net=[net], router=router)
+        config = {"movement_logger": False, "peers_logger": False}
+        netsim = pons.NetSim(1000, nodes, world_size=(100, 100), config=config)
+        netsim.setup()
+        return netsim, nodes
+
+    def test_expired_copy_after_pruning(self):
+        netsim, nodes = self._netsim(pons.routing.EpidemicRouter())
+        router = nodes[1].router
+        relayed = pons.Message("M1", 0, 2, 10, 0, ttl=60)
+        delivered = pons.Message("M2", 0, 1, 10, 0, ttl=60)
+        router._on_msg_received(relayed.copy(), 0)
+        self.assertIn(relayed, router.store)
+
+        netsim.env.run(until=100)
+        router.store_cleanup()
+        self.assertNotIn(relayed, router.history)
+        self.assertNotIn(relayed, router.store)
+
+        router._on_msg_received(relayed.copy(), 0)
+        router._on_msg_received(delivered.copy(), 0)
+        self.assertNotIn(relayed, router.store)
+        self.assertNotIn(delivered, router.history)
+        self.assertEqual(netsim.routing_stats["delivered"], 0)
+        # only the copy leaving the store counts as dropped
+        self.assertEqual(netsim.routing_stats["dropped"], 1)
+        self.assertEqual(netsim.routing_stats["expired_on_arrival"], 2)
+
+    def test_published_link_changes(self):
+        netsim, nodes = self._netsim(pons.routing.EpidemicRouter(), num_nodes=3)
+        found = []
+        nodes[0].router.on_peer_discovered = found.append
+        netsim.neighbor_service.publish(0, [("WIFI", 0, 2)], [])
+        self.assertEqual(found, [2])
+        self.assertEqual(nodes[0].router.peers, [2])
+        self.assertEqual(nodes[1].router.peers, [])
+        netsim.neighbor_service.publish(0, [], [("WIFI", 0, 2)])
+        self.assertEqual(nodes[0].router.peers, [])
+
+    def _exchange(self, summary_vector):
+        netsim, nodes = self._netsim(
+            pons.routing.EpidemicRouter(summary_vector=summary_vector)
+        )
+        known = pons.Message("M1", 0, 2, 10, 0)
+        unknown = pons.Message("M2", 0, 2, 10, 0)
+        nodes[0].router.add(known)
+        nodes[0].router.add(unknown)
+        # node 1 got the first message from another node before
+        nodes[1].router._on_msg_received(known.copy(), 2)
+        netsim.env.run(until=10)
+        return netsim, nodes, known
+
+    def test_summary_vector(self):
+        for summary_vector in ("exact", "bloom"):
+            netsim, nodes, known = self._exchange(summary_vector)
+            # only the message the peer lacks is sent
+            self.assertEqual(netsim.routing_stats["started"], 1)
+            self.assertEqual(nodes[0].router.stats["tx"], 1)
+            self.assertEqual(nodes[1].router.stats["tx"], 0)
+            self.assertTrue(nodes[0].router.msg_already_spread(known, 1))
+            self.assertEqual(netsim.routing_stats["summaries"], 2)
+            self.assertGreater(netsim.routing_stats["summary_bytes"], 0)
+
+        netsim, _, _ = self._exchange(None)
+        self.assertEqual(netsim.routing_stats["started"], 3)
+        self.assertEqual(netsim.routing_stats["summaries"], 0)
+
+    def test_summary_vector_mixed_peers(self):
+        net = pons.NetworkSettings("WIFI", range=100)
+        summary_router = pons.routing.EpidemicRouter(summary_vector="exact")
+        nodes = pons.generate_nodes(1, net=[net], router=summary_router)
+        nodes += pons.generate_nodes(
+            1, offset=1, net=[net], router=pons.routing.EpidemicRouter()
+        )
+        config = {"movement_logger": False, "peers_logger": False}
+        netsim = pons.NetSim(1000, nodes, world_size=(100, 100), config=config)
+        netsim.setup()
+        first = pons.Message("M1", 0, 2, 10, 0)
+        second = pons.Message("M2", 1, 2, 10, 0)
+        nodes[0].router.add(first)
+        nodes[1].router.add(second)
+        netsim.env.run(until=summary_router.summary_timeout - 1)
+        # the router without summary vectors forwards right away and sends none
+        self.assertEqual(netsim.routing_stats["summaries"], 1)
+        self.assertIn(second, nodes[0].router.store)
+        self.assertNotIn(first, nodes[1].router.store)
+        # no summary vector arrives, so the other router falls back to its history
+        netsim.env.run(until=summary_router.summary_timeout + 5)
+        self.assertIn(first, nodes[1].router.store)
+
+    def test_summary_vector_timeout(self):
+        netsim, nodes = self._netsim(
+            pons.routing.EpidemicRouter(summary_vector="exact")
+        )
+        msg = pons.Message("M1", 0, 2, 10, 0)
+        nodes[0].router.add(msg)
+        # the summary vector of the peer gets lost
+        nodes[0].router.on_summary_received = lambda summary, remote_id: None
+        netsim.env.run(until=nodes[0].router.summary_timeout - 1)
+        self.assertNotIn(msg, nodes[1].router.store)
+        netsim.env.run(until=nodes[0].router.summary_timeout + 5)
+        self.assertIn(msg, nodes[1].router.store)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import copy
+import unittest
+
+import pons
+from pons.routing import MessageStore
+
+
+class MessageStoreTests(unittest.TestCase):
+    """
+    tests for the message store of routers
+    """
+
+    def _msg(self, i, size=10):
+        return pons.Message("M%d" % i, 0, 1, size, i)
+
+    def test_add_and_remove(self):
+        store = MessageStore(capacity=30)
+        msgs = [self._msg(i) for i in range(3)]
+        for msg in msgs:
+            store.add(msg)
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.used, 30)
+        self.assertFalse(store.fits(1))
+        self.assertIn(msgs[1].handle, store)
+        self.assertIs(store.get(msgs[2].handle), msgs[2])
+
+        self.assertIs(store.remove(msgs[1]), msgs[1])
+        self.assertIsNone(store.remove(msgs[1]))
+        self.assertEqual(store.used, 20)
+        self.assertEqual(list(store), [msgs[0], msgs[2]])
+
+    def test_copies_share_handle(self):
+        store = MessageStore()
+        msg = self._msg(0)
+        store.add(msg)
+        self.assertIn(copy.deepcopy(msg), store)
+        self.assertNotIn(self._msg(1), store)
+
+    def test_remove_while_iterating(self):
+        store = MessageStore()
+        msgs = [self._msg(i) for i in range(5)]
+        for msg in msgs:
+            store.add(msg)
+        seen = []
+        for msg in store:
+            seen.append(msg)
+            store.remove(msg)
+            if msg is msgs[1]:
+                store.remove(msgs[3])
+        self.assertEqual(seen, [msgs[0], msgs[1], msgs[2], msgs[4]])
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store.used, 0)
+
+    def test_expired(self):
+        store = MessageStore()
+        msgs = [
+            pons.Message("M%d" % i, 0, 1, 10, 0, ttl=ttl)
+            for i, ttl in enumerate([30, 10, 20])
+        ]
+        for msg in msgs:
+            store.add(msg)
+        store.remove(msgs[2])
+        self.assertEqual(list(store.expired(10)), [])
+        expired = []
+        for msg in store.expired(40):
+            expired.append(msg)
+            store.remove(msg)
+        self.assertEqual(expired, [msgs[1], msgs[0]])
+        self.assertEqual(len(store), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
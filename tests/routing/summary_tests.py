@@ -0,0 +1,20 @@
+import unittest
+
+from pons.routing import BloomFilter
+
+
+class BloomFilterTests(unittest.TestCase):
+    """
+    tests for the Bloom filter summary vectors
+    """
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter.from_handles(range(0, 20000, 2), fp_rate=0.01)
+        self.assertTrue(all(h in bloom for h in range(0, 20000, 2)))
+        false_positives = sum(1 for h in range(1, 20000, 2) if h in bloom)
+        self.assertLess(false_positives / 10000, 0.02)
+        self.assertLess(len(bloom), 10000 * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
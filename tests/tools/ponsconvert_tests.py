@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import pons
+from pons.mobility.trace import load_trace
+
+TESTS_DIR = Path(__file__).resolve().parents[1]
+TOOL_DIR = TESTS_DIR.parent.joinpath("tools", "ponsconvert")
+NS2_FILE = TESTS_DIR.joinpath("mobility", "ns2_example_0_3600_18_3035.txt")
+
+
+class PonsconvertTests(unittest.TestCase):
+    """
+    tests for the ponsconvert command line tool
+    """
+
+    def _run(self, *args):
+        # run from the tool directory like the script expects when pons is not installed
+        subprocess.run(
+            [sys.executable, "ponsconvert.py"] + list(args),
+            cwd=TOOL_DIR,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+    def test_compile_ns2_end_time(self):
+        """
+        tests if ns2 movements are compiled until the given end time
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "plan.ccm")
+            self._run(
+                "compile",
+                "--ns2",
+                str(NS2_FILE),
+                "-r",
+                "100",
+                "-o",
+                output,
+                "--end-time",
+                "3600",
+            )
+            plan = pons.CoreContactPlan.from_file(output)
+        movement = pons.Ns2Movement.from_file(NS2_FILE, end_time=3600)
+        movement.moves = [(t, node, x, y, 0.0) for t, node, x, y in movement.moves]
+        expected = pons.compile_contact_plan(movement, 100)
+        self.assertEqual(plan, expected)
+
+    @unittest.skipUnless(np, "numpy required")
+    def test_movement_ns2_end_time(self):
+        """
+        tests if ns2 movements are converted into a trace until the given end time
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "trace.npy")
+            self._run(
+                "movement", "--ns2", str(NS2_FILE), "-o", output, "--end-time", "3600"
+            )
+            trace = load_trace(output)
+            moves = [tuple(m) for m in trace.moves.tolist()]
+        movement = pons.Ns2Movement.from_file(NS2_FILE, end_time=3600)
+        self.assertEqual(trace.duration, movement.end)
+        self.assertEqual(moves, [(t, n, x, y, 0.0) for t, n, x, y in movement.moves])
+
+
+if __name__ == "__main__":
+    unittest.main()
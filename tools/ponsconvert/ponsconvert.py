@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+import argparse
+
+try:
+    import pons
+except ImportError:
+    sys.path.append("../../")
+    import pons
+
+from pons.mobility.compiler import compile_contact_plan
+from pons.mobility.trace import convert_one_file, save_trace
+
+
+def load_ns2(args):
+    """loads ns2 movement with moves (time, node, x, y, z) like ONE movement"""
+    movement = pons.Ns2Movement.from_file(args.ns2, end_time=args.end_time)
+    movement.moves = [(t, node, x, y, 0.0) for t, node, x, y in movement.moves]
+    return movement
+
+
+def load_movement(args):
+    if args.one is not None:
+        return pons.OneMovement.from_file(args.one)
+    return load_ns2(args)
+
+
+def cmd_compile(args):
+    start = time.time()
+    movement = load_movement(args)
+    plan = compile_contact_plan(
+        movement,
+        args.range,
+        bw=args.bandwidth,
+        loss=args.loss,
+        delay=args.delay,
+        jitter=args.jitter,
+        interpolate=args.interpolate,
+        cache_dir=args.cache_dir,
+        use_cache=not args.no_cache,
+    )
+    plan.save(args.output)
+    print(
+        "compiled %s into %d contacts in %.02fs"
+        % (movement, len(plan.contacts), time.time() - start)
+    )
+
+
+def cmd_plan(args):
+    start = time.time()
+    if args.input.endswith(".csv"):
+        plan = pons.CoreContactPlan.from_csv_file(
+            args.input,
+            parse_header=args.parse_header,
+            delimiter=args.delimiter,
+            speedup=args.speedup,
+        )
+    else:
+        plan = pons.CoreContactPlan.from_file(args.input)
+    plan.save_binary(args.output)
+    print("converted %s into %s in %.02fs" % (args.input, plan, time.time() - start))
+
+
+def cmd_movement(args):
+    start = time.time()
+    if args.one is not None:
+        convert_one_file(args.one, args.output)
+    else:
+        movement = load_ns2(args)
+        save_trace(args.output, movement.moves, duration=movement.end)
+    print("converted movement into %s in %.02fs" % (args.output, time.time() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert movement traces and contact plans for PONS"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = subparsers.add_parser(
+        "compile", help="Compile a movement trace into a core contact plan"
+    )
+    trace = compile_parser.add_mutually_exclusive_group(required=True)
+    trace.add_argument("--one", type=str, help="The ONE movement file")
+    trace.add_argument("--ns2", type=str, help="The ns2 movement file")
+    compile_parser.add_argument(
+        "-r", "--range", type=float, help="The radio range", required=True
+    )
+    compile_parser.add_argument(
+        "-o", "--output", type=str, help="The output contact plan", required=True
+    )
+    compile_parser.add_argument(
+        "--end-time", type=int, help="The end time of ns2 movements in whole seconds"
+    )
+    compile_parser.add_argument(
+        "-b", "--bandwidth", type=int, help="The bandwidth of the contacts", default=0
+    )
+    compile_parser.add_argument(
+        "--loss", type=float, help="The loss of the contacts", default=0.0
+    )
+    compile_parser.add_argument(
+        "--delay", type=float, help="The delay of the contacts in ms", default=0.0
+    )
+    compile_parser.add_argument(
+        "--jitter", type=float, help="The jitter of the contacts", default=0.0
+    )
+    compile_parser.add_argument(
+        "--interpolate",
+        help="Move linearly between samples instead of keeping each sample",
+        action="store_true",
+    )
+    compile_parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help="Cache compiled plans in this directory (default: $PONS_CACHE_DIR, no cache if unset)",
+    )
+    compile_parser.add_argument(
+        "--no-cache", help="Do not use the plan cache", action="store_true"
+    )
+    compile_parser.set_defaults(func=cmd_compile)
+
+    plan_parser = subparsers.add_parser(
+        "plan",
+        help="Convert a core contact plan (.ccm) or CSV contact trace into the binary plan format",
+    )
+    plan_parser.add_argument("input", type=str, help="The .ccm or .csv input file")
+    plan_parser.add_argument(
+        "-o", "--output", type=str, help="The output binary plan", required=True
+    )
+    plan_parser.add_argument(
+        "--parse-header",
+        help="Read the simulation start time from the CSV header",
+        action="store_true",
+    )
+    plan_parser.add_argument(
+        "--delimiter", type=str, help="The CSV delimiter", default=","
+    )
+    plan_parser.add_argument(
+        "--speedup", type=float, help="The CSV time speedup factor", default=1
+    )
+    plan_parser.set_defaults(func=cmd_plan)
+
+    movement_parser = subparsers.add_parser(
+        "movement", help="Convert a movement trace into a memory-mapped .npy trace"
+    )
+    trace = movement_parser.add_mutually_exclusive_group(required=True)
+    trace.add_argument("--one", type=str, help="The ONE movement file")
+    trace.add_argument("--ns2", type=str, help="The ns2 movement file")
+    movement_parser.add_argument(
+        "-o", "--output", type=str, help="The output .npy file", required=True
+    )
+    movement_parser.add_argument(
+        "--end-time", type=int, help="The end time of ns2 movements in whole seconds"
+    )
+    movement_parser.set_defaults(func=cmd_movement)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()